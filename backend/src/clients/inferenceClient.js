@@ -5,6 +5,22 @@
 import axios from 'axios';
 import { envConfig } from '../core/env_config.js';
 const logger = console;
+// ===== Helpers =====
+/**
+ * Map a Python emotion result {label, score, top_emotions, intensity, category} to our interface
+ */
+function mapEmotionResult(data) {
+    return {
+        emotion: data.label,
+        confidence: data.score,
+        scores: data.top_emotions?.reduce((acc, item) => {
+            acc[item.label] = item.score;
+            return acc;
+        }, {}) || {},
+        intensity: data.intensity,
+        category: data.category
+    };
+}
 // ===== Inference Client Class =====
 export class InferenceClient {
     client;
@@ -105,25 +121,36 @@ export class InferenceClient {
             throw new Error(`Failed to communicate with inference service: ${error.message}`);
         }
     }
+    /**
+     * Run a whole chat turn in one request: emotion detection, crisis check,
+     * memory/web context and generation (Python runs the lookups concurrently)
+     */
+    async processTurn(request) {
+        try {
+            logger.info(`Requesting turn inference (${request.text.length} chars)`);
+            const response = await this.client.post('/infer/turn', request);
+            logger.info(`Turn inference completed: ${response.data.tokens_generated} tokens`);
+            return {
+                ...response.data,
+                // Same shape as detectEmotion(); null if the emotion model is unavailable
+                emotion: response.data.emotion ? mapEmotionResult(response.data.emotion) : null
+            };
+        }
+        catch (error) {
+            if (error.response?.status === 500) {
+                throw new Error(`Turn inference failed: ${error.response.data?.detail || 'Unknown error'}`);
+            }
+            throw new Error(`Failed to communicate with inference service: ${error.message}`);
+        }
+    }
     /**
      * Perform emotion detection
      */
     async detectEmotion(request) {
         try {
             logger.info(`Requesting emotion inference (${request.text.length} chars)`);
-            // Python service returns: {label, score, top_emotions, intensity, category}
             const response = await this.client.post('/infer/emotion', request);
-            // Map Python response to our interface
-            const mapped = {
-                emotion: response.data.label,
-                confidence: response.data.score,
-                scores: response.data.top_emotions?.reduce((acc, item) => {
-                    acc[item.label] = item.score;
-                    return acc;
-                }, {}) || {},
-                intensity: response.data.intensity,
-                category: response.data.category
-            };
+            const mapped = mapEmotionResult(response.data);
             logger.info(`Emotion detected: ${mapped.emotion} (${mapped.confidence.toFixed(2)})`);
             return mapped;
         }
@@ -59,26 +59,7 @@ export class HybridChatbot {
 
         const inferenceClient = getInferenceClient();
         try {
-            // Step 1: Detect emotion using Python service
-            const emotionResult = await inferenceClient.detectEmotion({
-                text: userMessage
-            });
-            // --- CRITICAL FIX: Robust validation against missing data ---
-            if (!emotionResult || typeof emotionResult.confidence !== 'number') {
-                logger.error('Inference service returned invalid emotion result structure (missing confidence).', emotionResult);
-                throw new Error('Inference service failed to return valid emotion data. Check Python logs for model load errors.');
-            }
-            // -----------------------------------------------------------
-            const emotionData = {
-                emotion: emotionResult.emotion,
-                confidence: emotionResult.confidence,
-                scores: emotionResult.scores,
-                intensity: emotionResult.intensity,
-                category: emotionResult.category
-            };
-            logger.info(`Detected emotion: ${emotionData.emotion} (${emotionData.confidence})`);
-
-            // Step 2: Use Python's context-aware generation (with all the romantic/formatting instructions)
+            // Step 1: Prepare character + user settings for Python's context-aware generation
             // OPTIMIZATION: Use cached character profile (only load once per session)
             if (!this.cachedCharacter) {
                 this.cachedCharacter = this.characterLoader.getActiveCharacter();
@@ -108,7 +89,6 @@ export class HybridChatbot {
             // This enables context-aware responses and prevents repetition
             const contextRequest = {
                 text: userMessage,
-                emotion_data: emotionData,
                 conversation_history: this.conversationHistory,  // Use real history!
                 // Send FULL character object WITH user settings so Python doesn't need to load from disk
                 character_profile: enrichedCharacter || null,
@@ -120,8 +100,23 @@ export class HybridChatbot {
             // Log minimal context (no sensitive data)
             logger.info(`Processing message - History: ${this.conversationHistory.length} messages, Memory: ${userSettings.enableMemory ? 'enabled' : 'disabled'}`);
 
-            const llmResult = await inferenceClient.generateWithContext(contextRequest);
+            // Step 2: One round trip - Python detects emotion while it fetches memory/web context
+            const llmResult = await inferenceClient.processTurn(contextRequest);
             const llmResponse = llmResult.text;
+            // --- CRITICAL FIX: Robust validation against missing data ---
+            const emotionResult = llmResult.emotion;
+            if (!emotionResult || typeof emotionResult.confidence !== 'number') {
+                logger.warn('Inference service returned no emotion data (check Python logs for model load errors); using neutral.');
+            }
+            // -----------------------------------------------------------
+            const emotionData = emotionResult && typeof emotionResult.confidence === 'number' ? {
+                emotion: emotionResult.emotion,
+                confidence: emotionResult.confidence,
+                scores: emotionResult.scores,
+                intensity: emotionResult.intensity,
+                category: emotionResult.category
+            } : { emotion: 'neutral', confidence: 0, scores: {}, intensity: 'low', category: 'neutral' };
+            logger.info(`Detected emotion: ${emotionData.emotion} (${emotionData.confidence})`);
             // Step 4: Update conversation history (unless skipHistory is true for system prompts)
             if (!skipHistory) {
                 this.conversationHistory.push({
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark emotion engines: transformers pipeline vs direct ONNX Runtime session.
+
+Loads the local emotion model with both engines (result cache disabled), checks
+that they agree on the top label, and reports single-message latency and
+batched throughput.
+
+Usage:
+    python inference/benchmarks/benchmark_emotion.py [--model PATH] [--iterations N] [--batch-size N]
+
+Example:
+    python inference/benchmarks/benchmark_emotion.py --iterations 20 --batch-size 16
+"""
+
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+# Get project root (two levels up from this file)
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from inference.processors.emotion import EmotionDetector
+
+DEFAULT_MODEL = project_root / "models" / "roberta_emotions_onnx"
+
+# Typical chat messages, short and long
+SAMPLE_MESSAGES = [
+    "lol", "ok", "goodnight", "haha yes", "thank you so much!",
+    "I can't believe I got the job!!",
+    "I'm so tired of everything going wrong lately.",
+    "Why would you say that to me?",
+    "That's hilarious, you always know how to make me laugh",
+    "I miss my grandma. Today would have been her birthday.",
+    "Honestly I'm a bit nervous about tomorrow's presentation.",
+    "What do you think happens after we die?",
+    "I finally finished the painting I've been working on for months and I'm really proud of how it turned out.",
+    "ugh my roommate left dishes in the sink again",
+    "Do you want to go on an adventure with me?",
+    "I'm sorry I snapped at you earlier, that wasn't fair.",
+    "wow. just wow.",
+    "I'm curious, how does that actually work?",
+    "My dog got out and I've been looking for hours, I'm panicking.",
+    "Today was fine I guess. Nothing special happened at work, had lunch, came home, watched some TV, "
+    "and now I'm just lying in bed thinking about whether I should start learning guitar again.",
+]
+
+
+def time_single(detector: EmotionDetector, messages: list, iterations: int) -> list:
+    """Per-call latencies in ms for one message at a time"""
+    latencies = []
+    for _ in range(iterations):
+        for message in messages:
+            start = time.perf_counter()
+            detector.detect(message)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def time_batched(detector: EmotionDetector, messages: list, iterations: int, batch_size: int) -> float:
+    """Throughput in texts/sec using detect_batch"""
+    batches = [messages[i:i + batch_size] for i in range(0, len(messages), batch_size)]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for batch in batches:
+            detector.detect_batch(batch)
+    elapsed = time.perf_counter() - start
+    return len(messages) * iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emotion engine benchmark (pipeline vs ONNX Runtime)")
+    parser.add_argument('--model', type=Path, default=DEFAULT_MODEL, help="ONNX emotion model directory")
+    parser.add_argument('--iterations', type=int, default=10, help="Passes over the sample messages")
+    parser.add_argument('--batch-size', type=int, default=16, help="Batch size for the throughput run")
+    args = parser.parse_args()
+
+    if not (args.model / "model.onnx").exists():
+        print(f"❌ model.onnx not found in {args.model}")
+        sys.exit(1)
+
+    engines = {}
+    for name in ("pipeline", "onnx"):
+        detector = EmotionDetector(model_path=str(args.model), cache_size=0, engine=name)
+        if not detector.initialized or (name == "onnx" and detector.engine is None):
+            print(f"❌ Could not load the {name} engine")
+            sys.exit(1)
+        engines[name] = detector
+
+    # Agreement on the top label
+    reference = engines["pipeline"].detect_batch(SAMPLE_MESSAGES)
+    candidate = engines["onnx"].detect_batch(SAMPLE_MESSAGES)
+    agree = sum(r['label'] == c['label'] for r, c in zip(reference, candidate))
+    max_diff = max(abs(r['score'] - c['score']) for r, c in zip(reference, candidate) if r['label'] == c['label'])
+    print(f"Top-label agreement: {agree}/{len(SAMPLE_MESSAGES)} ({agree / len(SAMPLE_MESSAGES):.1%}), "
+          f"max top-score difference {max_diff:.5f}")
+
+    print(f"\n{'Engine':<10}{'p50 ms':>9}{'p95 ms':>9}{'batch texts/s':>15}")
+    print("-" * 43)
+    for name, detector in engines.items():
+        time_single(detector, SAMPLE_MESSAGES[:3], 1)  # warm up
+        latencies = sorted(time_single(detector, SAMPLE_MESSAGES, args.iterations))
+        p50 = statistics.median(latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        throughput = time_batched(detector, SAMPLE_MESSAGES, args.iterations, max(args.batch_size, 1))
+        print(f"{name:<10}{p50:>9.2f}{p95:>9.2f}{throughput:>15.1f}")
+
+    for detector in engines.values():
+        detector.cleanup()
+
+    sys.exit(0 if agree == len(SAMPLE_MESSAGES) else 1)
+
+
+if __name__ == "__main__":
+    main()
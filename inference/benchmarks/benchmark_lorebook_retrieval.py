@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark for per-turn lorebook retrieval.
+
+Times LorebookRetriever.retrieve on two lorebooks:
+- tag lorebook: generated from every UI tag (emotion_responses chunks)
+- keyword lorebook: synthetic trigger-keyword chunks, scored against a long
+  message and conversation context
+
+The first call compiles the lorebook; the timed turns reuse it. The next line
+times retrieve_for_turn (the prompt path) when consecutive turns repeat the
+same memo key.
+
+With --semantic the keyword lorebook is also timed with semantic scoring,
+using MemoryService's embedding model (needs chromadb and sentence-transformers;
+the model is downloaded on first use). Chunk embedding is reported separately;
+message embeddings are computed before the timed turns, as the service does
+while the prompt builder is set up.
+
+Usage:
+    python inference/benchmarks/benchmark_lorebook_retrieval.py [--turns N] [--chunks N] [--keywords N] [--semantic]
+
+Example:
+    python inference/benchmarks/benchmark_lorebook_retrieval.py --turns 500 --chunks 300
+"""
+
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import logging
+import argparse
+from pathlib import Path
+
+# Get project root (two levels up from this file)
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from inference.processors.lorebook_generator import LorebookGenerator
+from inference.processors.lorebook_templates import LorebookTemplates
+from inference.processors.lorebook_retriever import LorebookRetriever
+
+EMOTIONS = ["joy", "sadness", "anger", "fear", "love", "neutral", "excitement", "anxiety"]
+
+
+def tag_lorebook() -> dict:
+    """Lorebook generated from every UI tag in the template library"""
+    selected_tags = {
+        category.replace("_", " ").title(): tags
+        for category, tags in LorebookTemplates.get_all_ui_tags().items()
+    }
+    return LorebookGenerator().generate_lorebook_from_tags("Bench", "romantic", selected_tags)
+
+
+def keyword_lorebook(rng: random.Random, vocabulary: list, chunks: int, keywords: int) -> dict:
+    """Synthetic lorebook of old-style chunks with trigger keywords and emotions"""
+    return {
+        "companion_type": "romantic",
+        "chunks": [
+            {
+                "id": f"kw_{i}",
+                "category": rng.choice(["boundary", "affection", "communication", "context"]),
+                "priority": rng.randint(10, 90),
+                "tokens": 60,
+                "content": f"Keyword chunk {i}.",
+                "triggers": {
+                    "keywords": rng.sample(vocabulary, keywords),
+                    "emotions": rng.sample(EMOTIONS, 2),
+                },
+            }
+            for i in range(chunks)
+        ],
+    }
+
+
+def time_turns(retriever: LorebookRetriever, lorebook: dict, turns: list) -> float:
+    """Average ms per retrieve() call over the turns"""
+    retriever.retrieve(lorebook, turns[0][0], turns[0][1])  # compile outside the timing
+    start = time.perf_counter()
+    for message, emotion, history in turns:
+        retriever.retrieve(
+            lorebook,
+            message,
+            emotion=emotion,
+            conversation_history=history,
+            top_emotions=[(emotion, 0.7), ("neutral", 0.2)],
+            selected_tags={chunk["id"] for chunk in lorebook["chunks"]}
+        )
+    return (time.perf_counter() - start) / len(turns) * 1000
+
+
+def time_memoised(lorebook: dict, turn: tuple, repeats: int) -> float:
+    """Average ms per retrieve_for_turn() call when every turn has the same memo key"""
+    retriever = LorebookRetriever()
+    message, emotion, history = turn
+
+    def run():
+        retriever.retrieve_for_turn(
+            lorebook,
+            message,
+            emotion=emotion,
+            conversation_history=history,
+            top_emotions=[(emotion, 0.7), ("neutral", 0.2)],
+            token_budget=300
+        )
+
+    run()  # compile and fill the memo outside the timing
+    start = time.perf_counter()
+    for _ in range(repeats):
+        run()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def time_semantic(lorebook: dict, turns: list) -> tuple:
+    """
+    (ms to embed the lorebook's chunks, average ms per retrieve() call with semantic scoring)
+    """
+    from inference.memory.memory_service import MemoryService
+
+    with tempfile.TemporaryDirectory() as memory_dir:
+        service = MemoryService(persist_directory=memory_dir)
+        asyncio.run(service.initialize())
+
+        retriever = LorebookRetriever(embedder=service)
+        compiled = retriever.compile(lorebook)
+        start = time.perf_counter()
+        compiled.semantic_index(service)
+        embed_ms = (time.perf_counter() - start) * 1000
+
+        for message, _, _ in turns:
+            service.embed_query(message)  # fills the embedding cache, as the service does before prompt building
+
+        turn_ms = time_turns(retriever, lorebook, turns)
+        service.cleanup()
+        return embed_ms, turn_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn lorebook retrieval benchmark")
+    parser.add_argument('--turns', type=int, default=300, help="Turns timed per lorebook")
+    parser.add_argument('--chunks', type=int, default=200, help="Chunks in the keyword lorebook")
+    parser.add_argument('--keywords', type=int, default=12, help="Trigger keywords per chunk")
+    parser.add_argument('--semantic', action='store_true', help="Also time semantic scoring (loads the embedding model)")
+    args = parser.parse_args()
+
+    # Retrieval logs every turn at INFO; keep the output readable
+    logging.basicConfig(level=logging.ERROR)
+
+    rng = random.Random(0)
+    vocabulary = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(4, 9))) for _ in range(3000)]
+    turns = [
+        (
+            " ".join(rng.choices(vocabulary, k=60)),
+            rng.choice(EMOTIONS),
+            [{"role": "user", "content": " ".join(rng.choices(vocabulary, k=80))} for _ in range(3)],
+        )
+        for _ in range(max(args.turns, 1))
+    ]
+
+    tags = tag_lorebook()
+    keywords = keyword_lorebook(rng, vocabulary, args.chunks, args.keywords)
+
+    print(f"Tag lorebook     ({len(tags['chunks'])} chunks):     "
+          f"{time_turns(LorebookRetriever(), tags, turns):7.3f} ms/turn")
+    print(f"Keyword lorebook ({args.chunks} chunks x {args.keywords} keywords): "
+          f"{time_turns(LorebookRetriever(), keywords, turns):7.3f} ms/turn")
+    print(f"Keyword lorebook, repeated memo key (retrieve_for_turn):  "
+          f"{time_memoised(keywords, turns[0], len(turns)):7.3f} ms/turn")
+
+    if args.semantic:
+        embed_ms, turn_ms = time_semantic(keywords, turns)
+        print(f"Keyword lorebook + semantic scoring:                      "
+              f"{turn_ms:7.3f} ms/turn ({args.chunks} chunks embedded once in {embed_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
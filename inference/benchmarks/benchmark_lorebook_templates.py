@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Regression check and benchmark for LorebookTemplates lookups.
+
+Checks that the prebuilt indexes agree with a linear scan of TEMPLATES, and that
+every template is found from its (UI category, UI tag) pair - including the tags
+shared by several categories (Reserved, Friendly, Passionate). Then times the
+full tag set resolved the old way (linear scan per tag) and through the indexes.
+Exits non-zero if any lookup disagrees.
+
+Usage:
+    python inference/benchmarks/benchmark_lorebook_templates.py [--iterations N]
+
+Example:
+    python inference/benchmarks/benchmark_lorebook_templates.py --iterations 2000
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Get project root (two levels up from this file)
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from inference.processors.lorebook_templates import LorebookTemplates
+
+
+def scan_by_ui_tag(ui_tag: str) -> dict:
+    """Lookup as it was done before the indexes: first template with the tag"""
+    for template in LorebookTemplates.TEMPLATES.values():
+        if template.get("ui_tag") == ui_tag:
+            return template
+    return {}
+
+
+def full_tag_set() -> list:
+    """Every (UI category name, UI tag, template id) in the library"""
+    return [
+        (template["category"].replace("_", " ").title(), template["ui_tag"], template["id"])
+        for template in LorebookTemplates.TEMPLATES.values()
+        if template.get("ui_tag")
+    ]
+
+
+def check_indexes(tag_set: list) -> int:
+    """
+    Compare the indexed lookups with linear scans.
+
+    Returns:
+        Number of mismatches
+    """
+    templates = LorebookTemplates.TEMPLATES.values()
+    failures = 0
+
+    for category in {t["category"] for t in templates}:
+        expected = [t["id"] for t in templates if t.get("category") == category]
+        actual = [t["id"] for t in LorebookTemplates.get_templates_by_category(category)]
+        if actual != expected:
+            failures += 1
+            print(f"❌ category {category}: {actual} != {expected}")
+
+    for directive in {t.get("directive") for t in templates}:
+        expected = [t["id"] for t in templates if t.get("directive") == directive]
+        actual = [t["id"] for t in LorebookTemplates.get_templates_by_directive(directive)]
+        if actual != expected:
+            failures += 1
+            print(f"❌ directive {directive}: {actual} != {expected}")
+
+    for ui_category, ui_tag, template_id in tag_set:
+        # Without a category the old first-match behaviour is kept
+        if LorebookTemplates.get_template_by_ui_tag(ui_tag) is not scan_by_ui_tag(ui_tag):
+            failures += 1
+            print(f"❌ tag {ui_tag!r} without category differs from the linear scan")
+        # With its category every template is reachable
+        found = LorebookTemplates.get_template_by_ui_tag(ui_tag, ui_category).get("id")
+        if found != template_id:
+            failures += 1
+            print(f"❌ tag {ui_tag!r} in {ui_category!r}: got {found}, expected {template_id}")
+
+    print(f"{'✅' if not failures else '⚠️'} Index check: {len(tag_set)} tags, {failures} mismatches")
+    return failures
+
+
+def benchmark(tag_set: list, iterations: int):
+    """Time resolving the full tag set once per iteration"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for _, ui_tag, _ in tag_set:
+            scan_by_ui_tag(ui_tag)
+    scan_us = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for ui_category, ui_tag, _ in tag_set:
+            LorebookTemplates.get_template_by_ui_tag(ui_tag, ui_category)
+    index_us = (time.perf_counter() - start) / iterations * 1e6
+
+    print(f"\nFull tag set ({len(tag_set)} tags), {iterations} iterations:")
+    print(f"  Linear scan:   {scan_us:10.1f} µs per set")
+    print(f"  Indexed:       {index_us:10.1f} µs per set ({scan_us / index_us:.0f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LorebookTemplates index check and benchmark")
+    parser.add_argument('--iterations', type=int, default=1000, help="Passes over the full tag set when timing")
+    args = parser.parse_args()
+
+    tag_set = full_tag_set()
+    failures = check_indexes(tag_set)
+    benchmark(tag_set, max(args.iterations, 1))
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
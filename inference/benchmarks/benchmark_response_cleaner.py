@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Regression check and benchmark for ResponseCleaner.
+
+Runs every case in response_cleaner_corpus.json (raw LLM output -> expected
+cleaned output), then reports total throughput and time spent per cleaning rule.
+Each case is also streamed through StreamingResponseCleaner in randomly sized
+deltas, checking that the concatenated emits equal clean() on the streamed text.
+Exits non-zero if any case no longer produces its expected output.
+
+Usage:
+    python inference/benchmarks/benchmark_response_cleaner.py [--iterations N] [--check]
+
+Example:
+    python inference/benchmarks/benchmark_response_cleaner.py --iterations 500
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+# Get project root (two levels up from this file)
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from inference.processors.response_cleaner import ResponseCleaner
+from inference.processors.streaming_cleaner import StreamingResponseCleaner
+
+DEFAULT_CORPUS = Path(__file__).parent / "response_cleaner_corpus.json"
+
+
+def load_corpus(path: Path) -> tuple:
+    """
+    Load the regression corpus.
+
+    Returns:
+        Tuple of (ResponseCleaner, list of cases)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    cleaner = ResponseCleaner(
+        character_name=corpus['character_name'],
+        user_name=corpus['user_name'],
+        avoid_words=corpus.get('avoid_words', [])
+    )
+    return cleaner, corpus['cases']
+
+
+def timed_clean(cleaner: ResponseCleaner, text: str, timings: dict) -> str:
+    """
+    Same steps as ResponseCleaner.clean(), accumulating seconds per rule into timings.
+    """
+    clock = time.perf_counter
+
+    start = clock()
+    text = text.strip()
+    is_simple_goodnight = bool(cleaner.GOODNIGHT_PATTERN.search(text)) and len(text.split()) <= 8
+    timings['goodnight_check'] += clock() - start
+
+    start = clock()
+    text = cleaner._remove_emojis(text, keep_hearts=is_simple_goodnight)
+    timings['emojis'] += clock() - start
+
+    for name, stage in cleaner.STAGES:
+        start = clock()
+        text = stage(cleaner, text)
+        timings[name] += clock() - start
+
+    start = clock()
+    if is_simple_goodnight and not cleaner.HEART_PATTERN.search(text):
+        text = text.rstrip() + ' ❤️'
+    timings['goodnight_heart'] += clock() - start
+
+    return text.strip()
+
+
+def check_corpus(cleaner: ResponseCleaner, cases: list) -> int:
+    """
+    Compare clean() output against the expected output of every case.
+
+    Returns:
+        Number of failing cases
+    """
+    failures = 0
+    for case in cases:
+        actual = cleaner.clean(case['raw'])
+        if actual != case['expected']:
+            failures += 1
+            print(f"❌ {case['category']}/{case['name']}")
+            print(f"   expected: {case['expected']!r}")
+            print(f"   actual:   {actual!r}")
+
+    passed = len(cases) - failures
+    print(f"{'✅' if not failures else '⚠️'} Corpus: {passed}/{len(cases)} cases passed")
+    return failures
+
+
+def stream_case(cleaner: ResponseCleaner, raw: str, rng: random.Random) -> tuple:
+    """
+    Stream raw text through StreamingResponseCleaner in random 1-12 character deltas,
+    stopping at the first stop condition like the generation loop does.
+
+    Returns:
+        Tuple of (pieces emitted while streaming, remainder from finish(),
+        StreamingResponseCleaner)
+    """
+    stream = StreamingResponseCleaner(cleaner)
+    pieces = []
+    position = 0
+    while position < len(raw) and not stream.stopped:
+        size = rng.randint(1, 12)
+        pieces.append(stream.feed(raw[position:position + size]))
+        position += size
+    return "".join(pieces), stream.finish(), stream
+
+
+def check_streaming(cleaner: ResponseCleaner, cases: list, splits: int = 25, seed: int = 0) -> int:
+    """
+    Stream every case in random splits and check that the concatenated emits equal
+    clean() on the streamed text.
+
+    Returns:
+        Number of failing cases
+    """
+    rng = random.Random(seed)
+    failures = 0
+    early = 0
+    for case in cases:
+        emitted_early = False
+        for _ in range(splits):
+            streamed, remainder, stream = stream_case(cleaner, case['raw'], rng)
+            expected = cleaner.clean(stream.raw_text)
+            if streamed + remainder != expected or stream.diverged:
+                failures += 1
+                print(f"❌ streaming {case['category']}/{case['name']}")
+                print(f"   expected: {expected!r}")
+                print(f"   emitted:  {streamed + remainder!r}")
+                break
+            emitted_early = emitted_early or bool(streamed)
+        early += emitted_early
+
+    passed = len(cases) - failures
+    print(f"{'✅' if not failures else '⚠️'} Streaming: {passed}/{len(cases)} cases passed "
+          f"({early} emitted text before the stream finished)")
+    return failures
+
+
+def benchmark(cleaner: ResponseCleaner, cases: list, iterations: int):
+    """Report throughput of clean() and time spent per rule"""
+    inputs = [case['raw'] for case in cases]
+    responses = len(inputs) * iterations
+
+    # Warm up compiled-pattern caches
+    for raw in inputs:
+        cleaner.clean(raw)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for raw in inputs:
+            cleaner.clean(raw)
+    elapsed = time.perf_counter() - start
+
+    print(f"\nThroughput: {responses / elapsed:,.0f} responses/sec "
+          f"({elapsed / responses * 1e6:.1f} µs/response, {responses} responses)")
+
+    timings = defaultdict(float)
+    for _ in range(iterations):
+        for raw in inputs:
+            timed_clean(cleaner, raw, timings)
+
+    total = sum(timings.values()) or 1.0
+    print(f"\n{'Rule':<32}{'µs/response':>12}{'share':>8}")
+    print("-" * 52)
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        print(f"{name:<32}{seconds / responses * 1e6:>12.2f}{seconds / total:>8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ResponseCleaner regression corpus and benchmark")
+    parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS, help="Path to corpus JSON")
+    parser.add_argument('--iterations', type=int, default=200, help="Passes over the corpus when timing")
+    parser.add_argument('--check', action='store_true', help="Only run the regression check")
+    args = parser.parse_args()
+
+    cleaner, cases = load_corpus(args.corpus)
+    failures = check_corpus(cleaner, cases)
+    failures += check_streaming(cleaner, cases)
+
+    if not args.check:
+        benchmark(cleaner, cases, max(args.iterations, 1))
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Regression check and benchmark for the safety detectors.
+
+Runs every message in safety_corpus.json through CrisisDetector and AgeDetector
+and compares the decisions (crisis, risk level, age violation) with the expected
+ones, then reports the time per message for the shared SafetyScanner pass and
+for the two detectors.
+Exits non-zero if any decision changed.
+
+Usage:
+    python inference/benchmarks/benchmark_safety.py [--iterations N] [--check]
+
+Example:
+    python inference/benchmarks/benchmark_safety.py --iterations 500
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+
+# Get project root (two levels up from this file)
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from inference.processors.crisis_detector import CrisisDetector
+from inference.processors.age_detector import AgeDetector
+
+DEFAULT_CORPUS = Path(__file__).parent / "safety_corpus.json"
+
+
+def check_corpus(crisis: CrisisDetector, age: AgeDetector, cases: list) -> int:
+    """
+    Compare detector decisions against the expected decisions of every case.
+
+    Returns:
+        Number of failing cases
+    """
+    failures = 0
+    for case in cases:
+        scan = crisis.scanner.scan(case['message'])
+        is_crisis, risk_level, _ = crisis.detect(case['message'], scan=scan)
+        is_violation, _ = age.detect(case['message'], scan=scan)
+
+        actual = (is_crisis, risk_level, is_violation)
+        expected = (case['crisis'], case['risk_level'], case['age_violation'])
+        if actual != expected:
+            failures += 1
+            print(f"❌ {case['category']}: {case['message']!r}")
+            print(f"   expected (crisis, risk, age): {expected}")
+            print(f"   actual   (crisis, risk, age): {actual}")
+
+    passed = len(cases) - failures
+    print(f"{'✅' if not failures else '⚠️'} Corpus: {passed}/{len(cases)} cases passed")
+    return failures
+
+
+def benchmark(crisis: CrisisDetector, age: AgeDetector, cases: list, iterations: int):
+    """Report µs per message for the scanner alone and for both detectors"""
+    messages = [case['message'] for case in cases] * iterations
+    scanner = crisis.scanner
+
+    start = time.perf_counter()
+    for message in messages:
+        scanner.scan(message)
+    scan_us = (time.perf_counter() - start) / len(messages) * 1e6
+
+    start = time.perf_counter()
+    for message in messages:
+        scan = scanner.scan(message)
+        crisis.detect(message, scan=scan)
+        age.detect(message, scan=scan)
+    both_us = (time.perf_counter() - start) / len(messages) * 1e6
+
+    print(f"\nScanner pass:                 {scan_us:8.2f} µs/message")
+    print(f"Crisis + age (shared scan):   {both_us:8.2f} µs/message ({len(messages)} messages)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Safety detector regression set and benchmark")
+    parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS, help="Path to corpus JSON")
+    parser.add_argument('--iterations', type=int, default=200, help="Passes over the corpus when timing")
+    parser.add_argument('--check', action='store_true', help="Only run the regression check")
+    args = parser.parse_args()
+
+    # Detectors log a warning per detection; keep the output readable
+    logging.basicConfig(level=logging.ERROR)
+
+    with open(args.corpus, 'r', encoding='utf-8') as f:
+        cases = json.load(f)['cases']
+
+    crisis = CrisisDetector()
+    age = AgeDetector()
+    failures = check_corpus(crisis, age, cases)
+
+    if not args.check:
+        benchmark(crisis, age, cases, max(args.iterations, 1))
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Cold-import budget check for the inference service.
+
+Imports main.py in a fresh interpreter (as uvicorn does at startup), and fails if
+the import takes longer than the budget or pulls in any heavy library that should
+only load once its component is enabled (llama_cpp, transformers, chromadb, ...).
+Prints the slowest modules from python -X importtime to show what to defer next.
+
+Usage:
+    python inference/benchmarks/check_import_budget.py [--budget-ms N] [--runs N] [--top N]
+
+Example:
+    python inference/benchmarks/check_import_budget.py --budget-ms 1500 --runs 3
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+INFERENCE_DIR = Path(__file__).parent.parent
+
+# Must not be imported by `import main`; each is loaded during startup only if its component is enabled
+DEFERRED_MODULES = [
+    "llama_cpp",
+    "transformers",
+    "optimum",
+    "onnxruntime",
+    "torch",
+    "chromadb",
+    "sentence_transformers",
+    "mcp",
+]
+
+# Runs in the child interpreter: time `import main`, report heavy modules that got loaded
+PROBE = f"""
+import sys, json, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+deferred = {DEFERRED_MODULES!r}
+loaded = [name for name in deferred if name in sys.modules]
+print(json.dumps({{"import_ms": elapsed * 1000, "loaded": loaded}}))
+"""
+
+
+def run_probe(importtime: bool = False) -> tuple:
+    """
+    Import main.py once in a fresh interpreter.
+
+    Returns:
+        Tuple of (probe result dict, stderr text)
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", PROBE]
+
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    completed = subprocess.run(command, cwd=INFERENCE_DIR, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        print(f"❌ `import main` failed:\n{completed.stderr.strip()[-2000:]}")
+        sys.exit(2)
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return result, completed.stderr
+
+
+def slowest_modules(importtime_output: str, top: int) -> list:
+    """Parse -X importtime output into (cumulative µs, module) pairs, slowest first"""
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # "import time: <self us> | <cumulative us> | <module>" (the header line isn't numeric)
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]), parts[2].strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if cold `import main` exceeds the startup budget")
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")),
+                        help="Maximum cold import time in ms (default: IMPORT_BUDGET_MS or 1500)")
+    parser.add_argument('--runs', type=int, default=3, help="Fresh-interpreter runs; the fastest is compared")
+    parser.add_argument('--top', type=int, default=15, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    timings = []
+    loaded = set()
+    for _ in range(max(args.runs, 1)):
+        result, _ = run_probe()
+        timings.append(result["import_ms"])
+        loaded.update(result["loaded"])
+
+    best = min(timings)
+    print(f"Cold `import main`: best {best:.0f} ms over {len(timings)} runs "
+          f"(all: {', '.join(f'{t:.0f}' for t in timings)}), budget {args.budget_ms:.0f} ms")
+
+    _, importtime_output = run_probe(importtime=True)
+    print(f"\n{'Module':<50}{'cumulative ms':>14}")
+    print("-" * 64)
+    for cumulative_us, module in slowest_modules(importtime_output, args.top):
+        print(f"{module:<50}{cumulative_us / 1000:>14.1f}")
+
+    failed = False
+    if loaded:
+        print(f"\n❌ Heavy modules imported at module load (should be lazy): {', '.join(sorted(loaded))}")
+        failed = True
+    if best > args.budget_ms:
+        print(f"\n❌ Over budget by {best - args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\n✅ Within budget, no heavy modules imported eagerly")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -47,10 +47,53 @@ class InferenceConfig:
         self.llm_use_mmap = os.getenv("LLM_USE_MMAP", "true").lower() == "true"
         self.llm_use_mlock = os.getenv("LLM_USE_MLOCK", "false").lower() == "true"
 
+        # Emotion engine: "pipeline" (transformers pipeline) or "onnx" (direct ONNX Runtime session)
+        self.emotion_engine = os.getenv("EMOTION_ENGINE", "pipeline").lower()
+        self.emotion_intra_op_threads = int(os.getenv("EMOTION_INTRA_OP_THREADS", "4"))
+        self.emotion_inter_op_threads = int(os.getenv("EMOTION_INTER_OP_THREADS", "1"))
+
+        # Long messages are scored as sentence chunks merged by "max", "mean" or "last_weighted"
+        self.emotion_chunk_merge = os.getenv("EMOTION_CHUNK_MERGE", "max").lower()
+        self.emotion_max_chunks = int(os.getenv("EMOTION_MAX_CHUNKS", "8"))
+
+        # Emotion micro-batching (concurrent /infer/emotion requests share one classifier run)
+        self.emotion_batch_size = int(os.getenv("EMOTION_BATCH_SIZE", "16"))
+        self.emotion_batch_wait_ms = float(os.getenv("EMOTION_BATCH_WAIT_MS", "5"))
+
+        # Emotion result cache (repeated short messages skip the model)
+        self.emotion_cache_size = int(os.getenv("EMOTION_CACHE_SIZE", "2048"))
+        self.emotion_cache_max_mb = float(os.getenv("EMOTION_CACHE_MAX_MB", "8"))
+
+        # Lorebook retrieval (chunks added to the prompt per turn)
+        self.lorebook_token_budget = int(os.getenv("LOREBOOK_TOKEN_BUDGET", "300"))
+        self.lorebook_max_chunks = int(os.getenv("LOREBOOK_MAX_CHUNKS", "2"))
+        self.lorebook_cache_size = int(os.getenv("LOREBOOK_CACHE_SIZE", "256"))
+        # Semantic scoring of keyword chunks with the memory embedding model (needs ENABLE_MEMORY)
+        self.lorebook_semantic = os.getenv("LOREBOOK_SEMANTIC", "true").lower() == "true"
+        self.lorebook_semantic_weight = int(os.getenv("LOREBOOK_SEMANTIC_WEIGHT", "20"))
+        self.lorebook_semantic_threshold = float(os.getenv("LOREBOOK_SEMANTIC_THRESHOLD", "0.35"))
+
         # Response cleaning settings
         self.min_response_length = int(os.getenv("MIN_RESPONSE_LENGTH", "3"))
         self.enable_fallback_cleaning = os.getenv("ENABLE_FALLBACK_CLEANING", "true").lower() == "true"
 
+        # Vector memory (ChromaDB + sentence-transformers); disabling skips loading both
+        self.enable_memory = os.getenv("ENABLE_MEMORY", "true").lower() == "true"
+
+        # Background safety audit over stored memories (report + resumable state file)
+        self.memory_audit_dir = self._resolve_path(os.getenv("MEMORY_AUDIT_DIR", "data/memory_audit"))
+        self.memory_audit_page_size = int(os.getenv("MEMORY_AUDIT_PAGE_SIZE", "1000"))
+        self.memory_audit_batch_size = int(os.getenv("MEMORY_AUDIT_BATCH_SIZE", "250"))
+        self.memory_audit_workers = int(os.getenv("MEMORY_AUDIT_WORKERS", "2"))
+
+        # Write-behind queue for saved conversations (spool off unless a path is set -
+        # it keeps raw conversation text on disk outside ChromaDB)
+        self.memory_write_behind = os.getenv("MEMORY_WRITE_BEHIND", "true").lower() == "true"
+        self.memory_write_batch_size = int(os.getenv("MEMORY_WRITE_BATCH_SIZE", "32"))
+        self.memory_write_wait_ms = float(os.getenv("MEMORY_WRITE_WAIT_MS", "500"))
+        spool_path_str = os.getenv("MEMORY_WRITE_SPOOL", "")
+        self.memory_write_spool = self._resolve_path(spool_path_str) if spool_path_str else None
+
         # Web search settings
         self.enable_web_search = os.getenv("ENABLE_WEB_SEARCH", "false").lower() == "true"
 
@@ -130,6 +173,17 @@ class InferenceConfig:
         logger.info(f"Context Size: {self.llm_n_ctx}")
         logger.info(f"Batch Size: {self.llm_n_batch}")
         logger.info(f"Threads: {self.llm_n_threads}")
+        logger.info(f"Emotion Engine: {self.emotion_engine}")
+        logger.info(f"Emotion Chunking: up to {self.emotion_max_chunks} chunks, merge {self.emotion_chunk_merge}")
+        logger.info(f"Emotion Batching: size {self.emotion_batch_size}, wait {self.emotion_batch_wait_ms}ms")
+        logger.info(f"Lorebook: {self.lorebook_max_chunks} matched chunks, budget {self.lorebook_token_budget} tokens, "
+                    f"semantic {'on' if self.lorebook_semantic else 'off'} "
+                    f"(weight {self.lorebook_semantic_weight}, threshold {self.lorebook_semantic_threshold})")
+        logger.info(f"Vector Memory: {'Enabled' if self.enable_memory else 'Disabled'}")
+        logger.info(f"Memory Audit: {self.memory_audit_workers} workers, pages of {self.memory_audit_page_size}")
+        logger.info(f"Memory Writes: {'write-behind' if self.memory_write_behind else 'synchronous'} "
+                    f"(batch {self.memory_write_batch_size}, wait {self.memory_write_wait_ms}ms, "
+                    f"spool {self.memory_write_spool or 'off'})")
         logger.info(f"Web Search: {'Enabled' if self.enable_web_search else 'Disabled'}")
         logger.info(f"CORS Origins: {self.allowed_origins}")
         logger.info("=" * 60)
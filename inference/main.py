@@ -7,6 +7,7 @@ from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any, Literal
+import asyncio
 import logging
 import sys
 from pathlib import Path
@@ -15,18 +16,22 @@ from starlette.concurrency import run_in_threadpool
 
 # Import our self-contained config
 from config import config
+from startup_profiler import StartupProfiler
 
 # Import standalone LLM processor (refactored modular version)
 from processors.llm_processor import LLMProcessor
 
 # Import emotion detector
 from processors.emotion import EmotionDetector
+from processors.emotion_batcher import EmotionMicroBatcher
 
 # Import MCP client for web search
 from web_search.client import initialize_mcp, shutdown_mcp, get_mcp_client
 
 # Import vector memory service
 from memory.memory_service import MemoryService
+from memory.safety_audit import MemorySafetyAudit
+from memory.memory_writer import MemoryWriteQueue
 
 # Validate configuration
 if not config.validate():
@@ -43,7 +48,11 @@ logger = logging.getLogger(__name__)
 # Global processors (singleton)
 llm_processor: Optional[LLMProcessor] = None
 emotion_detector: Optional[EmotionDetector] = None
+emotion_batcher: Optional[EmotionMicroBatcher] = None
 memory_service: Optional[MemoryService] = None
+memory_audit: Optional[MemorySafetyAudit] = None
+memory_writer: Optional[MemoryWriteQueue] = None
+startup_profiler: Optional[StartupProfiler] = None
 
 # Cancellation tracking (request_id -> cancelled flag)
 cancelled_requests: set = set()
@@ -54,23 +63,44 @@ cancelled_requests: set = set()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handles startup and shutdown events."""
-    global llm_processor, emotion_detector, memory_service
+    global llm_processor, emotion_detector, emotion_batcher, memory_service, memory_writer, startup_profiler
 
     # ** STARTUP LOGIC **
     logger.info("=" * 60)
     logger.info("Starting Inference Service")
     config.print_config()
 
+    # Heavy libraries are imported lazily per component; the profiler attributes
+    # import and load time to each one
+    profiler = StartupProfiler()
+    startup_profiler = profiler
+
     # 1. Initialize Vector Memory Service
-    try:
-        logger.info("Initializing Vector Memory Service...")
-        memory_service = MemoryService(persist_directory=config.memory_persist_dir)
-        await memory_service.initialize()
-        logger.info("✅ Vector Memory Service initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Vector Memory Service: {str(e)}", exc_info=True)
-        logger.warning("Continuing without vector memory - semantic recall will be disabled")
-        memory_service = None
+    if config.enable_memory:
+        try:
+            logger.info("Initializing Vector Memory Service...")
+            profiler.import_modules("memory", "chromadb", "sentence_transformers")
+            with profiler.track("memory"):
+                memory_service = MemoryService(persist_directory=config.memory_persist_dir)
+                await memory_service.initialize()
+            logger.info("✅ Vector Memory Service initialized")
+
+            # Saved conversations are written in the background
+            if config.memory_write_behind:
+                memory_writer = MemoryWriteQueue(
+                    memory_service,
+                    max_batch_size=config.memory_write_batch_size,
+                    max_wait_ms=config.memory_write_wait_ms,
+                    spool_path=config.memory_write_spool
+                )
+                await memory_writer.start()
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize Vector Memory Service: {str(e)}", exc_info=True)
+            logger.warning("Continuing without vector memory - semantic recall will be disabled")
+            memory_service = None
+    else:
+        logger.info("⏭️  Vector memory disabled in config - skipping ChromaDB and embedding model")
+        profiler.skip("memory")
 
     # 2. Initialize LLM Processor
     try:
@@ -81,20 +111,29 @@ async def lifespan(app: FastAPI):
             logger.error("LLM model file not found")
             logger.error("Please download a GGUF model and update LLM_MODEL_PATH in .env")
             llm_processor = None
+            profiler.skip("llm", "model missing")
         else:
-            llm_processor = LLMProcessor(
-                model_path=config.llm_model_path,
-                n_ctx=config.llm_n_ctx,
-                n_threads=config.llm_n_threads,
-                n_gpu_layers=config.llm_n_gpu_layers,
-                n_batch=config.llm_n_batch,  # Pass batch size from config
-                memory_service=memory_service,  # Pass vector memory to LLM
-                use_mmap=config.llm_use_mmap,  # Memory-mapped loading
-                use_mlock=config.llm_use_mlock  # Memory locking (disabled on macOS)
-            )
-
-            # Initialize - this is an async method that loads the model
-            await llm_processor.initialize()
+            profiler.import_modules("llm", "llama_cpp")
+            with profiler.track("llm"):
+                llm_processor = LLMProcessor(
+                    model_path=config.llm_model_path,
+                    n_ctx=config.llm_n_ctx,
+                    n_threads=config.llm_n_threads,
+                    n_gpu_layers=config.llm_n_gpu_layers,
+                    n_batch=config.llm_n_batch,  # Pass batch size from config
+                    memory_service=memory_service,  # Pass vector memory to LLM
+                    use_mmap=config.llm_use_mmap,  # Memory-mapped loading
+                    use_mlock=config.llm_use_mlock,  # Memory locking (disabled on macOS)
+                    lorebook_token_budget=config.lorebook_token_budget,
+                    lorebook_max_chunks=config.lorebook_max_chunks,
+                    lorebook_cache_size=config.lorebook_cache_size,
+                    lorebook_semantic=config.lorebook_semantic,
+                    lorebook_semantic_weight=config.lorebook_semantic_weight,
+                    lorebook_semantic_threshold=config.lorebook_semantic_threshold
+                )
+
+                # Initialize - this is an async method that loads the model
+                await llm_processor.initialize()
             logger.info("✅ LLM Processor initialized.")
     except Exception as e:
         logger.error(f"❌ Failed to initialize LLM Processor: {str(e)}", exc_info=True)
@@ -109,27 +148,54 @@ async def lifespan(app: FastAPI):
             logger.warning("Emotion model directory not found")
             logger.warning("Will attempt to download model from HuggingFace (requires internet)")
 
-        emotion_detector = EmotionDetector(model_path=config.emotion_model_path)
-
-        # Initialize - check if it's async or sync
-        if hasattr(emotion_detector, 'initialize'):
-            # EmotionDetector.initialize might be async too
-            init_method = emotion_detector.initialize
-            if hasattr(init_method, '__call__'):
-                # Try calling it - if it's a coroutine, await it
-                result = emotion_detector.initialize()
-                if hasattr(result, '__await__'):
-                    await result
+        if config.emotion_engine == "onnx":
+            profiler.import_modules("emotion", "onnxruntime", "transformers")
+        else:
+            profiler.import_modules("emotion", "optimum.onnxruntime", "transformers")
+
+        with profiler.track("emotion"):
+            emotion_detector = EmotionDetector(
+                model_path=config.emotion_model_path,
+                cache_size=config.emotion_cache_size,
+                cache_max_mb=config.emotion_cache_max_mb,
+                engine=config.emotion_engine,
+                intra_op_threads=config.emotion_intra_op_threads,
+                inter_op_threads=config.emotion_inter_op_threads,
+                chunk_merge=config.emotion_chunk_merge,
+                max_chunks=config.emotion_max_chunks
+            )
+
+            # Initialize - check if it's async or sync
+            if hasattr(emotion_detector, 'initialize'):
+                # EmotionDetector.initialize might be async too
+                init_method = emotion_detector.initialize
+                if hasattr(init_method, '__call__'):
+                    # Try calling it - if it's a coroutine, await it
+                    result = emotion_detector.initialize()
+                    if hasattr(result, '__await__'):
+                        await result
         logger.info("✅ Emotion Detector initialized.")
+
+        # Merge concurrent emotion requests into batched runs
+        if config.emotion_batch_size > 1:
+            emotion_batcher = EmotionMicroBatcher(
+                emotion_detector,
+                max_batch_size=config.emotion_batch_size,
+                max_wait_ms=config.emotion_batch_wait_ms
+            )
+            await emotion_batcher.start()
     except Exception as e:
         logger.error(f"❌ Failed to initialize Emotion Detector: {e.__class__.__name__}: {str(e)}", exc_info=True)
         emotion_detector = None
+        emotion_batcher = None
 
     # 3. Initialize MCP Client (for web search only - memory is handled by ChromaDB above)
     if config.enable_web_search:
         try:
             logger.info("Initializing MCP Client (Brave Search)...")
-            await initialize_mcp()
+            profiler.import_modules("web_search", "mcp")
+            with profiler.track("web_search"):
+                await initialize_mcp()
             mcp_client = get_mcp_client()
             if mcp_client and mcp_client.initialized:
                 logger.info("✅ MCP Search Client initialized successfully")
@@ -140,7 +206,9 @@ async def lifespan(app: FastAPI):
             logger.info("Continuing without MCP (web search disabled, vector memory still active)")
     else:
         logger.info("⏭️  Web search disabled in config - skipping MCP Client initialization")
+        profiler.skip("web_search")
 
+    profiler.finish()
     logger.info("=" * 60)
 
     yield
@@ -156,6 +224,13 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error cleaning up LLM processor: {e}")
 
+    # Stop emotion micro-batcher before releasing the model
+    try:
+        if emotion_batcher:
+            await emotion_batcher.stop()
+    except Exception as e:
+        logger.error(f"Error stopping emotion micro-batcher: {e}")
+
     # Shutdown emotion detector
     try:
         if emotion_detector and hasattr(emotion_detector, 'cleanup'):
@@ -172,6 +247,20 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error shutting down MCP search: {e}")
 
+    # Stop a running memory audit (it resumes from its last page on the next start)
+    try:
+        if memory_audit:
+            await memory_audit.stop()
+    except Exception as e:
+        logger.error(f"Error stopping memory audit: {e}")
+
+    # Write queued conversations before the memory service closes
+    try:
+        if memory_writer:
+            await memory_writer.stop()
+    except Exception as e:
+        logger.error(f"Error flushing memory write queue: {e}")
+
     # Shutdown vector memory service
     try:
         if memory_service and hasattr(memory_service, 'cleanup'):
@@ -214,6 +303,9 @@ class LLMInferenceResponse(BaseModel):
     tokens_generated: int
     stopped_early: bool = False
     stop_reason: Optional[str] = None
+    fast_path: Optional[str] = None  # Rule that answered without the LLM (crisis, goodnight, nyan)
+    crisis_detected: bool = False
+    risk_level: Optional[str] = None
 
 
 class LLMContextInferenceRequest(BaseModel):
@@ -246,6 +338,43 @@ class EmotionInferenceResponse(BaseModel):
     category: Optional[str] = None
 
 
+class EmotionBatchInferenceRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=256)
+
+
+class EmotionBatchInferenceResponse(BaseModel):
+    results: List[EmotionInferenceResponse]
+
+
+class TurnInferenceRequest(BaseModel):
+    """Request for a full chat turn (emotion detection + context-aware generation in one call)"""
+    text: str = Field(..., min_length=1, max_length=5000)
+    conversation_history: Optional[List[Dict[str, str]]] = None
+    search_context: Optional[str] = None
+    character_profile: Optional[Dict[str, Any]] = None
+    max_tokens_override: Optional[int] = None
+    temperature_override: Optional[float] = None
+    request_id: Optional[str] = None  # For cancellation tracking
+    enable_memory: Optional[bool] = False  # User preference for memory retrieval
+    enable_web_search: Optional[bool] = False  # User preference for web search
+    web_search_api_key: Optional[str] = None  # Brave Search API key from user settings
+
+
+class TurnInferenceResponse(BaseModel):
+    text: str
+    tokens_generated: int
+    stopped_early: bool = False
+    stop_reason: Optional[str] = None
+    emotion: Optional[EmotionInferenceResponse] = None  # None if emotion detection is unavailable
+    fast_path: Optional[str] = None  # Rule that answered without the LLM (crisis, goodnight, nyan)
+    crisis_detected: bool = False
+    risk_level: Optional[str] = None
+
+
+class MemoryAuditRequest(BaseModel):
+    resume: bool = True  # Continue an interrupted audit; False starts a new report
+
+
 class HealthResponse(BaseModel):
     status: Literal["healthy", "degraded", "unavailable"]
     llm_loaded: bool
@@ -316,6 +445,9 @@ async def health_check():
             "host": config.host,
             "port": config.port,
             "gpu_layers": config.llm_n_gpu_layers,
+            "emotion_cache": emotion_detector.cache.stats() if emotion_ready else None,
+            "startup": startup_profiler.summary() if startup_profiler else None,
+            "memory_writer": memory_writer.stats() if memory_writer else None,
         }
     )
 
@@ -435,8 +567,11 @@ async def infer_llm_with_context(
         return LLMInferenceResponse(
             text=result["text"],
             tokens_generated=result.get("tokens_generated", 0),
-            stopped_early=False,
-            stop_reason=None
+            stopped_early=result.get("stopped_early", False),
+            stop_reason=result.get("stop_reason"),
+            fast_path=result.get("fast_path"),
+            crisis_detected=result.get("crisis_detected", False),
+            risk_level=result.get("risk_level")
         )
 
     except Exception as e:
@@ -448,27 +583,121 @@ async def infer_llm_with_context(
         )
 
 
+@app.post("/infer/turn", response_model=TurnInferenceResponse)
+async def infer_turn(
+    request: TurnInferenceRequest,
+    llm: LLMProcessor = Depends(get_llm_processor)
+):
+    """
+    Handle a whole chat turn in one request: emotion detection runs while the
+    rule gate (crisis, goodnight, nyan) and the memory/web lookups run, the
+    prompt is built as soon as they finish, and the detected emotion is
+    returned with the reply.
+
+    Replaces the /infer/emotion then /infer/llm/context round trips.
+    """
+    import time
+    start_time = time.time()
+    emotion_task = None
+
+    try:
+        logger.info(f"Turn inference request: {len(request.text)} chars")
+
+        if request.request_id and request.request_id in cancelled_requests:
+            logger.info(f"🚫 Request was cancelled before inference started")
+            cancelled_requests.discard(request.request_id)
+            raise HTTPException(status_code=499, detail="Request cancelled by client")
+
+        character_name = None
+        if request.character_profile and isinstance(request.character_profile, dict):
+            character_name = (
+                request.character_profile.get('character_name') or
+                request.character_profile.get('characterName')
+            )
+
+        # Start emotion detection first so it overlaps with everything else
+        emotion_task = asyncio.create_task(_detect_emotion_for_turn(request.text))
+
+        result = await llm.generate_with_context(
+            text=request.text,
+            emotion_task=emotion_task,
+            conversation_history=request.conversation_history,
+            search_context=request.search_context,
+            character_profile=request.character_profile,
+            max_tokens_override=request.max_tokens_override,
+            temperature_override=request.temperature_override,
+            character_name=character_name,
+            request_id=request.request_id,
+            enable_memory=request.enable_memory,
+            enable_web_search=request.enable_web_search,
+            web_search_api_key=request.web_search_api_key
+        )
+
+        if not result or not result.get("text"):
+            raise RuntimeError("LLM returned an empty or invalid response.")
+
+        emotion_result = await emotion_task
+
+        elapsed = time.time() - start_time
+        logger.info(f"✅ Turn inference completed in {elapsed:.2f}s ({result.get('tokens_generated', 0)} tokens)")
+
+        return TurnInferenceResponse(
+            text=result["text"],
+            tokens_generated=result.get("tokens_generated", 0),
+            stopped_early=result.get("stopped_early", False),
+            stop_reason=result.get("stop_reason"),
+            emotion=_to_emotion_response(emotion_result) if emotion_result else None,
+            fast_path=result.get("fast_path"),
+            crisis_detected=result.get("crisis_detected", False),
+            risk_level=result.get("risk_level")
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        elapsed = time.time() - start_time
+        logger.error(f"Turn inference error after {elapsed:.2f}s: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Turn inference failed: {e.__class__.__name__} - {str(e)}"
+        )
+    finally:
+        if emotion_task is not None and not emotion_task.done():
+            emotion_task.cancel()
+
+
+async def _detect_emotion_for_turn(text: str) -> Optional[Dict[str, Any]]:
+    """Emotion result for /infer/turn, or None so generation can go ahead without it"""
+    if emotion_detector is None or not emotion_detector.initialized:
+        return None
+    try:
+        if emotion_batcher:
+            return await emotion_batcher.detect(text)
+        return await run_in_threadpool(emotion_detector.detect, text)
+    except Exception as e:
+        logger.warning(f"⚠️ Emotion detection failed for turn, continuing without it: {e}")
+        return None
+
+
 @app.post("/infer/emotion", response_model=EmotionInferenceResponse)
 async def infer_emotion(
     request: EmotionInferenceRequest,
     detector: EmotionDetector = Depends(get_emotion_detector)
 ):
     """
-    Detect emotion in text. Runs synchronously in a threadpool.
+    Detect emotion in text. Concurrent requests are micro-batched into one
+    classifier run; without the batcher it runs synchronously in a threadpool.
     """
     try:
         logger.info(f"Emotion inference request: {len(request.text)} chars")
 
-        # Run the synchronous method in a threadpool
-        result = await run_in_threadpool(detector.detect, request.text)
+        if emotion_batcher:
+            result = await emotion_batcher.detect(request.text)
+        else:
+            # Run the synchronous method in a threadpool
+            result = await run_in_threadpool(detector.detect, request.text)
 
-        return EmotionInferenceResponse(
-            label=result.get("label"),
-            score=result.get("score"),
-            top_emotions=result.get("top_emotions", []),
-            intensity=result.get("intensity"),
-            category=result.get("category")
-        )
+        return _to_emotion_response(result)
 
     except HTTPException:
         raise
@@ -480,6 +709,45 @@ async def infer_emotion(
         )
 
 
+@app.post("/infer/emotion/batch", response_model=EmotionBatchInferenceResponse)
+async def infer_emotion_batch(
+    request: EmotionBatchInferenceRequest,
+    detector: EmotionDetector = Depends(get_emotion_detector)
+):
+    """
+    Detect emotions for several texts in batched classifier runs.
+    """
+    try:
+        logger.info(f"Emotion batch inference request: {len(request.texts)} texts")
+
+        if emotion_batcher:
+            results = await emotion_batcher.detect_many(request.texts)
+        else:
+            results = await run_in_threadpool(detector.detect_batch, request.texts)
+
+        return EmotionBatchInferenceResponse(results=[_to_emotion_response(r) for r in results])
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Emotion batch inference error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Emotion batch inference failed: {e.__class__.__name__} - {str(e)}"
+        )
+
+
+def _to_emotion_response(result: Dict[str, Any]) -> EmotionInferenceResponse:
+    """Convert an EmotionDetector result dict to the response model"""
+    return EmotionInferenceResponse(
+        label=result.get("label"),
+        score=result.get("score"),
+        top_emotions=result.get("top_emotions", []),
+        intensity=result.get("intensity"),
+        category=result.get("category")
+    )
+
+
 # ----------------------------------------------------------------------
 ## Request Cancellation Endpoint
 # ----------------------------------------------------------------------
@@ -570,29 +838,40 @@ async def save_conversation_to_memory(request: Dict[str, Any]):
                 "message": "Memory not available - conversation saved to session only"
             }
 
-        # Store user message (skip system messages)
+        character_name = request.get("character_name", "Unknown")
+        session_id = request.get("session_id", "unknown")
+
+        # User message (skip system messages) and character response, stored in one batch
         user_message = request.get("user_message", "")
         is_system_message = user_message.strip().startswith("[System:")
 
-        user_msg_id = None
+        messages = []
         if not is_system_message:
-            user_msg_id = memory_service.store_message(
-                message=user_message,
-                character=request.get("character_name", "Unknown"),
-                speaker="User",
-                session_id=request.get("session_id", "unknown"),
-                emotion=request.get("emotion")
-            )
+            messages.append({
+                "message": user_message,
+                "character": character_name,
+                "speaker": "User",
+                "session_id": session_id,
+                "emotion": request.get("emotion")
+            })
         else:
             logger.debug("Skipping system message from memory storage")
 
-        # Store character response
-        char_msg_id = memory_service.store_message(
-            message=request.get("character_response", ""),
-            character=request.get("character_name", "Unknown"),
-            speaker=request.get("character_name", "Unknown"),
-            session_id=request.get("session_id", "unknown")
-        )
+        messages.append({
+            "message": request.get("character_response", ""),
+            "character": character_name,
+            "speaker": character_name,
+            "session_id": session_id
+        })
+
+        # Write-behind: queue the exchange and return without waiting for the embedding/write
+        if memory_writer and memory_writer.running:
+            await memory_writer.enqueue(messages)
+            return {"status": "queued", "message": "Conversation queued for vector memory"}
+
+        message_ids = await asyncio.to_thread(memory_service.store_messages, messages)
+        user_msg_id = message_ids[0] if not is_system_message else None
+        char_msg_id = message_ids[-1]
 
         if user_msg_id and char_msg_id:
             logger.debug(f"Saved conversation to vector memory: {user_msg_id}, {char_msg_id}")
@@ -628,6 +907,12 @@ async def delete_all_conversations():
                 "deleted_count": 0
             }
 
+        # Queued saves would be written after the delete (or requeued from the spool)
+        if memory_writer:
+            dropped = await memory_writer.discard()
+            if dropped:
+                logger.info(f"Dropped {dropped} queued messages before deletion")
+
         # Get stats before deletion
         stats = memory_service.get_stats()
         total_count = stats.get("total_messages", 0)
@@ -739,6 +1024,12 @@ async def delete_character_conversations(character_name: str):
                 "character": character_name
             }
 
+        # Queued saves would be written after the delete (or requeued from the spool)
+        if memory_writer:
+            dropped = await memory_writer.discard(character_name)
+            if dropped:
+                logger.info(f"Dropped {dropped} queued messages before deletion")
+
         # Get stats before deletion
         stats = memory_service.get_stats(character=character_name)
         count = stats.get("characters", {}).get(character_name, 0)
@@ -765,6 +1056,57 @@ async def delete_character_conversations(character_name: str):
         )
 
 
+# ----------------------------------------------------------------------
+## Memory Safety Audit
+# ----------------------------------------------------------------------
+def get_memory_audit() -> MemorySafetyAudit:
+    """Get the memory audit job (created on first use; requires vector memory)"""
+    global memory_audit
+    if not memory_service or not memory_service.initialized:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Vector memory is not initialized - nothing to audit"
+        )
+    if memory_audit is None:
+        memory_audit = MemorySafetyAudit(
+            memory_service,
+            audit_dir=config.memory_audit_dir,
+            page_size=config.memory_audit_page_size,
+            batch_size=config.memory_audit_batch_size,
+            workers=config.memory_audit_workers
+        )
+    return memory_audit
+
+
+@app.post("/memory/audit")
+async def start_memory_audit(request: MemoryAuditRequest = MemoryAuditRequest()):
+    """
+    Start (or resume) a background safety audit of all stored memories.
+
+    Every collection is scanned with the crisis and age detectors; flagged
+    message IDs are written to the audit report. Poll GET /memory/audit for progress.
+    """
+    audit = get_memory_audit()
+    try:
+        return await audit.start(resume=request.resume)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@app.get("/memory/audit")
+async def get_memory_audit_status():
+    """Progress of the current or last memory audit"""
+    return get_memory_audit().status()
+
+
+@app.post("/memory/audit/cancel")
+async def cancel_memory_audit():
+    """Stop a running audit after its current page; POST /memory/audit resumes it"""
+    audit = get_memory_audit()
+    cancelled = audit.cancel()
+    return {"cancelled": cancelled, "status": audit.status()}
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -6,8 +6,6 @@ Local memory for conversation recall using ChromaDB with semantic vector search.
 
 Uses sentence-transformers for L2-normalized embeddings with cosine similarity.
 """
-import chromadb
-from chromadb.config import Settings
 from datetime import datetime
 import uuid
 from typing import List, Dict, Optional
@@ -15,6 +13,7 @@ import logging
 from pathlib import Path
 import gc  # For explicit garbage collection
 import os
+import threading
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -58,6 +57,8 @@ class MemoryService:
         # Cache for embeddings to avoid re-encoding the same text
         self.embedding_cache = {}
         self.cache_max_size = 500  # Reduced from 1000 to minimize memory usage
+        # Embeddings are computed on the event loop and in worker threads (saves, lookups)
+        self._cache_lock = threading.Lock()
 
         logger.info("MemoryService created (not yet initialized)")
 
@@ -70,6 +71,10 @@ class MemoryService:
         try:
             logger.info("Initializing Memory Service (semantic vector search)...")
 
+            # Imported here so chromadb isn't loaded when memory is disabled
+            import chromadb
+            from chromadb.config import Settings
+
             # Initialize ChromaDB with persistent storage (LOCAL ONLY - NO NETWORK EXPOSURE)
             logger.info("Initializing ChromaDB with persistent storage...")
             self.client = chromadb.PersistentClient(
@@ -113,8 +118,10 @@ class MemoryService:
         """
         # Check cache first
         cache_key = hash(text)
-        if cache_key in self.embedding_cache:
-            return self.embedding_cache[cache_key]
+        with self._cache_lock:
+            cached = self.embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
         # Generate embedding
         embedding = self.embedding_model.encode(text, convert_to_numpy=True)
@@ -127,14 +134,51 @@ class MemoryService:
         # Convert to list for ChromaDB
         embedding_list = embedding.tolist()
 
-        # Cache the result (with size limit)
-        if len(self.embedding_cache) >= self.cache_max_size:
-            # Remove oldest entry (simple FIFO)
-            self.embedding_cache.pop(next(iter(self.embedding_cache)))
-        self.embedding_cache[cache_key] = embedding_list
-
+        self._cache_embedding(cache_key, embedding_list)
         return embedding_list
 
+    def _cache_embedding(self, cache_key: int, embedding: List[float]):
+        """Cache an embedding, evicting the oldest entry at the size limit (simple FIFO)"""
+        with self._cache_lock:
+            if cache_key not in self.embedding_cache and len(self.embedding_cache) >= self.cache_max_size:
+                self.embedding_cache.pop(next(iter(self.embedding_cache)))
+            self.embedding_cache[cache_key] = embedding
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """
+        L2-normalized embedding of one text as a float32 vector.
+
+        Shares the embedding cache with semantic_search/store_message, so a
+        message embedded for the memory lookup isn't encoded again.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Unit-length vector (EMBEDDING_DIMENSION,)
+        """
+        return np.asarray(self._get_embedding(text), dtype=np.float32)
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        L2-normalized embeddings of several texts in one encode batch (not cached).
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 matrix with one unit-length row per text (len(texts), EMBEDDING_DIMENSION)
+        """
+        if not texts:
+            return np.zeros((0, self.EMBEDDING_DIMENSION), dtype=np.float32)
+
+        embeddings = np.asarray(self.embedding_model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+
+        # L2 normalize each row (zero rows are left as they are)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+
     def _get_collection_name(self, character: str) -> str:
         """
         Get ChromaDB collection name for a character.
@@ -184,6 +228,35 @@ class MemoryService:
 
         return collection_name
 
+    def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        L2-normalized embeddings for several texts; uncached texts are encoded in one batch.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding list per text (same order)
+        """
+        embeddings: Dict[int, List[float]] = {}
+        missing: List[str] = []
+        with self._cache_lock:
+            for text in texts:
+                cache_key = hash(text)
+                if cache_key in self.embedding_cache:
+                    embeddings[cache_key] = self.embedding_cache[cache_key]
+                elif cache_key not in embeddings:
+                    embeddings[cache_key] = []  # placeholder, filled from the batch below
+                    missing.append(text)
+
+        if missing:
+            for text, row in zip(missing, self.embed_texts(missing).tolist()):
+                cache_key = hash(text)
+                embeddings[cache_key] = row
+                self._cache_embedding(cache_key, row)
+
+        return [embeddings[hash(text)] for text in texts]
+
     def store_message(
         self,
         message: str,
@@ -207,60 +280,108 @@ class MemoryService:
         Returns:
             Message ID if successful, None if failed
         """
-        if not self.initialized:
-            logger.warning("MemoryService not initialized, cannot store message")
-            return None
+        return self.store_messages([{
+            "message": message,
+            "character": character,
+            "speaker": speaker,
+            "session_id": session_id,
+            "emotion": emotion,
+            "metadata": metadata,
+        }])[0]
+
+    def store_messages(self, messages: List[Dict]) -> List[Optional[str]]:
+        """
+        Store several messages with one encode batch and one write per collection.
 
-        if not message or not message.strip():
-            logger.warning("Empty message, skipping storage")
-            return None
+        A saved exchange (user message + character response) costs one embedding
+        batch and one collection.add instead of two of each.
 
-        try:
-            # Generate L2-normalized embedding for semantic search
-            embedding = self._get_embedding(message)
+        Args:
+            messages: Dicts with the store_message arguments - message, character,
+                      speaker, session_id and optional emotion / metadata
 
-            # Get or create collection for this character (with cosine distance for normalized vectors)
-            collection_name = self._get_collection_name(character)
-            collection = self.client.get_or_create_collection(
-                name=collection_name,
-                metadata={
-                    "character": character,
-                    "hnsw:space": "cosine"  # Cosine similarity for normalized vectors
-                }
-            )
+        Returns:
+            Message IDs in the order of `messages` (None for skipped or failed messages)
+        """
+        message_ids: List[Optional[str]] = [None] * len(messages)
+
+        if not self.initialized:
+            logger.warning("MemoryService not initialized, cannot store message")
+            return message_ids
 
-            # Generate unique ID
-            msg_id = f"msg_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        # Skip empty messages; group the rest by collection
+        groups: Dict[str, List[int]] = {}
+        for position, item in enumerate(messages):
+            message = item.get("message")
+            if not message or not message.strip():
+                logger.warning("Empty message, skipping storage")
+                continue
+            groups.setdefault(self._get_collection_name(item["character"]), []).append(position)
 
-            # Build metadata
-            msg_metadata = {
-                "speaker": speaker,
-                "timestamp": datetime.now().isoformat(),
-                "character": character,
-                "session_id": session_id,
-            }
+        if not groups:
+            return message_ids
 
-            if emotion:
-                msg_metadata["emotion"] = emotion
+        try:
+            # Generate L2-normalized embeddings for semantic search (one batch)
+            positions = [position for group in groups.values() for position in group]
+            embeddings = dict(zip(positions, self._get_embeddings([messages[p]["message"] for p in positions])))
+        except Exception as e:
+            logger.error(f"Failed to store message: {e}", exc_info=True)
+            return message_ids
 
-            # Add custom metadata if provided
-            if metadata:
-                msg_metadata.update(metadata)
+        for collection_name, group in groups.items():
+            try:
+                # Get or create collection for this character (with cosine distance for normalized vectors)
+                character = messages[group[0]]["character"]
+                collection = self.client.get_or_create_collection(
+                    name=collection_name,
+                    metadata={
+                        "character": character,
+                        "hnsw:space": "cosine"  # Cosine similarity for normalized vectors
+                    }
+                )
 
-            # Store in ChromaDB with normalized embedding
-            collection.add(
-                ids=[msg_id],
-                documents=[message],
-                embeddings=[embedding],
-                metadatas=[msg_metadata]
-            )
+                ids = []
+                metadatas = []
+                for position in group:
+                    item = messages[position]
+
+                    # Generate unique ID
+                    ids.append(f"msg_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}")
+
+                    # Build metadata
+                    msg_metadata = {
+                        "speaker": item["speaker"],
+                        "timestamp": datetime.now().isoformat(),
+                        "character": item["character"],
+                        "session_id": item["session_id"],
+                    }
+
+                    if item.get("emotion"):
+                        msg_metadata["emotion"] = item["emotion"]
+
+                    # Add custom metadata if provided
+                    if item.get("metadata"):
+                        msg_metadata.update(item["metadata"])
+
+                    metadatas.append(msg_metadata)
+
+                # Store in ChromaDB with normalized embeddings (one write for the group)
+                collection.add(
+                    ids=ids,
+                    documents=[messages[position]["message"] for position in group],
+                    embeddings=[embeddings[position] for position in group],
+                    metadatas=metadatas
+                )
 
-            logger.debug(f"Stored message {msg_id} with embedding")
-            return msg_id
+                for position, msg_id in zip(group, ids):
+                    message_ids[position] = msg_id
+                logger.debug(f"Stored {len(ids)} messages in {collection_name} with embeddings")
 
-        except Exception as e:
-            logger.error(f"Failed to store message: {e}", exc_info=True)
-            return None
+            except Exception as e:
+                logger.error(f"Failed to store message: {e}", exc_info=True)
+
+        return message_ids
 
     def semantic_search(
         self,
@@ -552,7 +673,8 @@ class MemoryService:
 
             # Clear embedding cache to free memory
             if hasattr(self, 'embedding_cache'):
-                self.embedding_cache.clear()
+                with self._cache_lock:
+                    self.embedding_cache.clear()
                 logger.debug("Cleared embedding cache")
 
             # Clean up sentence-transformers model
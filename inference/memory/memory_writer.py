@@ -0,0 +1,297 @@
+"""
+Memory Write-Behind Queue
+Stores saved conversations in the background so embedding and ChromaDB writes stay off the request path
+"""
+import os
+import json
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryWriteQueue:
+    """
+    Write-behind queue in front of MemoryService.store_messages.
+
+    Saves are appended to a pending list and written by a background task.
+    The first pending message opens a batch; the batch is written when
+    max_batch_size messages are pending or max_wait_ms has passed, whichever
+    comes first. store_messages embeds the batch in one encode call and writes
+    one collection.add per character collection, so a batch is grouped by
+    collection.
+
+    With a spool file every queued message is also appended to it as a JSON
+    line, and the file is rewritten with the still-pending messages after each
+    write. Messages spooled when the process died are queued again on start()
+    (at-least-once: a batch whose write finished just before a crash is stored again).
+    A message that store_messages fails to store is logged and dropped, as the
+    synchronous path did.
+
+    The spool holds raw conversation text outside ChromaDB. Deleting memories
+    must call discard() first, so queued messages are neither written after the
+    delete nor requeued from the spool on the next start.
+    """
+
+    def __init__(
+        self,
+        memory_service,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 500.0,
+        spool_path: Optional[Path] = None
+    ):
+        """
+        Args:
+            memory_service: Initialized MemoryService
+            max_batch_size: Messages written per store_messages call
+            max_wait_ms: How long the first pending message waits for company
+            spool_path: Optional JSONL file holding the pending messages (None = in memory only)
+        """
+        self.memory_service = memory_service
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.spool_path = Path(spool_path) if spool_path else None
+
+        self._pending: List[Dict[str, Any]] = []
+        self._first_pending_at = 0.0
+        self._has_pending: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Stats
+        self.batches_written = 0
+        self.messages_stored = 0
+        self.messages_failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        """Start the writer task (call from within the running event loop) and requeue spooled messages"""
+        if self.running:
+            return
+
+        self._has_pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+        recovered = self._read_spool()
+        if recovered:
+            self._add_pending(recovered)
+            logger.info(f"✅ Requeued {len(recovered)} spooled memory messages")
+
+        self._worker = asyncio.create_task(self._run())
+        logger.info(
+            f"✅ Memory write-behind queue started (batch size {self.max_batch_size}, "
+            f"wait {self.max_wait * 1000:.0f}ms, spool {self.spool_path or 'off'})"
+        )
+
+    async def stop(self):
+        """Write everything still pending, then stop the writer task"""
+        if self._worker is None:
+            return
+
+        # Holding the lock means no batch is mid-write when the worker is cancelled
+        async with self._lock:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+            await self._write_pending()
+
+        logger.info(
+            f"✅ Memory write-behind queue stopped ({self.messages_stored} stored, "
+            f"{self.messages_failed} failed in {self.batches_written} batches)"
+        )
+
+    async def enqueue(self, messages: List[Dict[str, Any]]) -> int:
+        """
+        Queue messages for storage.
+
+        Args:
+            messages: store_messages items (message, character, speaker, session_id,
+                      optional emotion / metadata)
+
+        Returns:
+            Number of messages queued (empty messages are dropped here)
+        """
+        messages = [item for item in messages if item.get("message") and item["message"].strip()]
+        if not messages:
+            return 0
+
+        if not self.running:
+            # Writer not started (or stopped) - store directly
+            await asyncio.to_thread(self.memory_service.store_messages, messages)
+            return len(messages)
+
+        self._append_spool(messages)
+        self._add_pending(messages)
+        return len(messages)
+
+    async def discard(self, character: Optional[str] = None) -> int:
+        """
+        Drop queued messages for a character (or all) from the queue and the spool.
+
+        Waits for a batch that is being written, so everything it stored is in
+        ChromaDB before the caller deletes the collection.
+
+        Args:
+            character: Character whose messages are dropped (None = all characters)
+
+        Returns:
+            Number of messages dropped
+        """
+        if self._lock is None:
+            return self._discard_pending(character)
+        async with self._lock:
+            return self._discard_pending(character)
+
+    async def flush(self):
+        """Write everything pending now"""
+        if self._lock is None:
+            return
+        async with self._lock:
+            await self._write_pending()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue counters for /health-style reporting"""
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "batches_written": self.batches_written,
+            "messages_stored": self.messages_stored,
+            "messages_failed": self.messages_failed,
+            "spool": str(self.spool_path) if self.spool_path else None
+        }
+
+    def _add_pending(self, messages: List[Dict[str, Any]]):
+        """Add messages to the pending list and wake the writer"""
+        if not self._pending:
+            self._first_pending_at = asyncio.get_running_loop().time()
+        self._pending.extend(messages)
+        self._has_pending.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._batch_full.set()
+
+    def _discard_pending(self, character: Optional[str]) -> int:
+        """Remove matching messages from the pending list and rewrite the spool (caller holds the lock)"""
+        spool_only = not self.running
+        if spool_only:
+            # Not started (or stopped): whatever is left is only in the spool
+            self._pending = self._read_spool()
+
+        if character is None:
+            kept = []
+        else:
+            collection = self.memory_service._get_collection_name(character)
+            kept = [
+                item for item in self._pending
+                if self.memory_service._get_collection_name(item.get("character", "")) != collection
+            ]
+        dropped = len(self._pending) - len(kept)
+
+        self._pending = kept
+        if dropped:
+            self._rewrite_spool()
+        if spool_only:
+            self._pending = []
+        elif not kept and self._has_pending is not None:
+            self._has_pending.clear()
+            self._batch_full.clear()
+        return dropped
+
+    async def _run(self):
+        """Writer loop: wait for the first message, hold the batch open until full or timed out, write it"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            await self._has_pending.wait()
+
+            timeout = self._first_pending_at + self.max_wait - loop.time()
+            if len(self._pending) < self.max_batch_size and timeout > 0:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            async with self._lock:
+                await self._write_pending()
+
+    async def _write_pending(self):
+        """Write all pending messages in batches (caller holds the lock)"""
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:len(batch)]
+
+            try:
+                message_ids = await asyncio.to_thread(self.memory_service.store_messages, batch)
+            except Exception as e:
+                logger.error(f"Memory write of {len(batch)} messages failed: {e}")
+                message_ids = [None] * len(batch)
+
+            stored = sum(1 for message_id in message_ids if message_id)
+            self.batches_written += 1
+            self.messages_stored += stored
+            self.messages_failed += len(batch) - stored
+            if stored < len(batch):
+                logger.warning(f"⚠️ {len(batch) - stored} of {len(batch)} queued memory messages were not stored")
+            else:
+                logger.debug(f"Memory write-behind: {stored} messages in one batch")
+
+            # The batch is stored (or given up); only what is still pending stays spooled
+            self._rewrite_spool()
+
+        self._has_pending.clear()
+        self._batch_full.clear()
+
+    def _append_spool(self, messages: List[Dict[str, Any]]):
+        """Append queued messages to the spool (one JSON line each)"""
+        if self.spool_path is None:
+            return
+        try:
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spool_path, 'a', encoding='utf-8') as f:
+                for item in messages:
+                    f.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logger.warning(f"⚠️ Could not spool memory messages: {e}")
+
+    def _rewrite_spool(self):
+        """Replace the spool with the pending messages (atomically)"""
+        if self.spool_path is None:
+            return
+        try:
+            if not self._pending:
+                self.spool_path.unlink(missing_ok=True)
+                return
+            tmp_path = self.spool_path.with_suffix(self.spool_path.suffix + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for item in self._pending:
+                    f.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+            os.replace(tmp_path, self.spool_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not rewrite memory spool: {e}")
+
+    def _read_spool(self) -> List[Dict[str, Any]]:
+        """Messages left in the spool by a previous run (a torn last line is skipped)"""
+        if self.spool_path is None or not self.spool_path.exists():
+            return []
+
+        messages = []
+        try:
+            with open(self.spool_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        messages.append(json.loads(line))
+                    except ValueError:
+                        logger.warning("⚠️ Skipping unreadable line in memory spool")
+        except OSError as e:
+            logger.warning(f"⚠️ Could not read memory spool: {e}")
+        return messages
@@ -0,0 +1,442 @@
+"""
+Memory Safety Audit
+Background job that streams every stored conversation through the safety detectors
+"""
+import os
+import json
+import uuid
+import asyncio
+import logging
+import threading
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Scanner categories copied into the report for each flagged message
+REPORT_CATEGORIES = ('crisis_high', 'crisis_medium', 'crisis_planning', 'age_keyword', 'age_pattern')
+
+# Per-worker-process detectors (built once by _init_worker)
+_worker_detectors = None
+
+
+def _init_worker():
+    """Build the detectors once per worker process and silence their per-hit warnings"""
+    global _worker_detectors
+    from processors.crisis_detector import CrisisDetector
+    from processors.age_detector import AgeDetector
+
+    logging.getLogger('processors.crisis_detector').setLevel(logging.ERROR)
+    logging.getLogger('processors.age_detector').setLevel(logging.ERROR)
+    _worker_detectors = (CrisisDetector(), AgeDetector())
+
+
+def _scan_batch(rows: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Run crisis and age detection over a batch of stored messages (in a worker process).
+
+    Args:
+        rows: (message id, document text) pairs
+
+    Returns:
+        One entry per flagged message: id, crisis, risk_level, age_violation, terms
+    """
+    if _worker_detectors is None:
+        _init_worker()
+    crisis, age = _worker_detectors
+
+    flagged = []
+    for message_id, text in rows:
+        if not text:
+            continue
+        scan = crisis.scanner.scan(text)
+        is_crisis, risk_level, _ = crisis.detect(text, scan=scan)
+        is_violation, _ = age.detect(text, scan=scan)
+        if is_crisis or is_violation:
+            flagged.append({
+                'id': message_id,
+                'crisis': is_crisis,
+                'risk_level': risk_level,
+                'age_violation': is_violation,
+                'terms': {category: scan.terms(category) for category in REPORT_CATEGORIES if scan.has(category)},
+            })
+    return flagged
+
+
+class _Page(NamedTuple):
+    """One page read from a collection"""
+    collection: str
+    ids: List[str]  # message IDs requested (deleted messages are missing from rows)
+    rows: List[Tuple[str, str, Dict[str, Any]]]  # (id, document, metadata)
+    last: bool
+
+
+class MemorySafetyAudit:
+    """
+    Streams every ChromaDB collection in pages and scans the stored messages
+    with CrisisDetector and AgeDetector on a process pool.
+
+    Flagged message IDs are appended to a JSONL report, and the IDs of every
+    scanned page to a scanned-ID log. After each page the counters and the byte
+    lengths of both files are saved to a state file. An interrupted audit
+    (cancel, shutdown, crash) truncates both files back to the checkpoint and
+    resumes with the messages whose IDs are not in the log.
+    The next page is read from ChromaDB while the workers scan the current one.
+
+    Message IDs carry a local-time second and a random suffix, so their order is
+    not their creation order - progress is the set of IDs scanned, not a
+    position. This stays correct while the app keeps adding and deleting
+    memories: deleted messages are simply not read, and a collection is only
+    done once re-reading its IDs finds none left unscanned.
+    """
+
+    STATE_FILE = "audit_state.json"
+    REPORT_FILE = "audit_report.jsonl"
+    SCANNED_FILE = "audit_scanned.tsv"
+
+    def __init__(
+        self,
+        memory_service,
+        audit_dir: str,
+        page_size: int = 1000,
+        batch_size: int = 250,
+        workers: int = 2
+    ):
+        """
+        Args:
+            memory_service: Initialized MemoryService (its ChromaDB client is read)
+            audit_dir: Directory for the report and state files
+            page_size: Messages read per collection.get() call
+            batch_size: Messages per worker task
+            workers: Worker processes running the detectors
+        """
+        self.memory_service = memory_service
+        self.audit_dir = Path(audit_dir)
+        self.state_path = self.audit_dir / self.STATE_FILE
+        self.report_path = self.audit_dir / self.REPORT_FILE
+        self.scanned_path = self.audit_dir / self.SCANNED_FILE
+        self.page_size = max(page_size, 1)
+        self.batch_size = max(batch_size, 1)
+        self.workers = max(workers, 1)
+
+        self._state: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Control
+    # ------------------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, resume: bool = True) -> Dict[str, Any]:
+        """
+        Start the audit in the background.
+
+        Args:
+            resume: Continue an unfinished audit from its state file; False starts over
+
+        Returns:
+            Progress snapshot (see status())
+
+        Raises:
+            RuntimeError: If an audit is already running
+        """
+        if self.running:
+            raise RuntimeError("Memory audit already running")
+
+        state = self._load_state() if resume else None
+        # States without a scanned-ID checkpoint predate the log and can't be resumed
+        if state is None or state['status'] == 'completed' or 'scanned_bytes' not in state:
+            state = self._new_state()
+            self._truncate_report(0, 0)
+            logger.info(f"Starting memory safety audit {state['job_id']}")
+        else:
+            self._truncate_report(state['report_bytes'], state.get('scanned_bytes', 0))
+            logger.info(f"Resuming memory safety audit {state['job_id']} "
+                        f"({state['messages_scanned']} messages already scanned)")
+
+        state['status'] = 'running'
+        state['error'] = None
+        self._set_state(state)
+        self._cancel.clear()
+        self._task = asyncio.create_task(self._run_in_thread())
+        return self.status()
+
+    def cancel(self) -> bool:
+        """
+        Ask a running audit to stop after its current page (it stays resumable).
+
+        Returns:
+            True if an audit was running
+        """
+        if not self.running:
+            return False
+        self._cancel.set()
+        return True
+
+    async def stop(self):
+        """Cancel and wait for the background job (used at shutdown)"""
+        if self.running:
+            self._cancel.set()
+            await self._task
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Progress snapshot for polling.
+
+        Falls back to the state file when no audit has run in this process, so
+        an audit interrupted by a restart reports as 'interrupted'.
+        """
+        with self._lock:
+            state = json.loads(json.dumps(self._state)) if self._state else None
+        if state is None:
+            state = self._load_state()
+        if state is None:
+            return {'status': 'idle', 'report_path': str(self.report_path)}
+
+        total = state.get('messages_total') or 0
+        collections = state.get('collections', {})
+        return {
+            'job_id': state['job_id'],
+            'status': state['status'],
+            'started_at': state['started_at'],
+            'updated_at': state['updated_at'],
+            'finished_at': state.get('finished_at'),
+            'collections_total': len(collections),
+            'collections_done': sum(1 for entry in collections.values() if entry['done']),
+            'current_collection': state.get('current_collection'),
+            'messages_total': total,
+            'messages_scanned': state['messages_scanned'],
+            'flagged': state['flagged'],
+            'percent': round(min(state['messages_scanned'] / total, 1.0) * 100, 1) if total else 0.0,
+            'report_path': str(self.report_path),
+            'error': state.get('error'),
+        }
+
+    # ------------------------------------------------------------------
+    # Background job
+    # ------------------------------------------------------------------
+    async def _run_in_thread(self):
+        """Run the blocking audit loop off the event loop"""
+        try:
+            await asyncio.to_thread(self._run)
+        except Exception as e:
+            logger.error(f"❌ Memory safety audit failed: {e}", exc_info=True)
+            self._finish('failed', error=str(e))
+
+    def _run(self):
+        """Page through all collections, scan on the worker pool, checkpoint after each page"""
+        state = self._state
+        client = self.memory_service.client
+
+        collections = sorted(client.list_collections(), key=lambda c: c.name)
+        counts = {collection.name: collection.count() for collection in collections}
+        with self._lock:
+            for collection in collections:
+                entry = state['collections'].setdefault(collection.name, {
+                    'character': (collection.metadata or {}).get('character', collection.name),
+                    'done': False,
+                })
+                entry['total'] = counts[collection.name]
+            state['messages_total'] = sum(counts.values())
+
+        scanned = self._load_scanned()
+        report = open(self.report_path, 'a', encoding='utf-8')
+        scanned_log = open(self.scanned_path, 'a', encoding='utf-8')
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            # Never fork a process that holds model and database threads
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+        try:
+            in_flight: Optional[Tuple[_Page, List[Future]]] = None
+            # The generator reads the next page while the previous page's batches are scanned
+            for page in self._pages(collections, scanned):
+                if self._cancel.is_set():
+                    break
+                rows = [(message_id, document) for message_id, document, _ in page.rows]
+                futures = [
+                    executor.submit(_scan_batch, rows[i:i + self.batch_size])
+                    for i in range(0, len(rows), self.batch_size)
+                ]
+                if in_flight:
+                    self._commit_page(report, scanned_log, *in_flight)
+                in_flight = (page, futures)
+
+            if in_flight:
+                self._commit_page(report, scanned_log, *in_flight)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            report.close()
+            scanned_log.close()
+
+        if self._cancel.is_set():
+            self._finish('cancelled')
+            logger.info(f"⏹️ Memory safety audit cancelled at {state['messages_scanned']} messages (resumable)")
+        else:
+            self._finish('completed')
+            logger.info(f"✅ Memory safety audit complete: {state['messages_scanned']} messages scanned, "
+                        f"{state['flagged']} flagged")
+
+    def _pages(self, collections, scanned: Dict[str, Set[str]]) -> Iterator[_Page]:
+        """
+        Yield pages of unscanned messages from each unfinished collection.
+
+        Args:
+            collections: ChromaDB collections, in audit order
+            scanned: Collection name -> IDs scanned before this run
+        """
+        for collection in collections:
+            entry = self._state['collections'][collection.name]
+            if entry['done']:
+                continue
+
+            # IDs handed out this run - their pages may not be committed yet
+            queued = set(scanned.get(collection.name, ()))
+            while True:
+                # IDs only (no documents); re-read after each pass to pick up new messages
+                ids = collection.get(include=[]).get('ids') or []
+                pending = sorted(message_id for message_id in ids if message_id not in queued)
+                if not pending:
+                    yield _Page(collection.name, [], [], True)
+                    break
+
+                for i in range(0, len(pending), self.page_size):
+                    if self._cancel.is_set():
+                        return
+                    page_ids = pending[i:i + self.page_size]
+                    result = collection.get(ids=page_ids, include=["documents", "metadatas"])
+                    found = result.get('ids') or []
+                    documents = result.get('documents') or [None] * len(found)
+                    metadatas = result.get('metadatas') or [None] * len(found)
+                    # Messages deleted since the ID list was read are just missing here
+                    rows = list(zip(found, documents, [m or {} for m in metadatas]))
+                    queued.update(page_ids)
+                    yield _Page(collection.name, page_ids, rows, False)
+
+    def _commit_page(self, report, scanned_log, page: _Page, futures: List[Future]):
+        """Write a page's flagged messages to the report and its IDs to the log, then checkpoint"""
+        metadata_by_id = {message_id: metadata for message_id, _, metadata in page.rows}
+        entry = self._state['collections'][page.collection]
+
+        flagged = 0
+        for future in futures:
+            for hit in future.result():
+                metadata = metadata_by_id.get(hit['id'], {})
+                record = {
+                    'collection': page.collection,
+                    'character': entry['character'],
+                    'id': hit['id'],
+                    'speaker': metadata.get('speaker'),
+                    'session_id': metadata.get('session_id'),
+                    'timestamp': metadata.get('timestamp'),
+                    'crisis': hit['crisis'],
+                    'risk_level': hit['risk_level'],
+                    'age_violation': hit['age_violation'],
+                    'terms': hit['terms'],
+                }
+                report.write(json.dumps(record, ensure_ascii=False) + "\n")
+                flagged += 1
+        report.flush()
+        os.fsync(report.fileno())
+
+        for message_id in page.ids:
+            scanned_log.write(f"{page.collection}\t{message_id}\n")
+        scanned_log.flush()
+        os.fsync(scanned_log.fileno())
+
+        with self._lock:
+            entry['done'] = page.last
+            self._state['current_collection'] = None if page.last else page.collection
+            self._state['messages_scanned'] += len(page.rows)
+            self._state['flagged'] += flagged
+            self._state['report_bytes'] = report.tell()
+            self._state['scanned_bytes'] = scanned_log.tell()
+            self._state['updated_at'] = datetime.now().isoformat()
+        self._save_state()
+
+    def _finish(self, status: str, error: Optional[str] = None):
+        with self._lock:
+            self._state['status'] = status
+            self._state['error'] = error
+            self._state['current_collection'] = None
+            self._state['updated_at'] = datetime.now().isoformat()
+            if status == 'completed':
+                self._state['finished_at'] = self._state['updated_at']
+        self._save_state()
+
+    # ------------------------------------------------------------------
+    # State file
+    # ------------------------------------------------------------------
+    def _new_state(self) -> Dict[str, Any]:
+        now = datetime.now().isoformat()
+        return {
+            'job_id': uuid.uuid4().hex[:12],
+            'status': 'running',
+            'started_at': now,
+            'updated_at': now,
+            'finished_at': None,
+            'collections': {},  # name -> {character, total, done}
+            'current_collection': None,
+            'messages_total': 0,
+            'messages_scanned': 0,
+            'flagged': 0,
+            'report_bytes': 0,
+            'scanned_bytes': 0,
+            'error': None,
+        }
+
+    def _set_state(self, state: Dict[str, Any]):
+        with self._lock:
+            self._state = state
+        self._save_state()
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        """Read the saved state; a 'running' state with no live job was interrupted"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Unreadable audit state file, starting a new audit: {e}")
+            return None
+        if state.get('status') == 'running' and not self.running:
+            state['status'] = 'interrupted'
+        return state
+
+    def _save_state(self):
+        """Write the state file atomically (a crash leaves the previous checkpoint)"""
+        self.audit_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = json.dumps(self._state, indent=2)
+        tmp_path = self.state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def _truncate_report(self, report_size: int, scanned_size: int):
+        """Drop report and scanned-ID lines written after the last checkpoint"""
+        self.audit_dir.mkdir(parents=True, exist_ok=True)
+        for path, size in ((self.report_path, report_size), (self.scanned_path, scanned_size)):
+            with open(path, 'a+b') as f:
+                f.truncate(size)
+
+    def _load_scanned(self) -> Dict[str, Set[str]]:
+        """Read the scanned-ID log into collection name -> set of IDs"""
+        scanned: Dict[str, Set[str]] = {}
+        with open(self.scanned_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                collection, _, message_id = line.rstrip("\n").partition("\t")
+                if message_id:
+                    scanned.setdefault(collection, set()).add(message_id)
+        return scanned
@@ -8,6 +8,8 @@ import re
 import logging
 from typing import Tuple, Optional
 
+from .safety_scanner import SafetyScan, get_safety_scanner
+
 logger = logging.getLogger(__name__)
 
 
@@ -67,16 +69,17 @@ class AgeDetector:
     ]
 
     def __init__(self):
-        """Initialize age detector with compiled patterns."""
-        self.age_patterns = [re.compile(p, re.IGNORECASE) for p in self.AGE_PATTERNS]
+        """Initialize age detector with the shared compiled scanner."""
+        self.scanner = get_safety_scanner()
         logger.info("✅ Age Detector initialized (25+ enforcement)")
 
-    def detect(self, message: str) -> Tuple[bool, Optional[str]]:
+    def detect(self, message: str, scan: Optional[SafetyScan] = None) -> Tuple[bool, Optional[str]]:
         """
         Detect age restriction violations in a message.
 
         Args:
             message: User's message text
+            scan: Precomputed SafetyScanner result for this message (avoids a second pass)
 
         Returns:
             Tuple of (is_violation, refusal_message)
@@ -86,20 +89,14 @@ class AgeDetector:
         if not message or not message.strip():
             return False, None
 
-        message_lower = message.lower()
+        if scan is None:
+            scan = self.scanner.scan(message)
 
         # Check for underage keywords
-        violations = []
-        for keyword in self.UNDERAGE_KEYWORDS:
-            if keyword in message_lower:
-                violations.append(keyword)
+        violations = scan.terms('age_keyword')
 
         # Check for age patterns
-        pattern_matches = []
-        for pattern in self.age_patterns:
-            matches = pattern.findall(message)
-            if matches:
-                pattern_matches.extend(matches)
+        pattern_matches = scan.terms('age_pattern')
 
         # If violations detected
         if violations or pattern_matches:
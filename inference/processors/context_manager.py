@@ -2,6 +2,7 @@
 Context Manager
 Handles memory retrieval and web search context fetching
 """
+import asyncio
 import logging
 from typing import Optional
 
@@ -20,6 +21,17 @@ class ContextManager:
         self.memory_service = memory_service
         self.enable_memory = enable_memory  # Disabled by default for faster inference
 
+    def memory_enabled(self, enable_memory_override: Optional[bool] = None) -> bool:
+        """
+        Whether fetch_memory_context will search memory.
+
+        Args:
+            enable_memory_override: Per-request setting (None = instance setting)
+        """
+        # Use override if provided, otherwise use instance setting
+        should_enable_memory = enable_memory_override if enable_memory_override is not None else self.enable_memory
+        return bool(should_enable_memory and self.memory_service and self.memory_service.initialized)
+
     async def fetch_memory_context(
         self,
         query: str,
@@ -39,15 +51,15 @@ class ContextManager:
         Returns:
             Formatted memory context string
         """
-        # Use override if provided, otherwise use instance setting
-        should_enable_memory = enable_memory_override if enable_memory_override is not None else self.enable_memory
-
         # Memory retrieval disabled by default for speed
-        if not should_enable_memory or not self.memory_service or not self.memory_service.initialized:
+        if not self.memory_enabled(enable_memory_override):
             return ""
 
         try:
-            relevant_memories = self.memory_service.semantic_search(
+            # Embedding + ChromaDB query are blocking; run them off the event loop
+            # so they overlap with emotion detection and web search
+            relevant_memories = await asyncio.to_thread(
+                self.memory_service.semantic_search,
                 query=query,
                 character=character,
                 n_results=5
@@ -4,10 +4,11 @@ Detects suicidal ideation, self-harm intent, and severe distress in user message
 Provides immediate intervention with crisis resources.
 """
 
-import re
 import logging
 from typing import Dict, Optional, Tuple
 
+from .safety_scanner import SafetyScan, get_safety_scanner
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,6 +16,7 @@ class CrisisDetector:
     """
     Rule-based crisis detection system.
     Uses keyword matching and pattern detection to identify crisis situations.
+    Matching runs on the shared SafetyScanner (one pass for all keywords and patterns).
     """
 
     # High-risk keywords that indicate immediate danger
@@ -63,16 +65,17 @@ class CrisisDetector:
     ]
 
     def __init__(self):
-        """Initialize crisis detector with compiled patterns."""
-        self.planning_patterns = [re.compile(p, re.IGNORECASE) for p in self.PLANNING_PATTERNS]
+        """Initialize crisis detector with the shared compiled scanner."""
+        self.scanner = get_safety_scanner()
         logger.info("✅ Crisis Detector initialized")
 
-    def detect(self, message: str) -> Tuple[bool, Optional[str], str]:
+    def detect(self, message: str, scan: Optional[SafetyScan] = None) -> Tuple[bool, Optional[str], str]:
         """
         Detect crisis indicators in a message.
 
         Args:
             message: User's message text
+            scan: Precomputed SafetyScanner result for this message (avoids a second pass)
 
         Returns:
             Tuple of (is_crisis, risk_level, intervention_message)
@@ -83,16 +86,14 @@ class CrisisDetector:
         if not message or not message.strip():
             return False, None, ""
 
-        message_lower = message.lower()
+        if scan is None:
+            scan = self.scanner.scan(message)
 
         # Check for high-risk keywords
-        high_risk_matches = []
-        for keyword in self.HIGH_RISK_KEYWORDS:
-            if keyword in message_lower:
-                high_risk_matches.append(keyword)
+        high_risk_matches = scan.terms('crisis_high')
 
         # Check for planning patterns
-        planning_detected = any(pattern.search(message) for pattern in self.planning_patterns)
+        planning_detected = scan.has('crisis_planning')
 
         # High-risk detection
         if high_risk_matches or planning_detected:
@@ -105,7 +106,7 @@ class CrisisDetector:
             return True, "high", self._get_crisis_intervention_message()
 
         # Medium-risk detection (requires multiple keywords or specific context)
-        medium_risk_count = sum(1 for keyword in self.MEDIUM_RISK_KEYWORDS if keyword in message_lower)
+        medium_risk_count = len(scan.terms('crisis_medium'))
 
         if medium_risk_count >= 3:
             logger.warning(f"⚠️  CRISIS DETECTED - Medium risk indicators ({medium_risk_count} keywords)")
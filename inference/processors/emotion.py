@@ -1,11 +1,11 @@
 """Emotion detection processor."""
-from transformers import pipeline
-from optimum.onnxruntime import ORTModelForSequenceClassification
-from transformers import AutoTokenizer, pipeline
 import logging
 from typing import Dict, Any, Optional, List
 from pathlib import Path
 import os
+import re
+
+from .emotion_cache import EmotionResultCache
 
 logger = logging.getLogger(__name__)
 
@@ -18,14 +18,49 @@ os.environ['TRANSFORMERS_CACHE'] = str(_models_dir)
 class EmotionDetector:
     """Handles emotion detection from text."""
 
-    # Maximum characters for emotion detection (emotion is evident in first few sentences)
+    # Maximum characters per classifier input; longer messages are scored as sentence chunks
     MAX_EMOTION_TEXT_LENGTH = 240
 
-    def __init__(self, model_path: Optional[str] = None):
-        """Initialize emotion classifier."""
+    # Sentence boundaries used to chunk long messages
+    SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?…])\s+|\n+')
+
+    # How chunk scores are combined into one result
+    CHUNK_MERGE_RULES = ("max", "mean", "last_weighted")
+
+    def __init__(self, model_path: Optional[str] = None, cache_size: int = 2048, cache_max_mb: float = 8.0,
+                 engine: str = "pipeline", intra_op_threads: int = 4, inter_op_threads: int = 1,
+                 chunk_merge: str = "max", max_chunks: int = 8):
+        """
+        Initialize emotion classifier.
+
+        Args:
+            model_path: Path to the ONNX emotion model directory
+            cache_size: Maximum cached results (0 disables the result cache)
+            cache_max_mb: Approximate memory limit for the result cache
+            engine: "pipeline" (transformers pipeline) or "onnx" (direct ONNX Runtime session)
+            intra_op_threads: ONNX Runtime intra-op threads ("onnx" engine only)
+            inter_op_threads: ONNX Runtime inter-op threads ("onnx" engine only)
+            chunk_merge: How sentence-chunk scores of long messages are merged
+                         ("max", "mean" or "last_weighted")
+            max_chunks: Maximum chunks scored per message (1 = truncate to MAX_EMOTION_TEXT_LENGTH)
+        """
         self.classifier = None
+        self.engine = None
         self.initialized = False
 
+        if chunk_merge not in self.CHUNK_MERGE_RULES:
+            logger.warning(f"⚠️ Unknown emotion chunk merge rule '{chunk_merge}', using 'max'")
+            chunk_merge = "max"
+        self.chunk_merge = chunk_merge
+        self.max_chunks = max(1, max_chunks)
+
+        self.cache = EmotionResultCache(
+            max_entries=cache_size,
+            max_bytes=int(cache_max_mb * 1024 * 1024),
+            # Chunked scoring depends on the whole message, so key on all of it
+            max_text_length=self.MAX_EMOTION_TEXT_LENGTH if self.max_chunks == 1 else None
+        )
+
         try:
             # 1. Determine the model path using the argument passed by FastAPI,
             #    falling back to the hardcoded relative path if not provided.
@@ -36,8 +71,26 @@ class EmotionDetector:
                 quantized_path = Path(__file__).parent.parent.parent / "models" / "roberta_emotions_onnx"
 
             # 2. Check if quantized model exists
-            if quantized_path.exists() and (quantized_path / "model.onnx").exists():
+            if engine == "onnx" and (quantized_path / "model.onnx").exists():
+                logger.info("Loading quantized emotion classifier (direct ONNX Runtime)...")
+                try:
+                    from .emotion_ort import OnnxEmotionEngine
+                    self.engine = OnnxEmotionEngine(
+                        str(quantized_path),
+                        intra_op_threads=intra_op_threads,
+                        inter_op_threads=inter_op_threads
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ ONNX Runtime engine unavailable ({e}), using transformers pipeline")
+                    self.engine = None
+
+            if self.engine is not None:
+                logger.info("✅ Quantized emotion classifier loaded successfully (ONNX Runtime)")
+            elif quantized_path.exists() and (quantized_path / "model.onnx").exists():
                 logger.info("Loading quantized emotion classifier...")
+                from optimum.onnxruntime import ORTModelForSequenceClassification
+                from transformers import AutoTokenizer, pipeline
+
                 model = ORTModelForSequenceClassification.from_pretrained(
                     str(quantized_path),
                     local_files_only=True
@@ -56,7 +109,10 @@ class EmotionDetector:
                 logger.info("✅ Quantized emotion classifier loaded successfully")
             else:
                 logger.warning("Quantized model not found, falling back to online model")
+                logger.warning("   Build it with: python inference/processors/export_emotion_model.py --checkpoint <path>")
                 logger.info(f"   Downloading to: {_models_dir}")
+                from transformers import pipeline
+
                 self.classifier = pipeline(
                     "text-classification",
                     model="SamLowe/roberta-base-go_emotions",
@@ -65,12 +121,13 @@ class EmotionDetector:
                 logger.info("✅ Emotion classifier loaded successfully (online)")
 
             # --- ADDED: Set initialized flag on successful load ---
-            if self.classifier:
+            if self.classifier or self.engine:
                 self.initialized = True
 
         except Exception as e:
             logger.error(f"❌ Failed to load emotion classifier: {e}")
             self.classifier = None
+            self.engine = None
 
     # --- ADDED: Async initialize method to align with FastAPI's async setup ---
     # Since the model loading is done in __init__, this method just confirms the status.
@@ -92,54 +149,167 @@ class EmotionDetector:
         Returns:
             Dictionary with emotion label, confidence score, and additional emotions
         """
+        return self.detect_batch([text])[0]
+
+    def detect_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Detect emotions for several texts in one padded classifier run.
+
+        Texts longer than MAX_EMOTION_TEXT_LENGTH are split into sentence chunks;
+        all chunks of all texts go through the same run and each text's chunk
+        scores are merged by the chunk_merge rule.
+
+        Args:
+            texts: Input texts to analyze
+
+        Returns:
+            List of emotion result dicts (same shape as detect) in input order
+        """
         try:
             # Replaced self.classifier check with self.initialized check for consistency
             if not self.initialized:
                 # Raise an error if detector isn't ready instead of returning a misleading neutral result
                 raise RuntimeError("Emotion detector is not ready. Initialization failed.")
 
-            # Truncate text if too long for emotion detection
-            # Emotion is typically evident in the first few sentences
-            if len(text) > self.MAX_EMOTION_TEXT_LENGTH:
-                logger.warning(f"Text too long ({len(text)} chars), truncating to {self.MAX_EMOTION_TEXT_LENGTH} chars for emotion detection")
-                text = text[:self.MAX_EMOTION_TEXT_LENGTH]
+            if not texts:
+                return []
 
-            # Get emotion predictions
-            # The classifier call must handle the input/output of the pipeline
-            emotion_result = self.classifier(text)
+            # Serve repeated messages from the cache, classify only the misses
+            results: List[Optional[Dict[str, Any]]] = [self.cache.get(text) for text in texts]
+            misses = [i for i, result in enumerate(results) if result is None]
+            if not misses:
+                return results
 
-            # Ensure the result is a list (pipelines usually return [list])
-            if not emotion_result or not isinstance(emotion_result[0], list):
-                raise ValueError("Classifier returned an unexpected format.")
-
-            # Sort by score descending
-            sorted_emotions = sorted(emotion_result[0], key=lambda x: x['score'], reverse=True)
-
-            # Get top emotion
-            top_emotion = sorted_emotions[0]
+            # Long messages become several classifier inputs
+            chunked = [self._split_chunks(texts[i]) for i in misses]
+            miss_texts = [chunk for chunks in chunked for chunk in chunks]
+            any_chunked = len(miss_texts) > len(misses)
 
-            # Get top 3 emotions (for context)
-            top_3_emotions = sorted_emotions[:3]
+            # Get emotion predictions (list input -> one list of label scores per text)
+            if self.engine is not None:
+                # Merging needs every label's score, not just the top few
+                emotion_results = self.engine.classify(
+                    miss_texts,
+                    top_k=len(self.engine.labels) if any_chunked else None
+                )
+            else:
+                emotion_results = self.classifier(miss_texts, batch_size=len(miss_texts))
 
-            # Calculate intensity based on top score
-            intensity = self._calculate_intensity(top_emotion['score'])
+            # Ensure each result is a list of label scores
+            if len(emotion_results) != len(miss_texts) or not all(isinstance(r, list) and r for r in emotion_results):
+                raise ValueError("Classifier returned an unexpected format.")
 
-            # Categorize emotion
-            category = self._categorize_emotion(top_emotion['label'])
+            offset = 0
+            for i, chunks in zip(misses, chunked):
+                chunk_scores = emotion_results[offset:offset + len(chunks)]
+                offset += len(chunks)
+                results[i] = self._build_result(self._merge_chunk_scores(chunk_scores))
+                self.cache.put(texts[i], results[i])
 
-            return {
-                'label': top_emotion['label'],
-                'score': top_emotion['score'],
-                'top_emotions': top_3_emotions,
-                'intensity': intensity,
-                'category': category
-            }
+            return results
 
         except Exception as e:
             logger.error(f"Emotion detection failed: {e}")
             # Reraise the exception for the FastAPI wrapper to handle and return 500
             raise e
 
+    def _split_chunks(self, text: str) -> List[str]:
+        """
+        Split a message into classifier inputs of at most MAX_EMOTION_TEXT_LENGTH chars.
+
+        Sentences are packed greedily into chunks; a sentence longer than the
+        limit is cut at the last space before it. If there are more chunks than
+        max_chunks, the first chunk and the last (max_chunks - 1) are kept so
+        both the opening and the end of the message are scored.
+        """
+        limit = self.MAX_EMOTION_TEXT_LENGTH
+        if len(text) <= limit:
+            return [text]
+        if self.max_chunks == 1:
+            logger.warning(f"Text too long ({len(text)} chars), truncating to {limit} chars for emotion detection")
+            return [text[:limit]]
+
+        pieces = []
+        for sentence in self.SENTENCE_SPLIT_PATTERN.split(text):
+            sentence = sentence.strip()
+            while len(sentence) > limit:
+                cut = sentence.rfind(' ', 0, limit + 1)
+                if cut <= 0:
+                    cut = limit
+                pieces.append(sentence[:cut].rstrip())
+                sentence = sentence[cut:].lstrip()
+            if sentence:
+                pieces.append(sentence)
+
+        chunks = []
+        for piece in pieces:
+            if chunks and len(chunks[-1]) + 1 + len(piece) <= limit:
+                chunks[-1] += " " + piece
+            else:
+                chunks.append(piece)
+
+        if not chunks:
+            return [text[:limit]]
+        if len(chunks) > self.max_chunks:
+            chunks = chunks[:1] + chunks[-(self.max_chunks - 1):]
+
+        logger.debug(f"Scoring {len(text)} chars as {len(chunks)} sentence chunks ({self.chunk_merge})")
+        return chunks
+
+    def _merge_chunk_scores(self, chunk_scores: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Merge per-chunk label scores into one list of label scores.
+
+        - max: strongest score each label reached in any chunk
+        - mean: average over chunks
+        - last_weighted: weighted average with weights 1..n, so later chunks
+          (how the message ends) count more
+        """
+        if len(chunk_scores) == 1:
+            return chunk_scores[0]
+
+        merged: Dict[str, float] = {}
+        if self.chunk_merge == "max":
+            for scores in chunk_scores:
+                for item in scores:
+                    merged[item['label']] = max(merged.get(item['label'], 0.0), item['score'])
+        else:
+            if self.chunk_merge == "last_weighted":
+                weights = [float(n) for n in range(1, len(chunk_scores) + 1)]
+            else:
+                weights = [1.0] * len(chunk_scores)
+            total = sum(weights)
+            for weight, scores in zip(weights, chunk_scores):
+                for item in scores:
+                    merged[item['label']] = merged.get(item['label'], 0.0) + item['score'] * weight / total
+
+        return [{'label': label, 'score': score} for label, score in merged.items()]
+
+    def _build_result(self, label_scores: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the detect() result from the classifier's per-label scores."""
+        # Sort by score descending
+        sorted_emotions = sorted(label_scores, key=lambda x: x['score'], reverse=True)
+
+        # Get top emotion
+        top_emotion = sorted_emotions[0]
+
+        # Get top 3 emotions (for context)
+        top_3_emotions = sorted_emotions[:3]
+
+        # Calculate intensity based on top score
+        intensity = self._calculate_intensity(top_emotion['score'])
+
+        # Categorize emotion
+        category = self._categorize_emotion(top_emotion['label'])
+
+        return {
+            'label': top_emotion['label'],
+            'score': top_emotion['score'],
+            'top_emotions': top_3_emotions,
+            'intensity': intensity,
+            'category': category
+        }
+
     def _calculate_intensity(self, score: float) -> str:
         """Calculate emotional intensity from confidence score."""
         if score >= 0.8:
@@ -173,6 +343,15 @@ class EmotionDetector:
     def cleanup(self):
         """Clean up resources and close any open handles."""
         try:
+            stats = self.cache.stats()
+            logger.info(f"Emotion cache: {stats['hits']} hits / {stats['misses']} misses (hit rate {stats['hit_rate']:.1%})")
+            self.cache.clear()
+
+            if self.engine is not None:
+                self.engine.cleanup()
+                self.engine = None
+                logger.info("✅ Emotion engine resources cleaned up")
+
             if self.classifier is not None:
                 # Clean up the pipeline and model resources
                 if hasattr(self.classifier, 'model'):
@@ -0,0 +1,169 @@
+"""
+Emotion Micro-Batcher
+Merges concurrent emotion requests into one batched classifier run
+"""
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from .emotion import EmotionDetector
+
+logger = logging.getLogger(__name__)
+
+
+class EmotionMicroBatcher:
+    """
+    Collects single emotion requests that arrive within a short wait window and
+    runs them through EmotionDetector.detect_batch as one padded ONNX Runtime call.
+
+    The first queued request opens a batch; the batch is dispatched when it reaches
+    max_batch_size or max_wait_ms has passed, whichever comes first.
+    """
+
+    def __init__(self, detector: EmotionDetector, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        """
+        Initialize micro-batcher
+
+        Args:
+            detector: Initialized EmotionDetector
+            max_batch_size: Maximum texts per classifier run
+            max_wait_ms: How long the first request in a batch waits for company
+        """
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Stats
+        self.batches_run = 0
+        self.texts_processed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        """Start the batching worker (call from within the running event loop)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+        logger.info(f"✅ Emotion micro-batcher started (batch size {self.max_batch_size}, wait {self.max_wait * 1000:.1f}ms)")
+
+    async def stop(self):
+        """Stop the worker and fail any requests still queued or in the current batch"""
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        queued = []
+        while self._queue is not None and not self._queue.empty():
+            queued.append(self._queue.get_nowait())
+        self._fail(queued, RuntimeError("Emotion micro-batcher stopped"))
+
+        logger.info(f"✅ Emotion micro-batcher stopped ({self.texts_processed} texts in {self.batches_run} batches)")
+
+    async def detect(self, text: str) -> Dict[str, Any]:
+        """
+        Detect emotion for one text, batched with concurrent requests.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Emotion result dict (same shape as EmotionDetector.detect)
+        """
+        if not self.running:
+            # Worker not started (or stopped) - run directly
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.detector.detect, text)
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def detect_many(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Detect emotions for several texts (merged with any concurrent requests).
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            List of emotion result dicts in input order
+        """
+        return list(await asyncio.gather(*(self.detect(text) for text in texts)))
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, asyncio.Future]], error: Exception):
+        """Resolve the batch's pending futures with an error"""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _collect_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """
+        Wait for the first request, then gather more until full or the window closes.
+
+        Requests are added to the caller's list as they are taken off the queue, so
+        the caller still holds them if this is cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        """Worker loop: collect a batch, classify it in the threadpool, resolve futures"""
+        loop = asyncio.get_running_loop()
+        batch: List[Tuple[str, asyncio.Future]] = []
+
+        try:
+            while True:
+                batch = []
+                await self._collect_batch(batch)
+
+                # Skip requests whose callers have gone away
+                batch = [(text, future) for text, future in batch if not future.done()]
+                if not batch:
+                    continue
+
+                texts = [text for text, _ in batch]
+                try:
+                    results = await loop.run_in_executor(None, self.detector.detect_batch, texts)
+                except Exception as e:
+                    logger.error(f"Emotion batch of {len(texts)} failed: {e}")
+                    self._fail(batch, e)
+                    continue
+
+                self.batches_run += 1
+                self.texts_processed += len(texts)
+                if len(texts) > 1:
+                    logger.debug(f"Emotion micro-batch: {len(texts)} texts in one run")
+
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+        except asyncio.CancelledError:
+            # Stopped while collecting or classifying - the batch's callers would wait forever
+            self._fail(batch, RuntimeError("Emotion micro-batcher stopped"))
+            raise
@@ -0,0 +1,130 @@
+"""
+Emotion Result Cache
+Bounded LRU cache of emotion detection results keyed by normalised text
+"""
+import sys
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EmotionResultCache:
+    """
+    LRU cache for EmotionDetector results.
+
+    Short chat messages repeat a lot ("lol", "ok", "goodnight"), so results are
+    cached by the text the model would see: truncated to the detector's length
+    limit, then Unicode-normalised, case-folded and whitespace-collapsed.
+    Entries are evicted least-recently-used first once either the entry limit
+    or the approximate memory limit is exceeded.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 8 * 1024 * 1024, max_text_length: Optional[int] = 240):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum cached results (0 disables caching)
+            max_bytes: Approximate memory limit for keys + results
+            max_text_length: Truncation applied before keying (matches EmotionDetector;
+                             None keys on the whole text)
+        """
+        self.max_entries = max(0, max_entries)
+        self.max_bytes = max(0, max_bytes)
+        self.max_text_length = max_text_length
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()  # detect() may run on several threadpool workers
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def make_key(self, text: str) -> str:
+        """Normalised cache key for a message"""
+        text = unicodedata.normalize("NFC", text[:self.max_text_length])
+        return " ".join(text.casefold().split())
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Returns:
+            Copy of the cached result dict, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        key = self.make_key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[0])
+
+    def put(self, text: str, result: Dict[str, Any]):
+        """Store a result, evicting least recently used entries over the limits"""
+        if not self.enabled:
+            return
+
+        key = self.make_key(text)
+        size = self._estimate_size(key, result)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            self._entries[key] = (dict(result), size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (stats are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics including hit rate"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    @staticmethod
+    def _estimate_size(key: str, result: Dict[str, Any]) -> int:
+        """Approximate memory held by one entry"""
+        size = sys.getsizeof(key) + sys.getsizeof(result)
+        for value in result.values():
+            size += sys.getsizeof(value)
+            if isinstance(value, list):
+                for item in value:
+                    size += sys.getsizeof(item)
+                    if isinstance(item, dict):
+                        size += sum(sys.getsizeof(v) for v in item.values())
+        return size
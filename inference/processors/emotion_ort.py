@@ -0,0 +1,174 @@
+"""
+ONNX Runtime Emotion Engine
+Runs the go_emotions classifier directly on an onnxruntime InferenceSession
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxEmotionEngine:
+    """
+    Lean emotion classifier without the transformers pipeline.
+
+    Tokenises with the fast (Rust) tokenizer, runs the exported model through a
+    single InferenceSession with explicit thread settings, and scores with NumPy.
+    Input/output buffers are allocated once per (batch, padded length) shape and
+    bound through IOBinding, so repeated calls reuse the same memory. Batches are
+    padded up to a power of two and lengths to a multiple of LENGTH_BUCKET, and
+    only the BUFFER_CACHE_SIZE most recently used shapes are kept.
+    """
+
+    # Sequence lengths are padded up to a multiple of this, so buffer shapes repeat
+    LENGTH_BUCKET = 16
+
+    # Bound buffer shapes kept (least recently used are released)
+    BUFFER_CACHE_SIZE = 16
+
+    def __init__(self, model_dir: str, intra_op_threads: int = 4, inter_op_threads: int = 1,
+                 max_length: int = 128, top_k: int = 3):
+        """
+        Load the ONNX model, tokenizer and label map
+
+        Args:
+            model_dir: Directory with model.onnx, config.json and tokenizer files
+            intra_op_threads: Threads used inside one operator (0 = ORT default)
+            inter_op_threads: Threads used across independent operators (0 = ORT default)
+            max_length: Maximum tokens per text
+            top_k: Number of top labels returned per text
+        """
+        model_dir = Path(model_dir)
+        self.max_length = max_length
+        self.top_k = top_k
+
+        with open(model_dir / "config.json", 'r', encoding='utf-8') as f:
+            model_config = json.load(f)
+        id2label = model_config["id2label"]
+        self.labels = [id2label[str(i)] if str(i) in id2label else id2label[i] for i in range(len(id2label))]
+
+        # Same score function the transformers pipeline picks for this config
+        self.multi_label = model_config.get("problem_type") == "multi_label_classification" or len(self.labels) == 1
+
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir), use_fast=True, local_files_only=True)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(
+            str(model_dir / "model.onnx"),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_name = self.session.get_outputs()[0].name
+
+        # (batch, length) -> (IOBinding, {input name: array}, logits array)
+        self._buffers: "OrderedDict[Tuple[int, int], tuple]" = OrderedDict()
+        self._lock = threading.Lock()  # buffers are shared between threadpool workers
+
+        logger.info(f"✅ ONNX Runtime emotion engine loaded ({len(self.labels)} labels, "
+                    f"intra-op {intra_op_threads}, inter-op {inter_op_threads} threads)")
+
+    def _get_buffers(self, batch: int, length: int) -> tuple:
+        """Preallocated, bound input/output arrays for a shape (LRU-cached)"""
+        key = (batch, length)
+        buffers = self._buffers.get(key)
+        if buffers is not None:
+            self._buffers.move_to_end(key)
+            return buffers
+
+        inputs = {name: np.zeros((batch, length), dtype=np.int64) for name in self.input_names}
+        logits = np.empty((batch, len(self.labels)), dtype=np.float32)
+
+        binding = self.session.io_binding()
+        for name, array in inputs.items():
+            binding.bind_ortvalue_input(name, ort.OrtValue.ortvalue_from_numpy(array))
+        binding.bind_ortvalue_output(self.output_name, ort.OrtValue.ortvalue_from_numpy(logits))
+
+        buffers = (binding, inputs, logits)
+        self._buffers[key] = buffers
+        if len(self._buffers) > self.BUFFER_CACHE_SIZE:
+            self._buffers.popitem(last=False)
+        return buffers
+
+    def _scores(self, logits: np.ndarray) -> np.ndarray:
+        """Sigmoid for multi-label models, softmax otherwise"""
+        if self.multi_label:
+            return 1.0 / (1.0 + np.exp(-logits))
+        shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return shifted / shifted.sum(axis=1, keepdims=True)
+
+    def classify(self, texts: List[str], top_k: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Score texts in one padded run.
+
+        Args:
+            texts: Input texts
+            top_k: Labels returned per text (None = the engine's top_k)
+
+        Returns:
+            Per text, the top_k {'label', 'score'} dicts sorted by score descending
+        """
+        if not texts:
+            return []
+
+        encoded = self.tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.max_length,
+            padding=False,
+            return_attention_mask=False,
+            return_token_type_ids=False
+        )["input_ids"]
+
+        longest = max(len(ids) for ids in encoded)
+        length = min(-(-longest // self.LENGTH_BUCKET) * self.LENGTH_BUCKET, self.max_length)
+        batch = 1 << (len(texts) - 1).bit_length()
+        pad_id = self.tokenizer.pad_token_id or 0
+
+        with self._lock:
+            binding, inputs, logits = self._get_buffers(batch, length)
+
+            input_ids = inputs["input_ids"]
+            attention_mask = inputs.get("attention_mask")
+            input_ids.fill(pad_id)
+            if attention_mask is not None:
+                attention_mask.fill(0)
+            for row, ids in enumerate(encoded):
+                input_ids[row, :len(ids)] = ids
+                if attention_mask is not None:
+                    attention_mask[row, :len(ids)] = 1
+            if attention_mask is not None:
+                # Padding rows attend to one pad token so no row is fully masked
+                attention_mask[len(encoded):, 0] = 1
+            if "token_type_ids" in inputs:
+                inputs["token_type_ids"].fill(0)
+
+            self.session.run_with_iobinding(binding)
+            scores = self._scores(logits[:len(texts)])
+
+        k = min(top_k or self.top_k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, indices in enumerate(top):
+            ordered = indices[np.argsort(-scores[row, indices])]
+            results.append([{'label': self.labels[i], 'score': float(scores[row, i])} for i in ordered])
+        return results
+
+    def cleanup(self):
+        """Release buffers and the session"""
+        with self._lock:
+            self._buffers.clear()
+            self.session = None
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Build the emotion model directory used by EmotionDetector.
+
+Exports a local SamLowe/roberta-base-go_emotions checkpoint to ONNX, applies
+graph optimisation and dynamic int8 quantisation, and compares the fp32 and int8
+models (top-label agreement, score drift, latency) on a held-out text set. The
+int8 model is installed as models/roberta_emotions_onnx, with the report next to
+it, only if its top-1 agreement reaches --min-agreement; otherwise the installed
+model is left alone and the report is written beside the output directory.
+
+Usage:
+    python inference/processors/export_emotion_model.py --checkpoint PATH [--output DIR]
+        [--target auto|avx2|avx512|avx512_vnni|arm64] [--texts FILE] [--min-agreement 0.95]
+
+Example:
+    git clone https://huggingface.co/SamLowe/roberta-base-go_emotions models/roberta-base-go_emotions
+    python inference/processors/export_emotion_model.py --checkpoint models/roberta-base-go_emotions
+"""
+
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Get project root (two levels up from this file)
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from optimum.onnxruntime import ORTModelForSequenceClassification, ORTOptimizer, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig, OptimizationConfig
+from transformers import AutoTokenizer
+
+from inference.processors.emotion_ort import OnnxEmotionEngine
+
+DEFAULT_OUTPUT = project_root / "models" / "roberta_emotions_onnx"
+REPORT_NAME = "export_report.json"
+REJECTED_REPORT_NAME = "export_report_rejected.json"
+
+# Held out from benchmarks/benchmark_emotion.py so the check isn't tuned on the same texts
+HELD_OUT_TEXTS = [
+    "I just got engaged!!! I can't stop smiling",
+    "Why does nobody ever listen to me",
+    "That movie was so scary I had to sleep with the lights on",
+    "thanks for remembering my birthday, that means a lot",
+    "I'm not sure how I feel about moving to a new city",
+    "Stop. Just stop talking about it.",
+    "I passed the exam!",
+    "My cat knocked my coffee all over my laptop this morning",
+    "I feel so alone lately, like nobody would notice if I disappeared for a week",
+    "Can you explain how black holes form?",
+    "omg that's disgusting, who puts pineapple in a smoothie with fish",
+    "I'm sorry, I should have called you back yesterday",
+    "Meh. It's fine.",
+    "I can't wait for the concert on Saturday!",
+    "He said he'd be here an hour ago and he's still not answering",
+    "Wow, I did not see that plot twist coming",
+    "I really admire how patient you are with me",
+    "Honestly I'm exhausted and I just want this week to be over",
+    "Do you ever wonder what our lives would look like if we'd made different choices?",
+    "haha you're ridiculous",
+    "I'm worried my mom's test results won't be good",
+    "I love you so much, you know that?",
+    "Ugh, the printer jammed again. Of course it did.",
+    "I regret not telling her how I felt before she left",
+    "We won the championship!!!",
+    "I guess I'm a little disappointed, I thought they'd pick my design",
+    "Could you maybe help me figure out what to cook tonight?",
+    "That's actually a really thoughtful gift, thank you",
+    "I'm nervous about the interview but also kind of excited",
+    "Everything feels pointless today",
+    "Good morning! The sun is out and I feel great",
+    "I don't understand why you'd do that without asking me first",
+]
+
+
+def quantization_config(target: str) -> AutoQuantizationConfig:
+    """Dynamic int8 quantisation config for the CPU instruction set"""
+    if target == "auto":
+        machine = platform.machine().lower()
+        target = "arm64" if machine in ("arm64", "aarch64") else "avx2"
+
+    builders = {
+        "avx2": AutoQuantizationConfig.avx2,
+        "avx512": AutoQuantizationConfig.avx512,
+        "avx512_vnni": AutoQuantizationConfig.avx512_vnni,
+        "arm64": AutoQuantizationConfig.arm64,
+    }
+    return builders[target](is_static=False, per_channel=False)
+
+
+def export_fp32(checkpoint: Path, save_dir: Path):
+    """Export the PyTorch checkpoint to ONNX (fp32) with its tokenizer"""
+    model = ORTModelForSequenceClassification.from_pretrained(str(checkpoint), export=True, local_files_only=True)
+    tokenizer = AutoTokenizer.from_pretrained(str(checkpoint), local_files_only=True)
+    model.save_pretrained(str(save_dir))
+    tokenizer.save_pretrained(str(save_dir))
+    return model
+
+
+def optimize_and_quantize(model, work_dir: Path, target: str) -> Path:
+    """
+    Graph-optimise the fp32 export, then apply dynamic int8 quantisation.
+
+    Returns:
+        Path to the quantised .onnx file
+    """
+    optimized_dir = work_dir / "optimized"
+    optimizer = ORTOptimizer.from_pretrained(model)
+    optimizer.optimize(
+        save_dir=str(optimized_dir),
+        optimization_config=OptimizationConfig(optimization_level=2, optimize_for_gpu=False)
+    )
+
+    quantized_dir = work_dir / "quantized"
+    optimized_file = next(optimized_dir.glob("*.onnx"))
+    quantizer = ORTQuantizer.from_pretrained(str(optimized_dir), file_name=optimized_file.name)
+    quantizer.quantize(save_dir=str(quantized_dir), quantization_config=quantization_config(target))
+
+    return next(quantized_dir.glob("*quantized*.onnx"))
+
+
+def install(fp32_dir: Path, quantized_file: Path, output_dir: Path):
+    """Write model.onnx (int8) plus config and tokenizer files to the output directory"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for item in fp32_dir.iterdir():
+        if item.is_file() and item.suffix != ".onnx":
+            shutil.copy2(item, output_dir / item.name)
+    shutil.copy2(quantized_file, output_dir / "model.onnx")
+
+
+def measure(engine: OnnxEmotionEngine, texts: list, iterations: int) -> dict:
+    """Single-text p50/p95 latency (ms) and batched throughput (texts/sec)"""
+    engine.classify(texts[:4])  # warm up
+
+    latencies = []
+    for _ in range(iterations):
+        for text in texts:
+            start = time.perf_counter()
+            engine.classify([text])
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        engine.classify(texts)
+    batch_elapsed = time.perf_counter() - start
+
+    return {
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+        'batch_texts_per_sec': round(len(texts) * iterations / batch_elapsed, 1),
+    }
+
+
+def compare(fp32_dir: Path, int8_dir: Path, texts: list, iterations: int) -> dict:
+    """Label agreement and latency of the int8 model against the fp32 export"""
+    fp32 = OnnxEmotionEngine(str(fp32_dir), top_k=3)
+    int8 = OnnxEmotionEngine(str(int8_dir), top_k=3)
+
+    reference = fp32.classify(texts)
+    candidate = int8.classify(texts)
+
+    top1 = sum(r[0]['label'] == c[0]['label'] for r, c in zip(reference, candidate))
+    top3_overlap = statistics.mean(
+        len({x['label'] for x in r} & {x['label'] for x in c}) / len(r) for r, c in zip(reference, candidate)
+    )
+    max_drift = max(abs(r[0]['score'] - c[0]['score']) for r, c in zip(reference, candidate) if r[0]['label'] == c[0]['label']) \
+        if top1 else None
+    disagreements = [
+        {'text': text, 'fp32': r[0]['label'], 'int8': c[0]['label']}
+        for text, r, c in zip(texts, reference, candidate) if r[0]['label'] != c[0]['label']
+    ]
+
+    report = {
+        'texts': len(texts),
+        'top1_agreement': round(top1 / len(texts), 4),
+        'top3_overlap': round(top3_overlap, 4),
+        'max_top1_score_drift': round(max_drift, 5) if max_drift is not None else None,
+        'disagreements': disagreements,
+        'fp32': measure(fp32, texts, iterations),
+        'int8': measure(int8, texts, iterations),
+        'fp32_size_mb': round((fp32_dir / "model.onnx").stat().st_size / 1e6, 1),
+        'int8_size_mb': round((int8_dir / "model.onnx").stat().st_size / 1e6, 1),
+    }
+
+    fp32.cleanup()
+    int8.cleanup()
+    return report
+
+
+def load_texts(path: Path) -> list:
+    """One text per line; blank lines ignored"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, optimise and int8-quantise the go_emotions classifier")
+    parser.add_argument('--checkpoint', type=Path, required=True, help="Local SamLowe/roberta-base-go_emotions checkpoint")
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT, help="Model directory used by EmotionDetector")
+    parser.add_argument('--target', choices=["auto", "avx2", "avx512", "avx512_vnni", "arm64"], default="auto",
+                        help="CPU instruction set for quantisation")
+    parser.add_argument('--texts', type=Path, help="Held-out texts, one per line (default: built-in set)")
+    parser.add_argument('--iterations', type=int, default=10, help="Timing passes over the held-out texts")
+    parser.add_argument('--min-agreement', type=float, default=0.95, help="Fail if int8 top-1 agreement is lower")
+    args = parser.parse_args()
+
+    if not (args.checkpoint / "config.json").exists():
+        print(f"❌ No checkpoint found at {args.checkpoint} (expected config.json and model weights)")
+        sys.exit(1)
+
+    texts = load_texts(args.texts) if args.texts else HELD_OUT_TEXTS
+    if not texts:
+        print("❌ No held-out texts to evaluate")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix="emotion_export_") as tmp:
+        work_dir = Path(tmp)
+        fp32_dir = work_dir / "fp32"
+
+        print(f"Exporting {args.checkpoint} to ONNX...")
+        model = export_fp32(args.checkpoint, fp32_dir)
+
+        print(f"Optimising graph and quantising to int8 ({args.target})...")
+        quantized_file = optimize_and_quantize(model, work_dir, args.target)
+
+        # Evaluate a staged copy - the installed model is only replaced if it passes
+        staged_dir = work_dir / "int8"
+        install(fp32_dir, quantized_file, staged_dir)
+
+        print(f"Comparing fp32 and int8 on {len(texts)} held-out texts...")
+        report = compare(fp32_dir, staged_dir, texts, max(args.iterations, 1))
+
+        passed = report['top1_agreement'] >= args.min_agreement
+        if passed:
+            install(fp32_dir, quantized_file, args.output)
+            report_path = args.output / REPORT_NAME
+            print(f"✅ Installed int8 model to {args.output}")
+        else:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            report_path = args.output.parent / REJECTED_REPORT_NAME
+            print(f"❌ Top-1 agreement {report['top1_agreement']:.1%} is below {args.min_agreement:.1%} - "
+                  f"{args.output} left unchanged")
+
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'checkpoint': str(args.checkpoint),
+        'target': args.target,
+        **report,
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"\nTop-1 agreement: {report['top1_agreement']:.1%}   top-3 overlap: {report['top3_overlap']:.1%}   "
+          f"max score drift: {report['max_top1_score_drift']}")
+    print(f"\n{'Model':<8}{'size MB':>9}{'p50 ms':>9}{'p95 ms':>9}{'batch texts/s':>15}")
+    print("-" * 50)
+    for name in ("fp32", "int8"):
+        stats = report[name]
+        print(f"{name:<8}{report[name + '_size_mb']:>9}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+              f"{stats['batch_texts_per_sec']:>15.1f}")
+    for item in report['disagreements']:
+        print(f"⚠️  {item['fp32']} -> {item['int8']}: {item['text']}")
+    print(f"\nReport written to {report_path}")
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
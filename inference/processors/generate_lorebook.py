@@ -2,16 +2,26 @@
 """
 Helper script to generate tag-based lorebooks for character profiles.
 
+With --all, every character profile in data/profiles is regenerated from its
+saved tagSelections without prompting, in parallel worker processes, and a
+summary of chunks and tokens per character is printed.
+
 Usage:
-    python inference/processors/generate_lorebook.py <character_name>
+    python inference/processors/generate_lorebook.py <character_name> [--auto]
+    python inference/processors/generate_lorebook.py --all [--workers N] [--dry-run]
 
 Example:
     python inference/processors/generate_lorebook.py echo
+    python inference/processors/generate_lorebook.py --all --dry-run
 """
 
+import os
 import sys
 import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Dict
 
 # Get project root (two levels up from this file)
 project_root = Path(__file__).parent.parent.parent
@@ -231,18 +241,141 @@ def generate_lorebook_for_character(character_name: str, interactive: bool = Tru
         return False
 
 
+def regenerate_profile(profile_path: str, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Regenerate one profile's lorebook from its saved tagSelections (no prompts).
+
+    Runs in a worker process; the profile is backed up and rewritten unless dry_run.
+
+    Args:
+        profile_path: Path to the profile JSON
+        dry_run: Generate and summarise without writing
+
+    Returns:
+        Summary row: file, character, status ('ok', 'skipped' or 'failed'),
+        chunks, tokens, tags and message
+    """
+    path = Path(profile_path)
+    row = {"file": path.name, "character": path.stem, "status": "failed",
+           "chunks": 0, "tokens": 0, "tags": 0, "message": ""}
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            profile_data = json.load(f)
+    except Exception as e:
+        row["message"] = f"could not load profile: {e}"
+        return row
+
+    if profile_data.get('type') != 'character':
+        row.update(status="skipped", message=f"not a character profile (type '{profile_data.get('type')}')")
+        return row
+
+    character = profile_data.get('character', {})
+    row["character"] = character.get('name', path.stem)
+    selected_tags = character.get('tagSelections', {})
+    if not selected_tags:
+        row.update(status="skipped", message="no tag selections")
+        return row
+
+    try:
+        generator = LorebookGenerator()
+        is_valid, errors = generator.validate_tags(selected_tags)
+        if not is_valid:
+            row["message"] = "; ".join(errors)
+            return row
+
+        lorebook = generator.generate_lorebook_from_tags(
+            character_name=row["character"],
+            companion_type=character.get('companionType', 'friend'),
+            selected_tags=selected_tags
+        )
+        summary = generator.get_lorebook_summary(lorebook)
+        row.update(chunks=summary['total_chunks'], tokens=summary['total_tokens'],
+                   tags=summary['total_tags_selected'])
+
+        if not dry_run:
+            backup_path = path.with_suffix('.json.backup')
+            with open(backup_path, 'w', encoding='utf-8') as f:
+                json.dump(profile_data, f, indent=2)
+
+            profile_data['lorebook'] = lorebook
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(profile_data, f, indent=2)
+    except Exception as e:
+        row["message"] = f"{type(e).__name__}: {e}"
+        return row
+
+    row["status"] = "ok"
+    return row
+
+
+def regenerate_all(workers: int = 0, dry_run: bool = False) -> bool:
+    """
+    Regenerate the lorebooks of every profile in data/profiles in parallel.
+
+    Args:
+        workers: Worker processes (0 = one per CPU, at most one per profile)
+        dry_run: Generate and summarise without writing
+
+    Returns:
+        True if no profile failed
+    """
+    profiles_dir = project_root / "data" / "profiles"
+    profile_paths = sorted(str(path) for path in profiles_dir.glob("*.json"))
+    if not profile_paths:
+        print(f"❌ No profiles found in {profiles_dir}")
+        return False
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(profile_paths)))
+    print(f"🚀 Regenerating {len(profile_paths)} profiles with {workers} workers"
+          f"{' (dry run, nothing written)' if dry_run else ''}\n")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        rows = list(executor.map(regenerate_profile, profile_paths, [dry_run] * len(profile_paths)))
+
+    icons = {"ok": "✅", "skipped": "⏭️", "failed": "❌"}
+    print(f"   {'Character':<24} {'Chunks':>6} {'Tokens':>7} {'Tags':>5}")
+    for row in rows:
+        line = f"{icons[row['status']]} {row['character']:<24} "
+        if row["status"] == "ok":
+            line += f"{row['chunks']:>6} {row['tokens']:>7} {row['tags']:>5}"
+        else:
+            line += f"{row['status']}: {row['message']}"
+        print(line)
+
+    ok = [row for row in rows if row["status"] == "ok"]
+    failed = [row for row in rows if row["status"] == "failed"]
+    print(f"\n📊 {len(ok)} regenerated, {len(rows) - len(ok) - len(failed)} skipped, {len(failed)} failed | "
+          f"{sum(row['chunks'] for row in ok)} chunks, ~{sum(row['tokens'] for row in ok)} tokens total")
+
+    if ok and not dry_run:
+        print(f"\n🎉 Done! Restart the inference service to use the new lorebooks.")
+
+    return not failed
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python inference/processors/generate_lorebook.py <character_name> [--auto]")
-        print("\nOptions:")
-        print("  --auto    Use existing tag selections from profile (non-interactive)")
+    parser = argparse.ArgumentParser(description="Generate tag-based lorebooks for character profiles")
+    parser.add_argument('character_name', nargs='?', help="Profile name in data/profiles (e.g. echo)")
+    parser.add_argument('--auto', action='store_true', help="Use existing tag selections from profile (non-interactive)")
+    parser.add_argument('--all', action='store_true', help="Regenerate every profile from its saved tag selections")
+    parser.add_argument('--workers', type=int, default=0, help="Worker processes for --all (default: one per CPU)")
+    parser.add_argument('--dry-run', action='store_true', help="With --all, summarise without writing profiles")
+    args = parser.parse_args()
+
+    if args.all:
+        sys.exit(0 if regenerate_all(workers=args.workers, dry_run=args.dry_run) else 1)
+
+    if not args.character_name:
+        parser.print_usage()
         print("\nExample:")
         print("  python inference/processors/generate_lorebook.py echo")
         print("  python inference/processors/generate_lorebook.py echo --auto")
+        print("  python inference/processors/generate_lorebook.py --all --dry-run")
         sys.exit(1)
 
-    character_name = sys.argv[1]
-    interactive = "--auto" not in sys.argv
+    character_name = args.character_name
+    interactive = not args.auto
 
     print(f"🚀 Tag-Based Lorebook Generator V2")
     print(f"   Character: {character_name}")
@@ -2,13 +2,53 @@
 LLM Inference Engine
 Handles model loading and raw token generation
 """
-from llama_cpp import Llama
+from collections import OrderedDict
 from pathlib import Path
 import logging
-from typing import Optional, List
+from typing import Optional, List, Dict, FrozenSet, NamedTuple, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Logit bias for banned tokens (-100 effectively removes a token, as in OpenAI's logit_bias)
+BANNED_TOKEN_BIAS = -100.0
+
+# Number of avoid lists whose tokenisation is kept
+AVOID_TOKEN_CACHE_SIZE = 32
+
+# Word that avoid phrases are tokenised after (see LLMInference._continuation_tokens)
+AVOID_TOKEN_ANCHOR = "a"
+
+
+class AvoidTokenBans(NamedTuple):
+    """Token-level bans for an avoid list"""
+    logit_bias: Dict[int, float]
+    # Token prefix -> tokens that would complete a banned phrase
+    sequences: Dict[Tuple[int, ...], FrozenSet[int]]
+
+
+class SequenceBanProcessor:
+    """
+    llama.cpp logits processor banning multi-token phrases.
+
+    When the most recent tokens match the start of a banned phrase, the token
+    that would complete it is suppressed, so the model continues differently.
+    """
+
+    def __init__(self, sequences: Dict[Tuple[int, ...], FrozenSet[int]]):
+        self.sequences = sequences
+        self.prefix_lengths = sorted({len(prefix) for prefix in sequences})
+
+    def __call__(self, input_ids, scores):
+        count = len(input_ids)
+        for length in self.prefix_lengths:
+            if length > count:
+                break
+            banned = self.sequences.get(tuple(int(token) for token in input_ids[count - length:]))
+            if banned:
+                for token in banned:
+                    scores[token] = float('-inf')
+        return scores
+
 
 class LLMInference:
     """Core LLM model operations - loading and generation only"""
@@ -38,6 +78,7 @@ class LLMInference:
         self.use_mlock = use_mlock
         self.llm = None
         self.initialized = False
+        self._avoid_token_cache: "OrderedDict[Tuple[str, ...], AvoidTokenBans]" = OrderedDict()
 
     async def initialize(self):
         """Load LLM model into memory"""
@@ -47,6 +88,9 @@ class LLMInference:
             if not self.model_path.exists():
                 raise FileNotFoundError("Model file not found")
 
+            # Imported here so the service can start without loading llama.cpp
+            from llama_cpp import Llama
+
             # Optimized for Apple Silicon Metal GPU
             self.llm = Llama(
                 model_path=str(self.model_path),
@@ -72,9 +116,74 @@ class LLMInference:
             self.initialized = False
             raise
 
+    def _tokenize_avoid_words(self, avoid_words: List[str]) -> AvoidTokenBans:
+        """
+        Turn avoid words into token bans (cached per avoid list).
+
+        Each phrase is tokenised in its common surface forms (lower/capitalised/title
+        case) as a word start only: after a space, and at the start of a line. Forms
+        without a preceding space or newline are usually word-internal subword pieces
+        ("ok" in "book"), so they are not banned here - ResponseCleaner removes
+        whatever gets through. A single-token form gets a banned-token logit bias;
+        everything else is banned as a sequence (line-start forms include the
+        newline token, so they only fire after a newline).
+
+        Args:
+            avoid_words: List of words/phrases that must not be generated
+
+        Returns:
+            AvoidTokenBans for the list
+        """
+        key = tuple(sorted({word.strip().lower() for word in avoid_words if word and word.strip()}))
+
+        bans = self._avoid_token_cache.get(key)
+        if bans is not None:
+            self._avoid_token_cache.move_to_end(key)
+            return bans
+
+        logit_bias: Dict[int, float] = {}
+        sequences: Dict[Tuple[int, ...], set] = {}
+        for phrase in key:
+            for form in {phrase, phrase.capitalize(), phrase.title()}:
+                for variant in (" " + form, "\n" + form):
+                    tokens = self._continuation_tokens(variant)
+                    if len(tokens) == 1:
+                        logit_bias[tokens[0]] = BANNED_TOKEN_BIAS
+                    elif tokens:
+                        sequences.setdefault(tuple(tokens[:-1]), set()).add(tokens[-1])
+
+        bans = AvoidTokenBans(
+            logit_bias=logit_bias,
+            sequences={prefix: frozenset(tokens) for prefix, tokens in sequences.items()}
+        )
+
+        self._avoid_token_cache[key] = bans
+        if len(self._avoid_token_cache) > AVOID_TOKEN_CACHE_SIZE:
+            self._avoid_token_cache.popitem(last=False)
+
+        logger.debug(f"Avoid words tokenised: {len(logit_bias)} banned tokens, {len(sequences)} banned sequences")
+        return bans
+
+    def _continuation_tokens(self, text: str) -> List[int]:
+        """
+        Tokens for text as it appears mid-stream, after a word.
+
+        Tokenising the text on its own would let the tokenizer treat it as the
+        start of the input (SentencePiece adds a dummy space prefix), so it is
+        tokenised after an anchor word whose tokens are then dropped.
+
+        Returns:
+            Token ids, or an empty list if the anchor merged with the text
+        """
+        anchor = self.llm.tokenize(AVOID_TOKEN_ANCHOR.encode("utf-8"), add_bos=False, special=False)
+        tokens = self.llm.tokenize((AVOID_TOKEN_ANCHOR + text).encode("utf-8"), add_bos=False, special=False)
+        if tokens[:len(anchor)] != anchor:
+            return []
+        return tokens[len(anchor):]
+
     async def generate(self, prompt: str, max_tokens: int = 200,
                       temperature: float = 1.0, stop: Optional[List[str]] = None,
-                      stream: bool = False):
+                      stream: bool = False, avoid_words: Optional[List[str]] = None):
         """
         Generate text from prompt (raw output, no cleaning)
 
@@ -84,6 +193,7 @@ class LLMInference:
             temperature: Sampling temperature
             stop: Stop sequences
             stream: Enable streaming
+            avoid_words: Words/phrases suppressed at token level (never generated)
 
         Returns:
             Tuple of (generated_text, tokens_generated) or async generator if streaming
@@ -92,6 +202,15 @@ class LLMInference:
             raise RuntimeError("LLM not initialized")
 
         try:
+            logit_bias = None
+            logits_processor = None
+            if avoid_words:
+                bans = self._tokenize_avoid_words(avoid_words)
+                logit_bias = bans.logit_bias or None
+                if bans.sequences:
+                    from llama_cpp import LogitsProcessorList
+                    logits_processor = LogitsProcessorList([SequenceBanProcessor(bans.sequences)])
+
             result = self.llm(
                 prompt,
                 max_tokens=max_tokens,
@@ -106,6 +225,8 @@ class LLMInference:
                 min_p=0.05,  # Filter low-probability tokens early (faster sampling)
                 tfs_z=1.0,  # Tail-free sampling
                 mirostat_mode=0,  # Disable mirostat for maximum speed
+                logit_bias=logit_bias,  # Single-token avoid words
+                logits_processor=logits_processor,  # Multi-token avoid phrases
                 # Metal-specific optimizations
             )
 
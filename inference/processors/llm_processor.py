@@ -2,17 +2,24 @@
 LLM Processor - Main orchestrator
 Coordinates all LLM-related processing using modular components
 """
+import json
+import asyncio
+import hashlib
 import logging
-from typing import Optional, List, Dict, Any
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Awaitable, Callable
 from pathlib import Path
 
 from .llm_inference import LLMInference
 from .prompt_builder import PromptBuilder
 from .response_cleaner import ResponseCleaner
+from .streaming_cleaner import StreamingResponseCleaner
 from .context_manager import ContextManager
 from .crisis_detector import CrisisDetector
 from .age_detector import AgeDetector
+from .rule_gate import PreLLMGate
 from .lorebook_generator import LorebookGenerator
+from .lorebook_retriever import LorebookRetriever
 from .character_loader import (
     load_default_character_profile,
     load_character_by_name,
@@ -22,6 +29,9 @@ from .character_loader import (
 
 logger = logging.getLogger(__name__)
 
+# Number of tag-generated lorebooks kept (one per character/selection in use)
+GENERATED_LOREBOOK_CACHE_SIZE = 64
+
 
 class LLMProcessor:
     """
@@ -41,7 +51,13 @@ class LLMProcessor:
             n_batch: int = 512,
             memory_service=None,
             use_mmap: bool = True,
-            use_mlock: bool = False
+            use_mlock: bool = False,
+            lorebook_token_budget: int = 300,
+            lorebook_max_chunks: int = 2,
+            lorebook_cache_size: int = 256,
+            lorebook_semantic: bool = True,
+            lorebook_semantic_weight: int = 20,
+            lorebook_semantic_threshold: float = 0.35
     ):
         """
         Initialize LLM processor with all components
@@ -55,6 +71,12 @@ class LLMProcessor:
             memory_service: Optional vector memory service
             use_mmap: Use memory-mapped file loading (default: True)
             use_mlock: Lock pages in RAM (default: False, recommended for macOS)
+            lorebook_token_budget: Maximum tokens of lorebook chunks added to a prompt
+            lorebook_max_chunks: Matched lorebook chunks per turn (besides always-include ones)
+            lorebook_cache_size: Memoised per-turn lorebook retrievals
+            lorebook_semantic: Also score keyword chunks by embedding similarity (uses memory_service)
+            lorebook_semantic_weight: Semantic points for a perfect match
+            lorebook_semantic_threshold: Minimum cosine similarity that scores
         """
         self.model_path = Path(model_path)
         self.initialized = False
@@ -75,6 +97,21 @@ class LLMProcessor:
         self.context_manager = ContextManager(memory_service=memory_service)
         self.crisis_detector = CrisisDetector()
         self.age_detector = AgeDetector()
+        self.rule_gate = PreLLMGate(self.crisis_detector, self.age_detector)
+
+        # Shared by all prompt builders so compiled lorebooks and retrievals are reused across turns
+        self.lorebook_retriever = LorebookRetriever(
+            max_chunks=lorebook_max_chunks,
+            result_cache_size=lorebook_cache_size,
+            embedder=memory_service if lorebook_semantic else None,
+            semantic_weight=lorebook_semantic_weight,
+            semantic_threshold=lorebook_semantic_threshold
+        )
+        self.lorebook_token_budget = lorebook_token_budget
+
+        # Lorebooks generated from tagSelections, keyed by a hash of (character, companion type, selections)
+        self.lorebook_generator = LorebookGenerator()
+        self._generated_lorebook_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
 
         # Default character data (loaded by reload_character)
         self.default_character_name = None
@@ -241,6 +278,8 @@ class LLMProcessor:
             shared_roleplay_events=user_settings.get('sharedRoleplayEvents', []),
             user_communication_boundaries=user_settings.get('communicationBoundaries', ''),
             lorebook=lorebook,
+            lorebook_retriever=self.lorebook_retriever,
+            lorebook_token_budget=self.lorebook_token_budget,
             personality_tags=personality_tags
         )
 
@@ -250,10 +289,70 @@ class LLMProcessor:
         logger.debug(f"Created PromptBuilder for character")
         return prompt_builder
 
+    @staticmethod
+    def _canonical_tag_selections(tag_selections: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Order-independent form of a tagSelections dict.
+
+        Categories and tags are sorted, duplicate tags and empty categories dropped,
+        so the same selection sent in a different order maps to the same lorebook.
+        """
+        return {
+            category: sorted(set(tags))
+            for category, tags in sorted(tag_selections.items())
+            if tags
+        }
+
+    def _get_generated_lorebook(
+            self,
+            character_name: str,
+            companion_type: str,
+            tag_selections: Dict[str, List[str]]
+    ) -> Dict[str, Any]:
+        """
+        Get the lorebook generated from tag selections, generating it on first use.
+
+        The cache key is a hash of (character, companion type, canonical selections),
+        so a changed selection is simply a new key; old entries age out of the LRU.
+        The same dict is returned while the selection is unchanged, which also lets
+        LorebookRetriever reuse its compiled lorebook without rehashing.
+
+        Args:
+            character_name: Character name (written into the lorebook)
+            companion_type: Companion type
+            tag_selections: UI category -> selected tags
+
+        Returns:
+            Generated lorebook dict (shared; do not modify)
+        """
+        selections = self._canonical_tag_selections(tag_selections)
+        key = hashlib.sha1(
+            json.dumps([character_name, companion_type, selections], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+        lorebook = self._generated_lorebook_cache.get(key)
+        if lorebook is not None:
+            self._generated_lorebook_cache.move_to_end(key)
+            return lorebook
+
+        lorebook = self.lorebook_generator.generate_lorebook_from_tags(
+            character_name=character_name,
+            companion_type=companion_type,
+            selected_tags=selections
+        )
+        logger.debug(f"Generated lorebook with {len(lorebook.get('chunks', []))} chunks")
+
+        self._generated_lorebook_cache[key] = lorebook
+        if len(self._generated_lorebook_cache) > GENERATED_LOREBOOK_CACHE_SIZE:
+            self._generated_lorebook_cache.popitem(last=False)
+
+        return lorebook
+
     def _create_response_cleaner(self, char_name: str, user_name: str, avoid_words: list) -> ResponseCleaner:
         """
-        Create a ResponseCleaner with avoid word patterns.
-        Avoid words are NEVER cached - always compiled fresh from the provided list.
+        Create a ResponseCleaner with avoid words.
+        Avoid words are compiled into one matcher cached by a hash of the normalised
+        list - an edited list produces a new key, so changes apply immediately.
 
         Args:
             char_name: Character name
@@ -263,21 +362,10 @@ class LLMProcessor:
         Returns:
             ResponseCleaner instance
         """
-        import re
-        avoid_patterns = []
-        for phrase in avoid_words:
-            if phrase:
-                escaped = re.escape(phrase.strip())
-                if phrase.strip() and phrase.strip()[0].isalnum():
-                    escaped = r'\b' + escaped
-                if phrase.strip() and phrase.strip()[-1].isalnum():
-                    escaped = escaped + r'\b'
-                avoid_patterns.append(re.compile(escaped, re.IGNORECASE))
-
         return ResponseCleaner(
             character_name=char_name,
             user_name=user_name,
-            avoid_patterns=avoid_patterns
+            avoid_words=avoid_words
         )
 
     async def generate_response(
@@ -337,6 +425,19 @@ class LLMProcessor:
             # Get the actual character name (resolved from default if needed)
             char_name = character_name or self.default_character_name
 
+            # Goodnight / nyan replies are fixed (crisis and age were checked above)
+            decision = self.rule_gate.fixed_reply(text, response_cleaner.user_name)
+            if decision is not None:
+                logger.info(f"⏹️ Answered by rule gate: {decision.kind}")
+                return {
+                    'success': True,
+                    'response': decision.text,
+                    'emotion': emotion,
+                    'emotion_score': emotion_data.get('intensity', 'unknown') if emotion_data else 'unknown',
+                    'type': 'response',
+                    'tokens': 0
+                }
+
             # 1. Fetch context from memory and web if available
             # Detect if this is a conversation starter (don't search for starters)
             is_starter = "[System: Generate a brief, natural conversation starter" in text
@@ -348,6 +449,7 @@ class LLMProcessor:
             )
 
             search_context = await self.context_manager.fetch_web_context(text, is_starter=is_starter)
+            await self._build_lorebook_index(prompt_builder)
 
             # 2. Build the complete prompt and get generation parameters
             prompt, max_tokens, temperature = prompt_builder.build_prompt(
@@ -375,7 +477,7 @@ class LLMProcessor:
             logger.debug(f"Raw response: {tokens_generated} tokens")
 
             # 5. Clean the response
-            cleaned_response = response_cleaner.clean(raw_response, user_message=text)
+            cleaned_response = response_cleaner.clean(raw_response)
 
             logger.info(f"✅ Generated response: {len(cleaned_response)} chars, {tokens_generated} tokens")
 
@@ -410,11 +512,19 @@ class LLMProcessor:
             request_id: Optional[str] = None,
             enable_memory: Optional[bool] = False,
             enable_web_search: Optional[bool] = False,
-            web_search_api_key: Optional[str] = None
+            web_search_api_key: Optional[str] = None,
+            emotion_task: Optional[Awaitable[Optional[Dict]]] = None,
+            on_text: Optional[Callable[[str], None]] = None
     ) -> Dict[str, Any]:
         """
         Generate a response with explicit context (for advanced API usage)
 
+        Messages with a fixed reply (crisis, goodnight, nyan) are answered by the
+        rule gate before any lookup or prompt building. Otherwise memory and web
+        search lookups start as soon as the character is known and run while the
+        prompt builder is set up; the prompt is built once they (and emotion_task,
+        if given) have resolved.
+
         Args:
             text: User's message
             emotion_data: Full emotion analysis dict
@@ -425,9 +535,17 @@ class LLMProcessor:
             temperature_override: Override generation temperature
             character_name: Name of character to use (None = default)
             request_id: Request ID for cancellation tracking (optional)
+            enable_memory: User preference for memory retrieval
+            enable_web_search: User preference for web search
+            web_search_api_key: Brave Search API key from user settings
+            emotion_task: In-flight emotion detection (EmotionDetector result or None);
+                          when given, it replaces emotion_data
+            on_text: Called with each piece of cleaned text as soon as it is final;
+                     the pieces concatenate to the returned 'text'
 
         Returns:
-            Dict with 'text' and 'tokens_generated'
+            Dict with 'text', 'tokens_generated', 'stopped_early', 'stop_reason',
+            'fast_path' (gate rule that answered, or None), 'crisis_detected' and 'risk_level'
         """
         if not self.initialized:
             raise RuntimeError("LLMProcessor not initialized. Call initialize() first.")
@@ -440,6 +558,10 @@ class LLMProcessor:
                 cancelled_requests.discard(request_id)
                 raise RuntimeError("Request cancelled by client")
 
+        memory_task = None
+        web_task = None
+        embed_task = None
+        index_task = None
         try:
             conversation_history = conversation_history or []
 
@@ -453,13 +575,53 @@ class LLMProcessor:
             elif character_profile and 'characterName' in character_profile:
                 character_name = character_profile['characterName']
 
+            use_profile = bool(character_profile and (character_profile.get('characterString') or character_profile.get('name')))
+            if use_profile:
+                char_name = character_profile.get('characterName', character_name or self.default_character_name)
+                user_name = character_profile.get('user_name', character_profile.get('userName', 'User'))
+            else:
+                char_name = character_name or self.default_character_name
+                (_, _, avoid_words, user_name, *_) = self._load_character_data(char_name)
+
+            # 0. Fixed replies (crisis intervention, goodnight, nyan) never reach the LLM
+            decision = self.rule_gate.check(text, user_name)
+            if decision is not None:
+                logger.info(f"⏹️ Answered by rule gate: {decision.kind}")
+                return {
+                    'text': decision.text,
+                    'tokens_generated': 0,
+                    'stopped_early': False,
+                    'stop_reason': None,
+                    'fast_path': decision.kind,
+                    'crisis_detected': decision.kind == 'crisis',
+                    'risk_level': decision.risk_level
+                }
+
+            # 1. Start memory and web search lookups; they run while the prompt builder is set up
+            memory_task = asyncio.create_task(self.context_manager.fetch_memory_context(
+                query=text,
+                character=char_name,
+                user_name=self.user_name,
+                enable_memory_override=enable_memory
+            ))
+            # Semantic lorebook scoring embeds the message; unless the memory lookup already
+            # does (same embedding cache), embed it off the event loop before the prompt is built
+            if self.lorebook_retriever.semantic_enabled and not self.context_manager.memory_enabled(enable_memory):
+                embed_task = asyncio.create_task(asyncio.to_thread(self.lorebook_retriever.embedder.embed_query, text))
+            if not search_context:
+                # Detect if this is a conversation starter (don't search for starters)
+                is_starter = "[System: Generate a brief, natural conversation starter" in text
+                web_task = asyncio.create_task(self.context_manager.fetch_web_context(
+                    text=text,
+                    is_starter=is_starter,
+                    enable_web_search=enable_web_search,
+                    api_key=web_search_api_key
+                ))
+
             # CRITICAL FIX: If character_profile dict is provided, use it instead of loading from disk
-            if character_profile and (character_profile.get('characterString') or character_profile.get('name')):
+            if use_profile:
                 logger.info("✅ Using character_profile data sent from Node.js (not loading from disk)")
 
-                # Extract data from the provided character_profile dict
-                char_name = character_profile.get('characterName', character_name or self.default_character_name)
-
                 # Get or format character string (with caching to avoid redundant formatting)
                 if character_profile.get('characterString'):
                     character_string = character_profile.get('characterString')
@@ -500,7 +662,6 @@ class LLMProcessor:
                 character_status = character_profile.get('status', '')
 
                 # Extract user settings from character_profile (Node.js merged them in)
-                user_name = character_profile.get('user_name', character_profile.get('userName', 'User'))
                 user_gender = character_profile.get('user_gender', 'non-binary')
                 user_species = character_profile.get('user_species', 'human')
                 user_timezone = character_profile.get('user_timezone', 'UTC')
@@ -513,13 +674,7 @@ class LLMProcessor:
                 # Generate lorebook from tagSelections if they exist
                 lorebook = character_profile.get('lorebook', {})
                 if tag_selections and not lorebook:
-                    lorebook_generator = LorebookGenerator()
-                    lorebook = lorebook_generator.generate_lorebook_from_tags(
-                        character_name=char_name,
-                        companion_type=companion_type,
-                        selected_tags=tag_selections
-                    )
-                    logger.debug(f"Generated lorebook with {len(lorebook.get('chunks', []))} chunks")
+                    lorebook = self._get_generated_lorebook(char_name, companion_type, tag_selections)
 
                 # Create PromptBuilder directly from provided data
                 prompt_builder = PromptBuilder(
@@ -540,6 +695,8 @@ class LLMProcessor:
                     shared_roleplay_events=shared_roleplay_events,
                     user_communication_boundaries=user_communication_boundaries,
                     lorebook=lorebook,
+                    lorebook_retriever=self.lorebook_retriever,
+                    lorebook_token_budget=self.lorebook_token_budget,
                     personality_tags=tag_selections,  # Pass the dict, not a list
                     # V3 additions for identity chunks
                     character_species=character_species,
@@ -553,36 +710,29 @@ class LLMProcessor:
                     character_status=character_status
                 )
 
-                # Create ResponseCleaner with fresh avoid_words from Node.js (never cached)
+                # Create ResponseCleaner with avoid_words from Node.js (matcher cached by list contents)
                 response_cleaner = self._create_response_cleaner(char_name, user_name, avoid_words)
             else:
                 # Fallback to loading from disk (legacy)
                 logger.warning("⚠️  No character_profile provided, falling back to disk load")
                 prompt_builder = self._get_prompt_builder_for_character(character_name)
-                char_name = character_name or self.default_character_name
-
-                # Load character data to get avoid words
-                (_, _, avoid_words, user_name, *_) = self._load_character_data(char_name)
                 response_cleaner = self._create_response_cleaner(char_name, user_name, avoid_words)
 
-            # 1. Fetch memory context if not provided via search_context
-            memory_context = await self.context_manager.fetch_memory_context(
-                query=text,
-                character=char_name,
-                user_name=self.user_name,
-                enable_memory_override=enable_memory
-            )
-
-            # 2. Fetch web search context if not already provided and user enabled it
-            if not search_context:
-                # Detect if this is a conversation starter (don't search for starters)
-                is_starter = "[System: Generate a brief, natural conversation starter" in text
-                search_context = await self.context_manager.fetch_web_context(
-                    text=text,
-                    is_starter=is_starter,
-                    enable_web_search=enable_web_search,
-                    api_key=web_search_api_key
-                )
+            # Lorebook chunk embeddings are built while the lookups finish
+            index_task = asyncio.create_task(self._build_lorebook_index(prompt_builder))
+
+            # 2. Wait for memory, web search and emotion results
+            memory_context = await memory_task
+            if web_task is not None:
+                search_context = await web_task
+            if emotion_task is not None:
+                emotion_data = self._emotion_data_from_result(await emotion_task)
+            if embed_task is not None:
+                try:
+                    await embed_task
+                except Exception as e:
+                    logger.debug(f"Message embedding for lorebook scoring failed: {e}")
+            await index_task
 
             # 3. Build the complete prompt and get generation parameters
             emotion = emotion_data.get('emotion', 'neutral') if emotion_data else 'neutral'
@@ -609,11 +759,15 @@ class LLMProcessor:
             # Log prompt length only (not content)
             logger.debug(f"Prompt length: {len(prompt)} chars")
 
-            # 5. Generate response from LLM
-            raw_response, tokens_generated = await self.llm_inference.generate(
+            # 5. Generate response from LLM (streamed so stop conditions end generation early)
+            stream_cleaner = StreamingResponseCleaner(response_cleaner)
+            tokens_generated = await self._generate_until_stop(
                 prompt=prompt,
                 max_tokens=max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                stream_cleaner=stream_cleaner,
+                avoid_words=avoid_words,
+                on_text=on_text
             )
 
             # Check for cancellation after generation (before cleaning/returning)
@@ -624,19 +778,110 @@ class LLMProcessor:
                     cancelled_requests.discard(request_id)
                     raise RuntimeError("Request cancelled by client")
 
-            # 6. Clean the response
-            cleaned_response = response_cleaner.clean(raw_response, user_message=text)
+            # 6. Clean the response (the remainder the stream held back is emitted here)
+            remainder = stream_cleaner.finish()
+            if on_text and remainder:
+                on_text(remainder)
+            cleaned_response = stream_cleaner.final_text
 
             logger.info(f"✅ Context-aware generation: {len(cleaned_response)} chars, {tokens_generated} tokens")
 
             return {
                 'text': cleaned_response,
-                'tokens_generated': tokens_generated
+                'tokens_generated': tokens_generated,
+                'stopped_early': stream_cleaner.stopped,
+                'stop_reason': stream_cleaner.stop_reason,
+                'fast_path': None,
+                'crisis_detected': False,
+                'risk_level': None
             }
 
         except Exception as e:
             logger.error(f"❌ Error in generate_with_context: {e}", exc_info=True)
             raise
+        finally:
+            # Don't leave lookups running if prompt building or generation failed
+            for task in (memory_task, web_task, embed_task, index_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def _build_lorebook_index(self, prompt_builder: PromptBuilder):
+        """
+        Embed the prompt builder's lorebook chunks for semantic scoring in a worker thread.
+
+        The first turn with a lorebook encodes every chunk in one batch; building it
+        here keeps that off the event loop, and build_prompt() finds it ready.
+        """
+        if not self.lorebook_retriever.semantic_enabled or not prompt_builder.lorebook.get("chunks"):
+            return
+        compiled = self.lorebook_retriever.compile(prompt_builder.lorebook)
+        if compiled.semantic_ready:
+            return
+        try:
+            await asyncio.to_thread(compiled.semantic_index, self.lorebook_retriever.embedder)
+        except Exception as e:
+            logger.warning(f"⚠️ Lorebook chunk embedding failed: {e}")
+
+    @staticmethod
+    def _emotion_data_from_result(result: Optional[Dict]) -> Optional[Dict]:
+        """Convert an EmotionDetector result to the emotion_data shape the backend sends"""
+        if not result:
+            return None
+        return {
+            'emotion': result.get('label'),
+            'confidence': result.get('score'),
+            'scores': {item['label']: item['score'] for item in result.get('top_emotions', [])},
+            'intensity': result.get('intensity'),
+            'category': result.get('category')
+        }
+
+    async def _generate_until_stop(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        stream_cleaner: StreamingResponseCleaner,
+        avoid_words: Optional[List[str]] = None,
+        on_text: Optional[Callable[[str], None]] = None
+    ) -> int:
+        """
+        Stream generation through the incremental cleaner, ending at the first stop condition.
+
+        Args:
+            prompt: Full prompt
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            stream_cleaner: Cleaner that emits final text and signals turn markers /
+                            stop sequences / meta-analysis
+            avoid_words: Words/phrases suppressed at token level during sampling
+            on_text: Receives cleaned text as the stream cleaner emits it
+
+        Returns:
+            Number of tokens generated
+        """
+        stream = await self.llm_inference.generate(
+            prompt=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            avoid_words=avoid_words
+        )
+
+        tokens = 0
+        try:
+            async for delta in stream:
+                tokens += 1
+                emitted = stream_cleaner.feed(delta)
+                if on_text and emitted:
+                    on_text(emitted)
+                if stream_cleaner.stopped:
+                    logger.info(f"⏹️ Generation stopped early after {tokens} tokens: {stream_cleaner.stop_reason}")
+                    break
+        finally:
+            # Closing the stream stops llama.cpp from sampling further tokens
+            await stream.aclose()
+
+        return tokens
 
     async def generate_conversation_starter(self, character_name: Optional[str] = None) -> str:
         """
@@ -661,6 +906,7 @@ class LLMProcessor:
 
             # Build a minimal prompt for starter
             starter_text = f"[System: Generate a brief, natural conversation starter from {char_name}. Keep it under 2 sentences, engaging and in-character.]"
+            await self._build_lorebook_index(prompt_builder)
 
             prompt, max_tokens, temperature = prompt_builder.build_prompt(
                 text=starter_text,
@@ -715,5 +961,5 @@ class LLMProcessor:
         # Load character data (cached, but avoid_words are always fresh)
         (_, char_name, avoid_words, user_name, *_) = self._load_character_data(character_name)
 
-        # Create ResponseCleaner with fresh avoid_words (never cached)
+        # Create ResponseCleaner (avoid-word matcher cached by list contents)
         return self._create_response_cleaner(char_name, user_name, avoid_words)
@@ -62,7 +62,7 @@ class LorebookGenerator:
         # 2. For each category, get templates for selected tags
         for category, tags in selected_tags.items():
             for tag in tags:
-                template = self.templates.get_template_by_ui_tag(tag)
+                template = self.templates.get_template_by_ui_tag(tag, category)
                 if template:
                     # V4 format: Templates have emotion_responses instead of static content
                     # Pass the entire template structure for dynamic retrieval
@@ -203,9 +203,7 @@ class LorebookGenerator:
         Returns:
             Dict of category → list of tag names
         """
-        # This would need to be built from the TAG_TO_TEMPLATE_ID mapping
-        # For now, returning empty dict - frontend has tags hardcoded in HTML
-        return {}
+        return self.templates.get_all_ui_tags()
 
     def validate_tags(self, selected_tags: Dict[str, List[str]]) -> tuple[bool, List[str]]:
         """
@@ -218,27 +216,14 @@ class LorebookGenerator:
             Tuple of (is_valid, list_of_errors)
         """
         errors = []
-        available_tags = self.templates.TAG_TO_TEMPLATE_ID.keys()
 
         for category, tags in selected_tags.items():
             for tag in tags:
-                if tag not in available_tags and not self._check_contextual_tag(tag, category):
+                if not self.templates.get_template_by_ui_tag(tag, category):
                     errors.append(f"Invalid tag '{tag}' in category '{category}'")
 
         return len(errors) == 0, errors
 
-    def _check_contextual_tag(self, tag: str, category: str) -> bool:
-        """Check if tag is valid in given context (handles ambiguous tags)"""
-        if tag == "No Touch" and category == "Platonic Touch":
-            return True
-        if tag == "Reserved" and category == "Platonic Touch":
-            return True
-        if tag == "Friendly" and category == "Platonic Touch":
-            return True
-        if tag == "Affectionate" and category == "Platonic Touch":
-            return True
-        return False
-
     def export_lorebook_json(self, lorebook: Dict[str, Any]) -> str:
         """
         Export lorebook as formatted JSON string.
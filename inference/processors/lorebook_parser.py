@@ -2,13 +2,83 @@
 Lorebook Trait Parser
 Parses free-text character traits into structured template IDs
 """
-from typing import List, Set, Dict, Any
+from typing import List, Set, Dict, Any, Tuple
 import re
 import logging
 
+from .safety_scanner import trie_regex
+
 logger = logging.getLogger(__name__)
 
 
+def _is_word_char(char: str) -> bool:
+    """Same notion of a word character as the regex \\b"""
+    return char.isalnum() or char == "_"
+
+
+class _PatternMatcher:
+    """
+    All keywords of one pattern dictionary compiled into a single regex.
+
+    The regex is a zero-width lookahead over a trie of the keywords with word
+    boundaries on both sides, so at each position it reports the longest keyword
+    that starts and ends on a word boundary. Shorter keywords at the same
+    position are prefixes of that match; which of them also end on a word
+    boundary is known from the match text alone and precomputed. Together that
+    gives every keyword occurrence, as one re.search(r'\\bkeyword\\b') per
+    keyword would.
+    """
+
+    def __init__(self, patterns: Dict[str, Dict[str, Any]]):
+        """
+        Args:
+            patterns: Pattern dictionary (pattern ID -> {"keywords", "template"})
+        """
+        # Keyword -> templates, in pattern declaration order
+        self.keyword_templates: Dict[str, List[str]] = {}
+        self.template_order: Dict[str, int] = {}
+        for pattern_data in patterns.values():
+            template_id = pattern_data["template"]
+            self.template_order.setdefault(template_id, len(self.template_order))
+            for keyword in pattern_data["keywords"]:
+                templates = self.keyword_templates.setdefault(keyword.lower(), [])
+                if template_id not in templates:
+                    templates.append(template_id)
+
+        keywords = sorted(self.keyword_templates)
+        self.regex = re.compile(rf"(?=\b({trie_regex(keywords)})\b)")
+        self.prefix_keywords: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(
+                other for other in keywords
+                if keyword.startswith(other) and (
+                    len(other) == len(keyword)
+                    or _is_word_char(keyword[len(other) - 1]) != _is_word_char(keyword[len(other)])
+                )
+            )
+            for keyword in keywords
+        }
+
+    def match(self, text_lower: str) -> List[str]:
+        """
+        Templates with at least one keyword in the text.
+
+        Args:
+            text_lower: Lower-cased trait text
+
+        Returns:
+            Matched template IDs, in pattern declaration order
+        """
+        matched: Dict[str, str] = {}
+        for hit in self.regex.finditer(text_lower):
+            for keyword in self.prefix_keywords[hit.group(1)]:
+                for template_id in self.keyword_templates[keyword]:
+                    matched.setdefault(template_id, keyword)
+
+        for template_id, keyword in matched.items():
+            logger.debug(f"Matched '{keyword}' → {template_id}")
+        return sorted(matched, key=self.template_order.__getitem__)
+
+
 class TraitParser:
     """
     Parse free-text character trait descriptions into template IDs.
@@ -199,6 +269,9 @@ class TraitParser:
         }
     }
 
+    # Compiled matcher per pattern dictionary (keyed by id, shared by all parsers)
+    _matchers: Dict[int, Tuple[Dict[str, Dict[str, Any]], _PatternMatcher]] = {}
+
     def __init__(self):
         """Initialize trait parser"""
         self.all_patterns = {
@@ -208,6 +281,15 @@ class TraitParser:
             "boundary": self.BOUNDARY_PATTERNS
         }
 
+    @classmethod
+    def _matcher_for(cls, patterns: Dict[str, Dict[str, Any]]) -> _PatternMatcher:
+        """Compiled matcher for a pattern dictionary (compiled on first use)"""
+        entry = cls._matchers.get(id(patterns))
+        if entry is None or entry[0] is not patterns:
+            entry = (patterns, _PatternMatcher(patterns))
+            cls._matchers[id(patterns)] = entry
+        return entry[1]
+
     def parse_traits(self, trait_data: Dict[str, Any]) -> List[str]:
         """
         Parse all character traits and return list of template IDs.
@@ -278,28 +360,8 @@ class TraitParser:
         if not text:
             return []
 
-        # Normalize text for matching
-        text_lower = text.lower()
-
-        matched_templates = []
-
-        # Check each pattern
-        for pattern_id, pattern_data in patterns.items():
-            keywords = pattern_data["keywords"]
-            template_id = pattern_data["template"]
-
-            # Check if any keyword matches
-            for keyword in keywords:
-                # Use word boundaries to avoid partial matches
-                # e.g., "loves touch" won't match "untouchable"
-                pattern = r'\b' + re.escape(keyword.lower()) + r'\b'
-
-                if re.search(pattern, text_lower):
-                    matched_templates.append(template_id)
-                    logger.debug(f"Matched '{keyword}' → {template_id}")
-                    break  # Only need one keyword match per pattern
-
-        return matched_templates
+        # Keywords match on word boundaries: "loves touch" won't match "untouchable"
+        return self._matcher_for(patterns).match(text.lower())
 
     def parse_affection_style(self, text: str) -> List[str]:
         """Parse affection style text into template IDs"""
@@ -2,12 +2,320 @@
 Lorebook Retriever
 Retrieves relevant lorebook chunks based on context during inference
 """
-from typing import Dict, List, Any, Optional, Set
+from collections import OrderedDict
+from typing import Dict, List, Any, NamedTuple, Optional, Set, Tuple, Union
+import hashlib
+import json
 import logging
 import re
 
+from .safety_scanner import trie_regex
+
 logger = logging.getLogger(__name__)
 
+# Romantic/intimate chunk categories hidden from platonic companions
+PLATONIC_COMPANION_TYPES = frozenset({"friend", "platonic", "companion"})
+PLATONIC_EXCLUDED_CATEGORIES = frozenset({"love_language", "physical_intimacy"})
+
+# Intensity/tone modifiers and affection cues looked for in the user message
+GENTLE_WORDS = ("soft", "gentle", "tender", "sweet", "light", "subtle", "quiet", "calm", "peaceful", "morning")
+INTENSE_WORDS = ("passionate", "hard", "deep", "intense", "urgent", "desperately", "need", "crave", "hunger")
+AFFECTION_WORDS = ("touch", "hug", "kiss", "hold")
+
+# Semantic scoring: a keyword chunk whose text has cosine similarity >= the
+# threshold with the user message gets int(weight * similarity) points
+SEMANTIC_WEIGHT = 20
+SEMANTIC_THRESHOLD = 0.35
+
+
+class TurnSignals(NamedTuple):
+    """Everything keyword scoring needs from one turn's text, found in one pass each"""
+    message_terms: frozenset  # indexed terms found in the message
+    context_terms: frozenset  # indexed terms found only in the context
+    message_hits: Dict[int, int]  # chunk index -> trigger keywords found in the message
+    context_hits: Dict[int, int]  # chunk index -> trigger keywords found only in the context
+    gentle: bool
+    intense: bool
+    affection: bool
+
+
+def lorebook_hash(lorebook: Dict[str, Any]) -> str:
+    """Stable content hash of a lorebook dict (same content -> same hash across requests)."""
+    payload = json.dumps(lorebook, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class CompiledLorebook:
+    """
+    A lorebook prepared once for repeated retrieval.
+
+    Holds what LorebookRetriever.retrieve used to rebuild on every turn:
+    - chunks deduplicated by ID (first occurrence wins)
+    - per companion type: the always-include chunks and the candidates to score
+    - per emotion_responses chunk: the rendered chunk for each emotion key
+
+    Chunks are referred to by their index in `chunks`.
+    """
+
+    def __init__(self, lorebook: Dict[str, Any], lorebook_id: Optional[str] = None):
+        """
+        Args:
+            lorebook: Character's lorebook dict (with "chunks")
+            lorebook_id: Precomputed lorebook_hash() (computed if omitted)
+        """
+        self.lorebook_hash = lorebook_id or lorebook_hash(lorebook)
+        self.companion_type = lorebook.get("companion_type", "friend")
+
+        # Deduplicate chunks by ID to prevent duplicates from accumulating
+        seen_ids = set()
+        unique_chunks = []
+        for chunk in lorebook.get("chunks", []):
+            chunk_id = chunk.get("id", "")
+            if chunk_id and chunk_id not in seen_ids:
+                seen_ids.add(chunk_id)
+                unique_chunks.append(chunk)
+            elif not chunk_id:
+                # Chunk has no ID, include it but log warning
+                unique_chunks.append(chunk)
+                logger.warning(f"Chunk without ID found: {chunk.get('category', 'unknown')}")
+
+        self.chunks: Tuple[Dict[str, Any], ...] = tuple(unique_chunks)
+        self.duplicates_removed = len(lorebook.get("chunks", [])) - len(unique_chunks)
+        if self.duplicates_removed:
+            logger.info(f"Deduplicated {self.duplicates_removed} duplicate chunks")
+
+        # emotion key -> rendered chunk (None if its tone and action are empty); None for old-style chunks
+        self.responses: Tuple[Optional[Dict[str, Optional[Dict[str, Any]]]], ...] = tuple(
+            self._render_responses(chunk) if "emotion_responses" in chunk else None
+            for chunk in self.chunks
+        )
+
+        self._partitions: Dict[str, Tuple[Tuple[int, ...], Tuple[int, ...]]] = {}
+
+        # Text embedded for semantic scoring (content + trigger keywords); "" for
+        # emotion_responses chunks, which are scored by emotion only
+        self.semantic_texts: Tuple[str, ...] = tuple(
+            "" if "emotion_responses" in chunk else self._semantic_text(chunk)
+            for chunk in self.chunks
+        )
+        # (chunk indices with text, their embedding matrix), built on first semantic use
+        self._semantic: Optional[Tuple[Tuple[int, ...], Any]] = None
+
+        # Inverted keyword index over the trigger keywords of old-style chunks
+        # (one entry per keyword occurrence, so repeated keywords count repeatedly)
+        self.keyword_chunks: Dict[str, List[int]] = {}
+        self._empty_keywords: Dict[int, int] = {}  # "" matches any text
+        for index, chunk in enumerate(self.chunks):
+            if "emotion_responses" in chunk:
+                continue  # scored by emotion only
+            for keyword in chunk.get("triggers", {}).get("keywords", []):
+                keyword_lower = keyword.lower()
+                if keyword_lower:
+                    self.keyword_chunks.setdefault(keyword_lower, []).append(index)
+                else:
+                    self._empty_keywords[index] = self._empty_keywords.get(index, 0) + 1
+
+        self._modifier_terms = {
+            "gentle": frozenset(GENTLE_WORDS),
+            "intense": frozenset(INTENSE_WORDS),
+            "affection": frozenset(AFFECTION_WORDS),
+        }
+        terms = sorted(set(self.keyword_chunks).union(GENTLE_WORDS, INTENSE_WORDS, AFFECTION_WORDS))
+        # Zero-width lookahead finds the longest term at every position; the
+        # shorter terms starting there are its term prefixes (see SafetyScanner)
+        self._term_regex = re.compile(f"(?=({trie_regex(terms)}))")
+        self._prefix_terms: Dict[str, Tuple[str, ...]] = {
+            term: tuple(other for other in terms if term.startswith(other))
+            for term in terms
+        }
+
+    def partition(self, companion_type: str) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """
+        Split the chunks for a companion type (computed once per type).
+
+        Returns:
+            Tuple of (always-include indices, candidate indices to score)
+        """
+        partition = self._partitions.get(companion_type)
+        if partition is not None:
+            return partition
+
+        always_include = []
+        candidates = []
+        filtered_count = 0
+        for index, chunk in enumerate(self.chunks):
+            # Filter out romantic/intimate chunks for platonic companions
+            if companion_type in PLATONIC_COMPANION_TYPES and chunk.get("category") in PLATONIC_EXCLUDED_CATEGORIES:
+                filtered_count += 1
+                continue
+
+            triggers = chunk.get("triggers", {})
+            allowed_types = triggers.get("companion_types", [])
+            if allowed_types and companion_type not in allowed_types:
+                # Restricted to other companion types
+                continue
+
+            # Universal templates and narrative control are always included
+            if triggers.get("always_check") or chunk.get("source") == "universal":
+                always_include.append(index)
+            else:
+                candidates.append(index)
+
+        if filtered_count > 0:
+            logger.info(
+                f"Filtered out {filtered_count} romantic/intimate chunks "
+                f"for platonic companion type '{companion_type}'"
+            )
+
+        partition = (tuple(always_include), tuple(candidates))
+        self._partitions[companion_type] = partition
+        return partition
+
+    @property
+    def semantic_ready(self) -> bool:
+        """Whether the chunk embeddings have been built"""
+        return self._semantic is not None
+
+    def semantic_index(self, embedder: Any) -> Tuple[Tuple[int, ...], Any]:
+        """
+        Chunk embeddings for semantic scoring (one encode batch, first call only).
+
+        Args:
+            embedder: Object with embed_texts(texts) -> unit-length row matrix (MemoryService)
+
+        Returns:
+            Tuple of (chunk indices, matrix with one row per index)
+        """
+        if self._semantic is None:
+            rows = tuple(index for index, text in enumerate(self.semantic_texts) if text)
+            matrix = embedder.embed_texts([self.semantic_texts[index] for index in rows]) if rows else None
+            self._semantic = (rows, matrix)
+            logger.debug(f"Embedded {len(rows)} lorebook chunks for semantic scoring")
+        return self._semantic
+
+    def find_terms(self, text: str) -> Set[str]:
+        """All indexed terms occurring in the text as substrings (text already lower-cased)."""
+        found = set()
+        for hit in self._term_regex.finditer(text):
+            found.update(self._prefix_terms[hit.group(1)])
+        return found
+
+    def turn_signals(self, message: str, context: str) -> TurnSignals:
+        """
+        Match the message and context once against every chunk's trigger keywords.
+
+        Args:
+            message: Lower-cased user message
+            context: Lower-cased conversation context
+
+        Returns:
+            TurnSignals with per-chunk keyword hit counts and the modifier flags
+        """
+        message_terms = self.find_terms(message)
+        context_terms = self.find_terms(context) - message_terms if context else set()
+
+        message_hits = dict(self._empty_keywords)
+        for term in message_terms:
+            for index in self.keyword_chunks.get(term, ()):
+                message_hits[index] = message_hits.get(index, 0) + 1
+
+        context_hits: Dict[int, int] = {}
+        for term in context_terms:
+            for index in self.keyword_chunks.get(term, ()):
+                context_hits[index] = context_hits.get(index, 0) + 1
+
+        return TurnSignals(
+            message_terms=frozenset(message_terms),
+            context_terms=frozenset(context_terms),
+            message_hits=message_hits,
+            context_hits=context_hits,
+            gentle=not message_terms.isdisjoint(self._modifier_terms["gentle"]),
+            intense=not message_terms.isdisjoint(self._modifier_terms["intense"]),
+            affection=not message_terms.isdisjoint(self._modifier_terms["affection"]),
+        )
+
+    def render(
+        self,
+        index: int,
+        emotion: str,
+        top_emotions: Optional[List[tuple]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Emotion-specific copy of a chunk.
+
+        Old-style chunks (pre-set content) are returned as they are. For
+        emotion_responses chunks the primary emotion is tried first, then the
+        top emotions in order, then "default".
+
+        Returns:
+            Chunk with content/tokens/priority for the emotion, or None if that
+            response has neither tone nor action
+        """
+        table = self.responses[index]
+        if table is None:
+            return self.chunks[index]
+
+        matched = None
+        if emotion in table:
+            matched = emotion
+        elif top_emotions:
+            for item in top_emotions:
+                if isinstance(item, dict):
+                    emo = item.get('label')
+                else:
+                    emo = item[0] if isinstance(item, tuple) else None
+
+                if emo and emo in table:
+                    matched = emo
+                    break
+
+        rendered = table.get(matched or "default")
+        return dict(rendered) if rendered is not None else None
+
+    @staticmethod
+    def _semantic_text(chunk: Dict[str, Any]) -> str:
+        """Content followed by the trigger keywords (either may be missing)"""
+        keywords = ", ".join(k for k in chunk.get("triggers", {}).get("keywords", []) if k)
+        return " ".join(part for part in (chunk.get("content", "").strip(), keywords) if part)
+
+    @staticmethod
+    def _render_responses(chunk: Dict[str, Any]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Render the chunk once per emotion key in its emotion_responses (plus "default")."""
+        emotion_responses = chunk["emotion_responses"]
+        default_response = emotion_responses.get("default", {})
+
+        table = {}
+        for key in set(emotion_responses) | {"default"}:
+            # An empty response falls back to the default one
+            response = emotion_responses.get(key) or default_response
+
+            tone = response.get("tone", "")
+            action = response.get("action", "")
+
+            # Blend tone and action into natural instruction without labels
+            # This prevents "**Tone:**" and "**Action:**" from leaking into LLM output
+            if tone and action:
+                content = f"{action} Use {tone} tone."
+            elif action:
+                content = action
+            elif tone:
+                content = f"Use {tone} tone."
+            else:
+                # Skip this chunk if both tone and action are empty
+                table[key] = None
+                continue
+
+            rendered = chunk.copy()
+            rendered["content"] = content
+            # Update tokens from emotion-specific response
+            rendered["tokens"] = response.get("tokens", chunk.get("tokens", 70))
+            # Priority is used for sorting/ordering, not displayed in content
+            if response.get("priority") is not None:
+                rendered["priority"] = response["priority"]
+            table[key] = rendered
+
+        return table
+
 
 class LorebookRetriever:
     """
@@ -16,21 +324,86 @@ class LorebookRetriever:
     - Detected emotion
     - Companion type
     - Conversation context
+    - Semantic similarity to the user message (when an embedder is given)
     """
 
-    def __init__(self, max_chunks: int = 2):
+    def __init__(
+        self,
+        max_chunks: int = 2,
+        compiled_cache_size: int = 8,
+        result_cache_size: int = 256,
+        embedder: Any = None,
+        semantic_weight: int = SEMANTIC_WEIGHT,
+        semantic_threshold: float = SEMANTIC_THRESHOLD
+    ):
         """
         Initialize retriever.
 
         Args:
             max_chunks: Maximum number of chunks to retrieve (excluding always_include)
+            compiled_cache_size: Compiled lorebooks kept (by content hash) for reuse across turns
+            result_cache_size: Memoised retrieve_for_turn results (0 disables)
+            embedder: Optional MemoryService (embed_texts/embed_query) for semantic scoring
+            semantic_weight: Points for a chunk with similarity 1.0
+            semantic_threshold: Minimum cosine similarity that scores
         """
         self.max_chunks = max_chunks
-        self.selected_tags = set()  # User-selected personality tags
+        self.compiled_cache_size = compiled_cache_size
+        self._compiled: "OrderedDict[str, CompiledLorebook]" = OrderedDict()
+        self.result_cache_size = result_cache_size
+        self._results: "OrderedDict[tuple, Tuple[Dict[str, Any], ...]]" = OrderedDict()
+        # Turn key (cheap inputs) -> result key, so a repeated turn skips keyword and semantic matching
+        self._turn_keys: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.result_hits = 0
+        self.result_misses = 0
+        # Last lorebook object seen: (lorebook, chunk count, compiled) - skips hashing when it's passed again
+        self._last_compiled: Optional[Tuple[Dict[str, Any], int, CompiledLorebook]] = None
+        self.embedder = embedder
+        self.semantic_weight = semantic_weight
+        self.semantic_threshold = semantic_threshold
+
+    @property
+    def semantic_enabled(self) -> bool:
+        """Whether semantic scoring runs (embedder given and its model loaded)"""
+        return self.embedder is not None and getattr(self.embedder, "initialized", False)
+
+    def compile(self, lorebook: Dict[str, Any]) -> CompiledLorebook:
+        """
+        Get the compiled form of a lorebook, reusing it while the content is unchanged.
+
+        Passing the same dict object again (with the same number of chunks)
+        reuses its compiled form directly; any other dict is looked up by
+        content hash. Edit a lorebook by replacing it, not by changing chunks
+        in place.
+
+        Args:
+            lorebook: Character's lorebook dict
+
+        Returns:
+            CompiledLorebook
+        """
+        chunk_count = len(lorebook.get("chunks", []))
+        last = self._last_compiled
+        if last is not None and last[0] is lorebook and last[1] == chunk_count:
+            return last[2]
+
+        key = lorebook_hash(lorebook)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self._compiled.move_to_end(key)
+        else:
+            compiled = CompiledLorebook(lorebook, lorebook_id=key)
+            if self.compiled_cache_size > 0:
+                self._compiled[key] = compiled
+                while len(self._compiled) > self.compiled_cache_size:
+                    self._compiled.popitem(last=False)
+
+        self._last_compiled = (lorebook, chunk_count, compiled)
+        return compiled
 
     def retrieve(
         self,
-        lorebook: Dict[str, Any],
+        lorebook: Union[Dict[str, Any], CompiledLorebook],
         user_message: str,
         emotion: str = 'neutral',
         companion_type: Optional[str] = None,
@@ -42,7 +415,7 @@ class LorebookRetriever:
         Retrieve relevant lorebook chunks for current context.
 
         Args:
-            lorebook: Character's lorebook dict
+            lorebook: Character's lorebook dict, or a CompiledLorebook
             user_message: Current user message
             emotion: Detected emotion (e.g., 'joy', 'sadness', 'anger') - primary emotion
             companion_type: Type of companion ('romantic', 'friend', etc.)
@@ -53,116 +426,233 @@ class LorebookRetriever:
         Returns:
             List of relevant chunks, sorted by priority
         """
-        # Store selected tags for use in scoring
-        if selected_tags:
-            self.selected_tags = selected_tags
-        if not lorebook or "chunks" not in lorebook:
-            logger.warning("Empty or invalid lorebook provided")
+        compiled = self._resolve(lorebook)
+        if compiled is None:
             return []
+        companion_type = companion_type or compiled.companion_type
 
-        # Deduplicate chunks by ID to prevent duplicates from accumulating
-        seen_ids = set()
-        unique_chunks = []
-        for chunk in lorebook["chunks"]:
-            chunk_id = chunk.get("id", "")
-            if chunk_id and chunk_id not in seen_ids:
-                seen_ids.add(chunk_id)
-                unique_chunks.append(chunk)
-            elif not chunk_id:
-                # Chunk has no ID, include it but log warning
-                unique_chunks.append(chunk)
-                logger.warning(f"Chunk without ID found: {chunk.get('category', 'unknown')}")
-
-        all_chunks = unique_chunks
-        companion_type = companion_type or lorebook.get("companion_type", "friend")
+        # Normalize user message and history context for matching
+        message_lower = user_message.lower()
+        context_text = self._build_context_text(conversation_history)
 
-        if len(lorebook["chunks"]) > len(all_chunks):
-            logger.info(f"Deduplicated {len(lorebook['chunks']) - len(all_chunks)} duplicate chunks")
+        # Keywords and modifiers are matched once for all chunks
+        signals = compiled.turn_signals(message_lower, context_text)
 
-        logger.debug(
-            f"Retrieving from {len(all_chunks)} chunks | "
-            f"emotion={emotion} | companion={companion_type}"
+        return self._select(
+            compiled, signals, self._semantic_hits(compiled, user_message), len(message_lower.split()) > 30,
+            emotion, companion_type, top_emotions, selected_tags or set()
         )
 
-        # Filter out romantic/intimate chunks for platonic companions
-        platonic_types = ["friend", "platonic", "companion"]
-        excluded_categories = ["love_language", "physical_intimacy"]
-
-        if companion_type in platonic_types:
-            original_count = len(all_chunks)
-            all_chunks = [
-                chunk for chunk in all_chunks
-                if chunk.get("category") not in excluded_categories
-            ]
-            filtered_count = original_count - len(all_chunks)
-            if filtered_count > 0:
-                logger.info(
-                    f"Filtered out {filtered_count} romantic/intimate chunks "
-                    f"for platonic companion type '{companion_type}'"
-                )
-
-        # Normalize user message for matching
-        message_lower = user_message.lower()
+    def retrieve_for_turn(
+        self,
+        lorebook: Union[Dict[str, Any], CompiledLorebook],
+        user_message: str,
+        emotion: str = 'neutral',
+        companion_type: Optional[str] = None,
+        conversation_history: Optional[List[Dict]] = None,
+        top_emotions: Optional[List[tuple]] = None,
+        selected_tags: Optional[Set[str]] = None,
+        token_budget: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Memoised retrieval for the prompt path.
+
+        Top-emotion confidences are bucketed to one decimal and scored as
+        bucketed, so the result depends only on (lorebook hash, companion type,
+        emotion, top-emotion bucket, matched keyword set, semantic points,
+        long-message flag, selected tags, budget).
+
+        The lookup is in two steps. A turn key built from the cheap inputs
+        (hashes of the message and history context instead of their matches) is
+        checked first; a repeated turn returns without keyword matching or an
+        embedding call. Otherwise the keyword and semantic passes run, and the
+        result key lets a different message with the same matches skip scoring
+        and rendering.
 
-        # Build context from conversation history
+        Args:
+            lorebook: Character's lorebook dict, or a CompiledLorebook
+            user_message: Current user message
+            emotion: Primary detected emotion
+            companion_type: Companion type (defaults to the lorebook's)
+            conversation_history: Recent conversation history
+            top_emotions: (emotion, confidence) tuples or {'label', 'score'} dicts
+            selected_tags: Tag chunk IDs allowed to score (requires_selection chunks)
+            token_budget: Maximum total chunk tokens (None = unlimited)
+
+        Returns:
+            List of chunks, sorted by priority and within the budget
+        """
+        compiled = self._resolve(lorebook)
+        if compiled is None:
+            return []
+        companion_type = companion_type or compiled.companion_type
+        selected = frozenset(selected_tags or ())
         context_text = self._build_context_text(conversation_history)
+        top_bucket = self.bucket_top_emotions(top_emotions)
 
-        # 1. Get always-include chunks (universal templates and narrative control)
-        # Filter by companion_type if specified in chunk triggers
-        always_include = []
-        for chunk in all_chunks:
-            triggers = chunk.get("triggers", {})
+        turn_text = f"{user_message}\x00{context_text}".encode("utf-8")
+        turn_key = (
+            compiled.lorebook_hash, companion_type, emotion, top_bucket,
+            hashlib.sha1(turn_text).hexdigest(), self.semantic_enabled, selected, token_budget
+        )
+        key = self._turn_keys.get(turn_key)
+        cached = self._results.get(key) if key is not None else None
+        if cached is None:
+            message_lower = user_message.lower()
+            signals = compiled.turn_signals(message_lower, context_text)
+            semantic_hits = self._semantic_hits(compiled, user_message)
+            long_message = len(message_lower.split()) > 30
+
+            key = (
+                compiled.lorebook_hash, companion_type, emotion, top_bucket,
+                signals.message_terms, signals.context_terms, tuple(sorted(semantic_hits.items())),
+                long_message, selected, token_budget
+            )
+            cached = self._results.get(key)
+            if self.result_cache_size > 0:
+                self._turn_keys[turn_key] = key
+                while len(self._turn_keys) > self.result_cache_size:
+                    self._turn_keys.popitem(last=False)
+        else:
+            self._turn_keys.move_to_end(turn_key)
+
+        if cached is not None:
+            self._results.move_to_end(key)
+            self.result_hits += 1
+            logger.debug(f"Lorebook retrieval cache hit ({len(cached)} chunks)")
+            return [dict(chunk) for chunk in cached]
+        self.result_misses += 1
+
+        chunks = self._select(
+            compiled, signals, semantic_hits, long_message, emotion, companion_type, list(top_bucket) or None, selected
+        )
+        if token_budget is not None:
+            chunks = self.fit_token_budget(chunks, token_budget)
+
+        if self.result_cache_size > 0:
+            self._results[key] = tuple(dict(chunk) for chunk in chunks)
+            while len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
+        return chunks
+
+    @staticmethod
+    def bucket_top_emotions(top_emotions: Optional[List[Any]], limit: int = 3) -> Tuple[Tuple[str, float], ...]:
+        """Top emotions as (label, confidence rounded to 0.1) tuples, at most `limit`."""
+        bucket = []
+        for item in (top_emotions or [])[:limit]:
+            if isinstance(item, dict):
+                label, confidence = item.get('label'), item.get('score', 1.0)
+            else:
+                label, confidence = item
+            if label:
+                bucket.append((label, round(float(confidence), 1)))
+        return tuple(bucket)
 
-            # Check if this chunk should always be included
-            if triggers.get("always_check") or chunk.get("source") == "universal":
-                # Check if companion_type filtering applies
-                allowed_types = triggers.get("companion_types", [])
+    @staticmethod
+    def fit_token_budget(chunks: List[Dict[str, Any]], token_budget: int) -> List[Dict[str, Any]]:
+        """
+        Keep chunks in order (highest priority first) while they fit the budget.
 
-                if allowed_types:
-                    # Only include if companion_type matches
-                    if companion_type in allowed_types:
-                        always_include.append(chunk)
-                else:
-                    # No companion_type filter - always include
-                    always_include.append(chunk)
+        A chunk that doesn't fit is skipped, so a smaller lower-priority chunk can still be used.
+        """
+        kept = []
+        used = 0
+        for chunk in chunks:
+            tokens = chunk.get("tokens", 100)
+            if used + tokens <= token_budget:
+                kept.append(chunk)
+                used += tokens
+        if len(kept) < len(chunks):
+            logger.debug(f"Lorebook budget {token_budget} tokens: kept {len(kept)}/{len(chunks)} chunks")
+        return kept
+
+    def _resolve(self, lorebook: Union[Dict[str, Any], CompiledLorebook]) -> Optional[CompiledLorebook]:
+        """Compiled form of a lorebook argument, or None if it's empty/invalid"""
+        if isinstance(lorebook, CompiledLorebook):
+            return lorebook
+        if not lorebook or "chunks" not in lorebook:
+            logger.warning("Empty or invalid lorebook provided")
+            return None
+        return self.compile(lorebook)
 
-        # 2. Score all other chunks
-        scored_chunks = []
-        for chunk in all_chunks:
-            if chunk in always_include:
-                continue  # Skip already included
+    def _semantic_hits(self, compiled: CompiledLorebook, user_message: str) -> Dict[int, int]:
+        """
+        Semantic points per chunk for this message (chunks below the threshold are left out).
 
-            # Check companion_type filter BEFORE scoring
-            triggers = chunk.get("triggers", {})
-            allowed_types = triggers.get("companion_types", [])
-            if allowed_types and companion_type not in allowed_types:
-                # This chunk is restricted to specific companion types and current type doesn't match
-                continue
+        All chunk embeddings are scored with one matrix-vector product; the rows
+        are unit length, so the product is the cosine similarity.
+        """
+        if not self.semantic_enabled or not user_message or not user_message.strip():
+            return {}
+
+        try:
+            rows, matrix = compiled.semantic_index(self.embedder)
+            if not rows:
+                return {}
+            similarities = matrix @ self.embedder.embed_query(user_message)
+        except Exception as e:
+            logger.warning(f"⚠️ Semantic lorebook scoring failed, using keywords only: {e}")
+            return {}
+
+        hits = {}
+        for row in (similarities >= self.semantic_threshold).nonzero()[0].tolist():
+            points = int(self.semantic_weight * float(similarities[row]))
+            if points > 0:
+                hits[rows[row]] = points
+        return hits
+
+    def _select(
+        self,
+        compiled: CompiledLorebook,
+        signals: TurnSignals,
+        semantic_hits: Dict[int, int],
+        long_message: bool,
+        emotion: str,
+        companion_type: str,
+        top_emotions: Optional[List[tuple]],
+        selected_tags: Set[str]
+    ) -> List[Dict[str, Any]]:
+        """Score the candidates, pick the top chunks and render them for the emotion"""
+        chunks = compiled.chunks
+
+        logger.debug(
+            f"Retrieving from {len(chunks)} chunks | "
+            f"emotion={emotion} | companion={companion_type}"
+        )
 
+        # 1. Always-include chunks and scoring candidates (precomputed per companion type)
+        always_include, candidates = compiled.partition(companion_type)
+
+        # 2. Score the candidate chunks
+        scored_chunks = []
+        for index in candidates:
             score = self._score_chunk(
-                chunk=chunk,
-                message=message_lower,
-                context=context_text,
+                chunk=chunks[index],
+                keyword_hits=(signals.message_hits.get(index, 0), signals.context_hits.get(index, 0)),
+                signals=signals,
+                semantic_points=semantic_hits.get(index, 0),
                 emotion=emotion,
                 companion_type=companion_type,
-                top_emotions=top_emotions
+                top_emotions=top_emotions,
+                long_message=long_message,
+                selected_tags=selected_tags
             )
 
             if score > 0:
-                scored_chunks.append((score, chunk))
+                scored_chunks.append((score, index))
 
         # 3. Sort by score (descending), then priority (descending)
-        scored_chunks.sort(key=lambda x: (x[0], x[1]["priority"]), reverse=True)
+        scored_chunks.sort(key=lambda x: (x[0], chunks[x[1]]["priority"]), reverse=True)
 
         # 4. Take top N chunks
-        selected_chunks = [chunk for score, chunk in scored_chunks[:self.max_chunks]]
+        selected_chunks = [index for score, index in scored_chunks[:self.max_chunks]]
 
         # 5. Combine always_include + selected, sort by priority
-        final_chunks = always_include + selected_chunks
-        final_chunks.sort(key=lambda x: x["priority"], reverse=True)
+        final_chunks = list(always_include) + selected_chunks
+        final_chunks.sort(key=lambda index: chunks[index]["priority"], reverse=True)
 
         # Calculate total tokens
-        total_tokens = sum(c.get("tokens", 100) for c in final_chunks)
+        total_tokens = sum(chunks[index].get("tokens", 100) for index in final_chunks)
 
         logger.info(
             f"✅ Retrieved {len(final_chunks)} chunks "
@@ -171,25 +661,26 @@ class LorebookRetriever:
         )
 
         # Process new-style emotion-response chunks
-        processed_chunks = self._process_emotion_response_chunks(
+        return self._process_emotion_response_chunks(
+            compiled,
             final_chunks,
             emotion,
             top_emotions
         )
 
-        return processed_chunks
-
     def _process_emotion_response_chunks(
         self,
-        chunks: List[Dict[str, Any]],
+        compiled: CompiledLorebook,
+        indices: List[int],
         emotion: str,
         top_emotions: Optional[List[tuple]] = None
     ) -> List[Dict[str, Any]]:
         """
-        Process chunks with emotion_responses format to generate emotion-specific content.
+        Render chunks with emotion_responses format into emotion-specific content.
 
         Args:
-            chunks: List of chunks to process
+            compiled: Compiled lorebook holding the per-emotion renderings
+            indices: Indices of the chunks to process
             emotion: Primary detected emotion
             top_emotions: List of top emotions with confidence scores
 
@@ -198,85 +689,12 @@ class LorebookRetriever:
         """
         processed = []
 
-        for chunk in chunks:
-            # Check if this is a new-style chunk with emotion_responses
-            if "emotion_responses" in chunk:
-                emotion_responses = chunk["emotion_responses"]
-
-                # Try to find the best matching emotion response
-                matched_emotion = None
-                matched_response = None
-
-                # First, try exact match with primary emotion
-                if emotion in emotion_responses:
-                    matched_emotion = emotion
-                    matched_response = emotion_responses[emotion]
-                # Then try top_emotions if available
-                elif top_emotions:
-                    for item in top_emotions:
-                        if isinstance(item, dict):
-                            emo = item.get('label')
-                        else:
-                            emo = item[0] if isinstance(item, tuple) else None
-
-                        if emo and emo in emotion_responses:
-                            matched_emotion = emo
-                            matched_response = emotion_responses[emo]
-                            break
-
-                # Fallback to default
-                if not matched_response:
-                    matched_response = emotion_responses.get("default", {})
-                    matched_emotion = "default"
-
-                # Create new chunk with formatted content
-                new_chunk = chunk.copy()
-
-                # Format content from tone + action
-                tone = matched_response.get("tone", "")
-                action = matched_response.get("action", "")
-                emotion_priority = matched_response.get("priority", None)
-
-                # Blend tone and action into natural instruction without labels
-                # This prevents "**Tone:**" and "**Action:**" from leaking into LLM output
-                content_parts = []
-
-                if tone and action:
-                    # Combine both into a single flowing instruction
-                    content_parts.append(f"{action} Use {tone} tone.")
-                elif action:
-                    # Action only
-                    content_parts.append(action)
-                elif tone:
-                    # Tone only
-                    content_parts.append(f"Use {tone} tone.")
-
-                # Skip this chunk if both tone and action are empty
-                if not content_parts:
-                    logger.debug(f"Skipping '{chunk['id']}' - empty tone and action for emotion '{matched_emotion}'")
-                    continue
-
-                content = " ".join(content_parts)
-                new_chunk["content"] = content
-
-                # Update tokens from emotion-specific response
-                new_chunk["tokens"] = matched_response.get("tokens", chunk.get("tokens", 70))
-
-                # Update priority from emotion-specific response if provided
-                # Priority is used for sorting/ordering, not displayed in content
-                if emotion_priority is not None:
-                    new_chunk["priority"] = emotion_priority
-                    logger.debug(f"Updated priority for '{chunk['id']}' to {emotion_priority} based on emotion '{matched_emotion}'")
-
-                logger.debug(
-                    f"Processed '{chunk['id']}' with emotion '{matched_emotion}': "
-                    f"tone='{tone[:30]}...', action='{action[:30]}...'"
-                )
-
-                processed.append(new_chunk)
-            else:
-                # Old-style chunk with pre-set content
-                processed.append(chunk)
+        for index in indices:
+            rendered = compiled.render(index, emotion, top_emotions)
+            if rendered is None:
+                logger.debug(f"Skipping '{compiled.chunks[index].get('id')}' - empty tone and action for emotion '{emotion}'")
+                continue
+            processed.append(rendered)
 
         # Combine personality trait chunks into unified instructions
         combined = self._combine_personality_chunks(processed, emotion)
@@ -404,22 +822,28 @@ class LorebookRetriever:
     def _score_chunk(
         self,
         chunk: Dict[str, Any],
-        message: str,
-        context: str,
+        keyword_hits: Tuple[int, int],
+        signals: TurnSignals,
         emotion: str,
         companion_type: str,
-        top_emotions: Optional[List[tuple]] = None
+        top_emotions: Optional[List[tuple]] = None,
+        long_message: bool = False,
+        selected_tags: Optional[Set[str]] = None,
+        semantic_points: int = 0
     ) -> int:
         """
         Score a chunk's relevance to current context.
 
         Args:
             chunk: Chunk to score
-            message: Normalized user message
-            context: Normalized conversation context
+            keyword_hits: (keywords found in the message, keywords found only in the context)
+            signals: This turn's modifier flags (gentle / intense / affection)
             emotion: Current emotion (primary)
             companion_type: Companion type
             top_emotions: Optional list of (emotion, confidence) tuples for blended matching
+            long_message: User message has more than 30 words
+            selected_tags: Tag chunk IDs the user selected (requires_selection chunks)
+            semantic_points: Points from the chunk's similarity to the message (keyword chunks only)
 
         Returns:
             Relevance score (0 = not relevant, higher = more relevant)
@@ -432,7 +856,7 @@ class LorebookRetriever:
 
         if requires_selection:
             # Only score this chunk if user has selected it
-            if chunk_id not in self.selected_tags:
+            if chunk_id not in (selected_tags or ()):
                 logger.debug(f"Chunk '{chunk_id}' requires selection but not selected - skipping")
                 return 0  # Not selected, don't include
             else:
@@ -472,44 +896,37 @@ class LorebookRetriever:
         # OLD-STYLE CHUNK LOGIC (with triggers)
         triggers = chunk.get("triggers", {})
 
-        # Detect intensity/tone modifiers in the message
-        gentle_words = ["soft", "gentle", "tender", "sweet", "light", "subtle", "quiet", "calm", "peaceful", "morning"]
-        intense_words = ["passionate", "hard", "deep", "intense", "urgent", "desperately", "need", "crave", "hunger"]
-
-        is_gentle_context = any(word in message for word in gentle_words)
-        is_intense_context = any(word in message for word in intense_words)
+        is_gentle_context = signals.gentle
+        is_intense_context = signals.intense
 
         # 1. Keyword matching (context-aware weight)
-        keywords = triggers.get("keywords", [])
-        if keywords:
-            matched_keywords = 0
-            for keyword in keywords:
-                keyword_lower = keyword.lower()
-                # Check in message (higher weight)
-                if keyword_lower in message:
-                    matched_keywords += 2
-                    base_score = 20
-
-                    # CONTEXT DAMPENING: Reduce score for high-intensity chunks in gentle contexts
-                    chunk_id = chunk.get("id", "")
-                    if is_gentle_context and any(term in chunk_id for term in ["dominant", "aggressive", "intense", "sexual"]):
-                        base_score = 5  # Heavily dampen aggressive chunks
-                        logger.debug(f"Chunk '{chunk_id}': Dampened to {base_score} (gentle context detected)")
-                    elif not is_intense_context and "sexual" in chunk_id:
-                        base_score = 8  # Moderate dampening for sexual chunks without intense context
-                        logger.debug(f"Chunk '{chunk_id}': Dampened to {base_score} (no intense context)")
-
-                    score += base_score
-                # Check in context (lower weight)
-                elif keyword_lower in context:
-                    matched_keywords += 1
-                    score += 5
-
-            if matched_keywords > 0:
-                logger.debug(
-                    f"Chunk '{chunk['id']}': +{score} points "
-                    f"({matched_keywords} keyword matches)"
-                )
+        message_matches, context_matches = keyword_hits
+        if message_matches:
+            base_score = 20
+
+            # CONTEXT DAMPENING: Reduce score for high-intensity chunks in gentle contexts
+            chunk_id = chunk.get("id", "")
+            if is_gentle_context and any(term in chunk_id for term in ["dominant", "aggressive", "intense", "sexual"]):
+                base_score = 5  # Heavily dampen aggressive chunks
+                logger.debug(f"Chunk '{chunk_id}': Dampened to {base_score} (gentle context detected)")
+            elif not is_intense_context and "sexual" in chunk_id:
+                base_score = 8  # Moderate dampening for sexual chunks without intense context
+                logger.debug(f"Chunk '{chunk_id}': Dampened to {base_score} (no intense context)")
+
+            # Keywords in the message weigh more than keywords in the context
+            score += base_score * message_matches
+        score += 5 * context_matches
+
+        if message_matches or context_matches:
+            logger.debug(
+                f"Chunk '{chunk['id']}': +{score} points "
+                f"({2 * message_matches + context_matches} keyword matches)"
+            )
+
+        # Semantic similarity catches paraphrases the keywords miss
+        if semantic_points:
+            score += semantic_points
+            logger.debug(f"Chunk '{chunk['id']}': +{semantic_points} points (semantic match)")
 
         # 2. Emotion matching (high weight - blended from top 3 emotions)
         trigger_emotions = triggers.get("emotions", [])
@@ -550,13 +967,13 @@ class LorebookRetriever:
         category = chunk.get("category")
         if category == "boundary":
             score += 3  # Always favor boundaries
-        elif category == "affection" and any(kw in message for kw in ["touch", "hug", "kiss", "hold"]):
+        elif category == "affection" and signals.affection:
             # Boost affection chunks in gentle contexts
             if is_gentle_context:
                 score += 10  # Prefer tender affection
             else:
                 score += 5
-        elif category == "communication" and len(message.split()) > 30:
+        elif category == "communication" and long_message:
             score += 3  # Long messages may need communication guidance
 
         return score
@@ -579,7 +996,7 @@ class LorebookRetriever:
 
         # Get last 3 messages
         recent = conversation_history[-3:]
-        context_parts = [msg.get("content", "") for msg in recent if "content" in msg]
+        context_parts = [msg.get("content") or msg.get("text", "") for msg in recent if "content" in msg or "text" in msg]
 
         return " ".join(context_parts).lower()
 
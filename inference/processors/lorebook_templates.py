@@ -22,7 +22,19 @@ Each CHARACTER trait has emotion-specific responses:
 - tone: How the CHARACTER should sound/speak when USER feels this emotion
 - action: What behaviors the CHARACTER should exhibit when USER feels this emotion
 """
-from typing import Dict, Any, List
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, NamedTuple, Optional, Tuple
+
+
+class _TemplateIndex(NamedTuple):
+    """Read-only lookup tables over TEMPLATES (built once at import)"""
+    by_ui_tag: Mapping[str, Dict[str, Any]]  # ui_tag -> first declared template with that tag
+    by_category_tag: Mapping[Tuple[str, str], Dict[str, Any]]  # (category, ui_tag) -> template
+    by_category: Mapping[str, Tuple[Dict[str, Any], ...]]
+    by_directive: Mapping[str, Tuple[Dict[str, Any], ...]]
+    ui_tags_by_category: Mapping[str, Tuple[str, ...]]
 
 
 class LorebookTemplates:
@@ -1538,6 +1550,9 @@ class LorebookTemplates:
         },
     }
 
+    # Lookup tables over TEMPLATES, built once at import (see _build_index)
+    _index: _TemplateIndex
+
     @classmethod
     def get_template(cls, template_id: str) -> Dict[str, Any]:
         """Get a specific template by ID."""
@@ -1545,34 +1560,48 @@ class LorebookTemplates:
 
     @classmethod
     def get_templates_by_category(cls, category: str) -> List[Dict[str, Any]]:
-        """Get all templates in a category."""
-        return [t for t in cls.TEMPLATES.values() if t.get("category") == category]
+        """Get all templates in a category (template key or UI name, e.g. "Humor & Edge")."""
+        return list(cls._index.by_category.get(cls.normalize_category(category), ()))
 
     @classmethod
     def get_templates_by_directive(cls, directive: str) -> List[Dict[str, Any]]:
         """Get all templates that map to a specific dialogue directive."""
-        return [t for t in cls.TEMPLATES.values() if t.get("directive") == directive]
+        return list(cls._index.by_directive.get(directive, ()))
 
     @classmethod
     def get_all_ui_tags(cls) -> Dict[str, List[str]]:
         """Get all UI tags organized by category."""
-        result = {}
-        for template in cls.TEMPLATES.values():
-            category = template.get("category", "unknown")
-            ui_tag = template.get("ui_tag", "")
-            if category not in result:
-                result[category] = []
-            if ui_tag and ui_tag not in result[category]:
-                result[category].append(ui_tag)
-        return result
+        return {category: list(tags) for category, tags in cls._index.ui_tags_by_category.items()}
 
     @classmethod
-    def get_template_by_ui_tag(cls, ui_tag: str) -> Dict[str, Any]:
-        """Find template by its UI tag."""
-        for template in cls.TEMPLATES.values():
-            if template.get("ui_tag") == ui_tag:
+    def get_template_by_ui_tag(cls, ui_tag: str, category: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Find template by its UI tag.
+
+        Some tags exist in several categories ("Reserved", "Friendly",
+        "Passionate"). With a category the template from that category is
+        returned; without one (or if the tag isn't in that category) the
+        first declared template with the tag wins.
+
+        Args:
+            ui_tag: UI tag name (e.g., "Warm", "Reserved")
+            category: Optional category - template key ("platonic_touch") or
+                      UI name ("Platonic Touch")
+
+        Returns:
+            Template dict, or {} if no template has the tag
+        """
+        if category:
+            template = cls._index.by_category_tag.get((cls.normalize_category(category), ui_tag))
+            if template is not None:
                 return template
-        return {}
+        return cls._index.by_ui_tag.get(ui_tag, {})
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def normalize_category(category: str) -> str:
+        """Map a UI category name ("Energy & Presence") to its template key ("energy_presence")."""
+        return "_".join(re.findall(r"[a-z0-9]+", category.lower()))
 
     @classmethod
     def get_directive_mapping(cls) -> Dict[str, List[str]]:
@@ -1591,3 +1620,41 @@ class LorebookTemplates:
             "platonic_boundaries": ["friendship_dynamic", "platonic_touch"],
             "context": ["lifestyle_interests"]
         }
+
+
+def _build_index(templates: Dict[str, Dict[str, Any]]) -> _TemplateIndex:
+    """Build the lookup tables in TEMPLATES declaration order."""
+    by_ui_tag: Dict[str, Dict[str, Any]] = {}
+    by_category_tag: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    by_category: Dict[str, List[Dict[str, Any]]] = {}
+    by_directive: Dict[str, List[Dict[str, Any]]] = {}
+    ui_tags_by_category: Dict[str, List[str]] = {}
+
+    for template in templates.values():
+        category = template.get("category", "unknown")
+        ui_tag = template.get("ui_tag", "")
+
+        by_category.setdefault(category, []).append(template)
+        if template.get("directive"):
+            by_directive.setdefault(template["directive"], []).append(template)
+
+        tags = ui_tags_by_category.setdefault(category, [])
+        if ui_tag:
+            by_ui_tag.setdefault(ui_tag, template)
+            by_category_tag.setdefault((category, ui_tag), template)
+            if ui_tag not in tags:
+                tags.append(ui_tag)
+
+    def frozen(groups: Dict[str, List[Any]]) -> Mapping[str, Tuple[Any, ...]]:
+        return MappingProxyType({key: tuple(values) for key, values in groups.items()})
+
+    return _TemplateIndex(
+        by_ui_tag=MappingProxyType(by_ui_tag),
+        by_category_tag=MappingProxyType(by_category_tag),
+        by_category=frozen(by_category),
+        by_directive=frozen(by_directive),
+        ui_tags_by_category=frozen(ui_tags_by_category),
+    )
+
+
+LorebookTemplates._index = _build_index(LorebookTemplates.TEMPLATES)
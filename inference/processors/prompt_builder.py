@@ -6,9 +6,10 @@ import logging
 import re
 from datetime import datetime
 import pytz
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Tuple
 
 from .lorebook_templates import LorebookTemplates
+from .lorebook_retriever import LorebookRetriever
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,9 @@ class PromptBuilder:
         character_setting: str = "",
         character_goal: str = "",
         character_status: str = "",
+        lorebook: Optional[Dict[str, Any]] = None,
+        lorebook_retriever: Optional[LorebookRetriever] = None,
+        lorebook_token_budget: int = 300,
         **kwargs  # Accept any other params for backward compatibility but ignore them
     ):
         # Character info
@@ -73,6 +77,12 @@ class PromptBuilder:
         self.companion_type = companion_type
         self.personality_tags = personality_tags or {}
 
+        # Lorebook chunks retrieved per turn (custom, keyword and universal chunks;
+        # personality tag templates are rendered by the DIALOGUE STYLE section)
+        self.lorebook = lorebook or {}
+        self.lorebook_retriever = lorebook_retriever
+        self.lorebook_token_budget = lorebook_token_budget
+
         # Response cleaner patterns
         self.avoid_words = avoid_words or []
         self.avoid_patterns = [re.compile(re.escape(p), re.IGNORECASE) for p in self.avoid_words]
@@ -433,11 +443,11 @@ class PromptBuilder:
         if not self.personality_tags:
             return ""
 
-        # Collect all selected UI tags from personality_tags
+        # Collect all selected UI tags (with their category, which disambiguates shared tags)
         all_selected_tags = []
         for category, tags in self.personality_tags.items():
             if isinstance(tags, list):
-                all_selected_tags.extend(tags)
+                all_selected_tags.extend((tag, category) for tag in tags)
 
         if not all_selected_tags:
             return ""
@@ -454,8 +464,8 @@ class PromptBuilder:
         }
 
         # Look up each selected tag in LorebookTemplates
-        for ui_tag in all_selected_tags:
-            template = LorebookTemplates.get_template_by_ui_tag(ui_tag)
+        for ui_tag, category in all_selected_tags:
+            template = LorebookTemplates.get_template_by_ui_tag(ui_tag, category)
             if not template:
                 continue
 
@@ -528,6 +538,52 @@ class PromptBuilder:
         return "\n".join(lines)
 
 
+    def _build_lorebook_context(
+        self,
+        text: str,
+        conversation_history: List[Dict],
+        emotion_data: Optional[Dict] = None
+    ) -> str:
+        """Build ACTIVE CONTEXT section from the lorebook chunks relevant to this turn.
+
+        Args:
+            text: USER's message
+            conversation_history: Recent conversation history
+            emotion_data: USER's detected emotion (emotion, scores)
+
+        Returns:
+            Formatted section, or empty string if no lorebook or nothing was retrieved
+        """
+        if not self.lorebook.get("chunks") or self.lorebook_retriever is None:
+            return ""
+
+        emotion = "neutral"
+        top_emotions = None
+        if emotion_data:
+            emotion = emotion_data.get("emotion") or "neutral"
+            scores = emotion_data.get("scores")
+            if isinstance(scores, dict) and scores:
+                top_emotions = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:3]
+
+        try:
+            chunks = self.lorebook_retriever.retrieve_for_turn(
+                self.lorebook,
+                text,
+                emotion=emotion,
+                companion_type=self.companion_type,
+                conversation_history=conversation_history,
+                top_emotions=top_emotions,
+                token_budget=self.lorebook_token_budget
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Lorebook retrieval failed, continuing without it: {e}")
+            return ""
+
+        formatted = self.lorebook_retriever.format_chunks_for_prompt(chunks)
+        if not formatted:
+            return ""
+        return f"**[ACTIVE CONTEXT]**\n{formatted}"
+
     def _build_kairos_instructions(self) -> str:
         """Build Kairos-specific wellness instructions."""
         if self.character_name.lower() != 'kairos':
@@ -611,6 +667,7 @@ Example format: "{example}"
         # Build the main sections
         character_card = self._build_character_card()
         dialogue_style = self._build_dialogue_style(emotion=emotion)
+        lorebook_context = self._build_lorebook_context(text, conversation_history, emotion_data)
         player_profile = self._build_player_profile()
         scene_brief = self._build_scene_brief(emotion_data)
 
@@ -637,6 +694,13 @@ Example format: "{example}"
             parts.append("---")
             parts.append("")
 
+        # ACTIVE CONTEXT section (lorebook chunks retrieved for this turn)
+        if lorebook_context:
+            parts.append(lorebook_context)
+            parts.append("")
+            parts.append("---")
+            parts.append("")
+
         # PLAYER PROFILE section
         parts.append(player_profile)
         parts.append("")
@@ -1,13 +1,177 @@
 """
 Response Cleaner
 Handles all text cleaning and post-processing of LLM outputs
+
+All patterns are compiled once at import time and applied as an ordered
+pipeline (ResponseCleaner.STAGES). Rules that depend on the character and
+user names are compiled once per (character, user) pair and cached; avoid
+words are compiled into a single matcher cached by the normalised list.
 """
 import re
+import hashlib
 import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import NamedTuple, Optional, Pattern, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+def _sub(pattern: Pattern, repl='', marker: str = None):
+    """
+    Build a pipeline stage that applies a precompiled substitution.
+
+    Args:
+        pattern: Compiled regex pattern
+        repl: Replacement string or function
+        marker: Optional substring the pattern cannot match without;
+                the regex is skipped entirely when it is absent
+
+    Returns:
+        Stage callable taking (cleaner, text)
+    """
+    if marker is None:
+        def stage(cleaner, text: str) -> str:
+            return pattern.sub(repl, text)
+    else:
+        def stage(cleaner, text: str) -> str:
+            if marker not in text:
+                return text
+            return pattern.sub(repl, text)
+    return stage
+
+
+class TurnMarkers(NamedTuple):
+    """Name-dependent turn boundary rules for one (character, user) pair"""
+    character_prefix: str
+    user_prefix: str
+    boundaries: Tuple[str, ...]
+    user_transition: Pattern
+    character_transition: Pattern
+    user_inline: str
+    character_inline: str
+
+
+@lru_cache(maxsize=128)
+def compile_turn_markers(character_name: str, user_name: str) -> TurnMarkers:
+    """
+    Compile turn marker rules for a character/user pair (cached).
+
+    Args:
+        character_name: Name of the character
+        user_name: Name of the user
+
+    Returns:
+        TurnMarkers with prebuilt prefixes, boundaries and transition patterns
+    """
+    return TurnMarkers(
+        character_prefix=f"{character_name}:",
+        user_prefix=f"{user_name}:",
+        boundaries=(
+            f"\n{user_name}:",
+            f"\n{character_name}:",
+            "\nUser:",
+            "\nHuman:"
+        ),
+        # ". Name:" or "? Name:" or "! Name:" - these indicate turn switches
+        user_transition=re.compile(rf'[.!?]\s*{re.escape(user_name)}:\s', re.IGNORECASE),
+        character_transition=re.compile(rf'[.!?]\s*{re.escape(character_name)}:\s', re.IGNORECASE),
+        user_inline=f" {user_name}:",
+        character_inline=f" {character_name}:"
+    )
+
+
+class AvoidWordMatcher(NamedTuple):
+    """Single compiled matcher for a character's avoid words/phrases"""
+    key: str
+    pattern: Optional[Pattern]
+    max_length: int
+
+
+# Compiled avoid-word matchers by hash of the normalised list (least recently used first)
+_AVOID_MATCHER_CACHE: "OrderedDict[str, AvoidWordMatcher]" = OrderedDict()
+_AVOID_MATCHER_CACHE_SIZE = 128
+
+
+def normalize_avoid_words(avoid_words: Optional[list]) -> Tuple[str, ...]:
+    """
+    Normalise an avoid list: trimmed, lowercased (matching ignores case), de-duplicated,
+    longest first so the combined alternation prefers the longest phrase.
+
+    Args:
+        avoid_words: Raw list of words/phrases
+
+    Returns:
+        Tuple of normalised phrases
+    """
+    phrases = {word.strip().lower() for word in avoid_words or [] if word and word.strip()}
+    return tuple(sorted(phrases, key=lambda phrase: (-len(phrase), phrase)))
+
+
+def _phrase_trie_regex(phrases: Tuple[str, ...]) -> str:
+    """
+    Build a prefix-factored alternation for phrases.
+
+    Longer continuations are tried before a phrase ends, so at any position the
+    longest matching phrase wins. A phrase starting/ending with a letter or digit
+    must sit on a word boundary at that edge.
+    """
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: dict, last_char: str) -> str:
+        branches = [re.escape(char) + render(child, char) for char, child in sorted(node.items()) if char]
+        if "" in node:
+            branches.append(r'\b' if last_char.isalnum() else "")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return "|".join(
+        (r'\b' if char.isalnum() else "") + re.escape(char) + render(child, char)
+        for char, child in sorted(trie.items())
+    )
+
+
+def compile_avoid_words(avoid_words: Optional[list]) -> AvoidWordMatcher:
+    """
+    Compile avoid words into one case-insensitive, prefix-factored matcher (cached).
+
+    Phrases starting/ending with a letter or digit only match on word boundaries.
+    The cache key is a hash of the normalised list, so an edited list compiles a
+    new matcher and takes effect immediately.
+
+    Args:
+        avoid_words: List of words/phrases to remove from responses
+
+    Returns:
+        AvoidWordMatcher (pattern is None for an empty list)
+    """
+    phrases = normalize_avoid_words(avoid_words)
+    key = hashlib.sha1("\n".join(phrases).encode("utf-8")).hexdigest()
+
+    matcher = _AVOID_MATCHER_CACHE.get(key)
+    if matcher is not None:
+        _AVOID_MATCHER_CACHE.move_to_end(key)
+        return matcher
+
+    matcher = AvoidWordMatcher(
+        key=key,
+        pattern=re.compile(_phrase_trie_regex(phrases), re.IGNORECASE) if phrases else None,
+        max_length=len(phrases[0]) if phrases else 0
+    )
+
+    _AVOID_MATCHER_CACHE[key] = matcher
+    if len(_AVOID_MATCHER_CACHE) > _AVOID_MATCHER_CACHE_SIZE:
+        _AVOID_MATCHER_CACHE.popitem(last=False)
+
+    return matcher
+
+
 class ResponseCleaner:
     """Cleans and post-processes LLM-generated text"""
 
@@ -245,8 +409,10 @@ class ResponseCleaner:
     # NUCLEAR OPTION: Removes entire sentence containing these patterns
     # This catches: "good morning beautiful", "hey gorgeous", "hi sunshine", etc.
     # No terms of endearment in greetings allowed
+    # Matches can only begin at a sentence start; the leading lookbehind skips the
+    # (always failing) retries from every character inside a sentence
     GREETING_BEAUTIFUL_PATTERN = re.compile(
-        r'(?:'
+        r'(?<![^.!?])(?:'
         r'[^.!?]*\b(?:good\s*morning|mornin[\'g]?|morning|good\s*evening|evenin[\'g]?|evening|'
         r'good\s*afternoon|afternoon|hey|hi|hello|yo|sup|howdy|greetings?)'
         r'[\s,]*'
@@ -260,8 +426,9 @@ class ResponseCleaner:
     # BANNED PHYSICAL ITEM OFFERS (P2.6)
     # NUCLEAR OPTION: Removes ANY mention of food, drinks, meals - AI cannot provide physical items
     # This removes ENTIRE SENTENCES containing these banned words or phrases
+    # Anchored at sentence starts like GREETING_BEAUTIFUL_PATTERN (same matches, linear time)
     PHYSICAL_ITEM_OFFER_PATTERN = re.compile(
-        r'(?:'
+        r'(?<![^.!?])(?:'
         r'[^.!?]*\b(?:coffee|tea|breakfast|dinner|lunch|meal|snack)\b[^.!?]*[.!?]?'  # NUCLEAR: Remove entire sentence with food/drink words
         r'|'
         r'[^.!?]*\b(?:making|make|made|get|getting|got|grab|grabbing|grabbed|prepare|preparing|prepared|cook|cooking|cooked)\s+(?:some\s+|a\s+|the\s+|you\s+|us\s+)?(?:breakfast|dinner|lunch|meal|snack|food|drink|water)\b[^.!?]*[.!?]?'  # NUCLEAR: Remove "making/get/grab + food"
@@ -350,18 +517,117 @@ class ResponseCleaner:
         re.IGNORECASE
     )
 
-    def __init__(self, character_name: str, user_name: str, avoid_patterns: list):
+
+    # Goodnight detection (used for both the user message and the generated text)
+    GOODNIGHT_PATTERN = re.compile(
+        r'\b(?:good\s*night|goodnight|sleep\s*well|sweet\s*dreams)\b',
+        re.IGNORECASE
+    )
+
+    # Placeholder used to protect hearts in simple goodnight messages from emoji removal
+    HEART_PLACEHOLDER = "<<<HEART_EMOJI>>>"
+
+    # Nested action flattening: "(a, (b), (c))" -> "(a, b, c)"
+    NESTED_ACTION_PATTERN = re.compile(r'\(([^()]*\([^)]*\)[^()]*)\)')
+    PARENTHESES_CHAR_PATTERN = re.compile(r'[()]')
+    DOUBLE_COMMA_PATTERN = re.compile(r',\s*,')
+
+    # Sentence splitting for truncation, and obviously cut-off endings ("warmth and.")
+    SENTENCE_SPLIT_PATTERN = re.compile(r'([.!?]+)(?=\s+[A-Z(]|\s*$)')
+    INCOMPLETE_ENDING_PATTERN = re.compile(r'\s+(and|or|but)\.$', re.IGNORECASE)
+
+    # Combined meta-commentary pattern (single pass over all remaining meta-patterns)
+    # Note: P2.6 patterns (greetings, gestures, offers, assumptions) are applied before this
+    COMBINED_META_PATTERN = re.compile(
+        '|'.join(f'(?:{p.pattern})' for p in (
+            AGGRESSIVE_NUMBERED_META_PATTERN,
+            NUMBERED_META_BLOCKS_PATTERN,
+            INTERNAL_REASONING_PATTERN,
+            NOTE_COMMENTARY_PATTERN,
+            EXPLANATION_BLOCK_PATTERN,
+            META_BULLET_LIST_PATTERN,
+            ASTERISK_META_INTRO_PATTERN,
+            TRAILING_BULLET_COMMENTARY_PATTERN,
+            META_ANALYSIS_TEXT_PATTERN,
+            MOOD_BASED_COMMENTARY_PATTERN,
+            OUTPUT_APPROPRIATE_PATTERN,
+            LABELED_META_SECTIONS_PATTERN,
+            STANDALONE_META_BULLETS_PATTERN,
+            META_REASONING_PATTERN,
+            META_PARENTHETICAL_PATTERN,
+            META_ANALYSIS_PATTERN,
+            BRACKET_PATTERN,
+            META_INSTRUCTION_PATTERN,
+            FORMAT_ARTIFACT_PATTERN,
+            EMOTION_METADATA_PATTERN,
+            DEBUG_MARKUP_PATTERN
+        )),
+        re.IGNORECASE | re.MULTILINE | re.DOTALL
+    )
+
+    # Additional aggressive cleanup passes for stubborn meta-commentary
+    # Pass 1: Remaining asterisk-wrapped content with "Acknowledged" or "Emotion"
+    ASTERISK_META_LEFTOVER_PATTERN = re.compile(
+        r'\*+\s*\([^)]*(?:Acknowledged|Emotion|Validation|Response|Output)[^)]*\).*?\*+',
+        re.IGNORECASE | re.DOTALL
+    )
+    # Pass 2: Standalone "(Acknowledged..." or "2." patterns anywhere
+    OPEN_META_LEFTOVER_PATTERN = re.compile(
+        r'\(\s*\(?(?:Acknowledged|Emotion|Response|Output|Action)[^)]*(?:\d+\.|[,)])[^)]*',
+        re.IGNORECASE | re.DOTALL
+    )
+    # Pass 3: Text that starts with "N/A," followed by meta-keywords
+    NA_META_PATTERN = re.compile(r'\bN/A,?\s+(?:No|no)\s+(?:struggle|negativity)[^.!?]*', re.IGNORECASE)
+    # Pass 4: Trailing numbered items like "2." at the end
+    TRAILING_NUMBER_PATTERN = re.compile(r'\s+\d+\.\s*$')
+
+    # Punctuation and spacing cleanup
+    MULTI_SPACE_PATTERN = re.compile(r'\s{2,}')
+    COMBINED_PUNCTUATION_PATTERN = re.compile(
+        r'(?P<spacing>\s+([.,!?;:]))|(?P<leading>^[.,!?\s;:]+)|(?P<quote>^\s*["\']|["\']\s*$)'
+    )
+    REPEATED_PUNCTUATION_PATTERN = re.compile(r'([.,!?])\1+')  # Remove duplicates but not "..."
+    DOUBLE_DOT_PATTERN = re.compile(r'\.{2}(?!\.)')  # Two dots become one (but leave ... alone)
+    EXCESS_DOTS_PATTERN = re.compile(r'\.{4,}')  # Four or more dots become three
+    SPACE_BEFORE_PUNCTUATION_PATTERN = re.compile(r'\s+([.,!?])')
+
+    # Long quoted passages (40+ chars) - poetic artifacts or instruction leaks
+    LONG_QUOTE_PATTERN = re.compile(r'"[^"]{40,}"')
+
+    # Trailing bad punctuation (commas, semicolons at end of final sentence)
+    TRAILING_BAD_PUNCTUATION_PATTERN = re.compile(r'[,;:]+(\s*)$')
+
+    # Asterisk actions, converted to parentheses for frontend styling
+    ASTERISK_ACTION_PATTERN = re.compile(r'\*([^*]+)\*')
+
+    # Stop sequences (system markers, not turn boundaries)
+    # Order matters: each one truncates the text before the next is checked
+    STOP_SEQUENCES = (
+        "User Permissions:", "(emotion:", "[silence]",
+        "### End of Conversation", "###",
+        "*(END CURRENT CONTEXT)*", "(END CURRENT CONTEXT)",
+        "((END RESPONSE))", "(END RESPONSE)", "**END RESPONSE**", "*(END RESPONSE)*",
+        "((END OF ASSISTANT RESPONSE))", "(END OF ASSISTANT RESPONSE)", "**END OF ASSISTANT RESPONSE**", "*(END OF ASSISTANT RESPONSE)*",
+        "((END OF TRANSCRIPT))", "(END OF TRANSCRIPT)", "**END OF TRANSCRIPT**", "*(END OF TRANSCRIPT)*",
+        "((END TURN))", "(END TURN)", "**END TURN**", "*(END TURN)*",
+        "((END OF TURN))", "(END OF TURN)", "**END OF TURN**", "*(END OF TURN)*",
+        "### RESPONSE ###", "### USER INPUT ###", "### CONVERSATION HISTORY ###",
+        "### CURRENT CONTEXT ###"
+    )
+
+    def __init__(self, character_name: str, user_name: str, avoid_words: Optional[list] = None):
         """
         Initialize cleaner with character-specific settings
 
         Args:
             character_name: Name of the character
             user_name: Name of the user
-            avoid_patterns: List of compiled regex patterns to remove
+            avoid_words: List of words/phrases to remove
         """
         self.character_name = character_name
         self.user_name = user_name
-        self.avoid_patterns = avoid_patterns
+        self.avoid_matcher = compile_avoid_words(avoid_words)
+        self.turn_markers = compile_turn_markers(character_name, user_name)
 
     @staticmethod
     def _remove_duplicates(text: str) -> str:
@@ -374,21 +640,24 @@ class ResponseCleaner:
         max_len = min(len(words) // 2, 30)
         for seq_len in range(max_len, 4, -1):
             if len(words) >= seq_len * 2:
-                if ' '.join(words[-seq_len * 2:-seq_len]) == ' '.join(words[-seq_len:]):
+                if words[-seq_len * 2:-seq_len] == words[-seq_len:]:
                     return ' '.join(words[:-seq_len])
         return text
 
-    @staticmethod
-    def _truncate_to_sentences(text: str, max_sentences: int = 3) -> str:
+    @classmethod
+    def _truncate_to_sentences(cls, text: str, max_sentences: int = 3) -> str:
         """Truncate to max sentences naturally"""
         if not text:
             return text
-        parts = re.split(r'([.!?]+)(?=\s+[A-Z(]|\s*$)', text)
+        parts = cls.SENTENCE_SPLIT_PATTERN.split(text)
         sentences = []
         for i in range(0, len(parts) - 1, 2):
             sentences.append(parts[i] + (parts[i + 1] if i + 1 < len(parts) else ''))
         if len(parts) % 2 == 1 and parts[-1].strip():
             sentences.append(parts[-1])
+        # Split points sit before the whitespace, so each sentence after the first
+        # carries its leading space - drop it before re-joining
+        sentences = [sentence.strip() for sentence in sentences]
 
         # If we have more sentences than the limit, truncate
         if len(sentences) > max_sentences:
@@ -396,15 +665,14 @@ class ResponseCleaner:
             # Check if last sentence looks incomplete (ends with conjunctions followed by period)
             # This catches cases like "You taste like warmth and." where the sentence was cut off mid-thought
             # Only flag the most obvious incomplete conjunctions: and, or, but
-            incomplete_endings = re.compile(r'\s+(and|or|but)\.$', re.IGNORECASE)
-            if incomplete_endings.search(result):
+            if cls.INCOMPLETE_ENDING_PATTERN.search(result):
                 # Remove the incomplete sentence ending - go back one sentence
                 sentences_without_incomplete = sentences[:max_sentences-1]
                 if sentences_without_incomplete:
                     result = ' '.join(sentences_without_incomplete)
                 else:
                     # If only one sentence and it's incomplete, just remove the trailing conjunction
-                    result = incomplete_endings.sub('.', result).strip()
+                    result = cls.INCOMPLETE_ENDING_PATTERN.sub('.', result).strip()
 
             # Ensure proper ending punctuation
             if result and result[-1] not in '.!?':
@@ -415,321 +683,184 @@ class ResponseCleaner:
         if sentences:
             last_sentence = sentences[-1]
             # Only flag the most obvious incomplete conjunctions: and, or, but
-            incomplete_endings = re.compile(r'\s+(and|or|but)\.$', re.IGNORECASE)
-            if incomplete_endings.search(last_sentence):
+            if cls.INCOMPLETE_ENDING_PATTERN.search(last_sentence):
                 # This is an incomplete sentence at the end - remove the conjunction+period, keep the word before
-                sentences[-1] = incomplete_endings.sub('.', last_sentence).strip()
+                sentences[-1] = cls.INCOMPLETE_ENDING_PATTERN.sub('.', last_sentence).strip()
                 return ' '.join(sentences)
 
         return text
 
-    @staticmethod
-    def _flatten_nested_actions(text: str) -> str:
+    @classmethod
+    def _flatten_nested_actions(cls, text: str) -> str:
         """Flatten nested parentheses: "(a, (b), (c))" -> "(a, b, c)" """
+        if '(' not in text:
+            return text
+
         def flatten(match):
-            content = re.sub(r'[()]', '', match.group(1))
-            content = re.sub(r',\s*,', ',', content)
-            return f"({re.sub(r'\s+', ' ', content).strip()})"
+            content = cls.PARENTHESES_CHAR_PATTERN.sub('', match.group(1))
+            content = cls.DOUBLE_COMMA_PATTERN.sub(',', content)
+            return f"({cls.WHITESPACE_PATTERN.sub(' ', content).strip()})"
         prev = None
         while prev != text:
             prev = text
-            text = re.sub(r'\(([^()]*\([^)]*\)[^()]*)\)', flatten, text)
+            text = cls.NESTED_ACTION_PATTERN.sub(flatten, text)
         return text
 
-    def clean(self, text: str, user_message: str = "") -> str:
+    @staticmethod
+    def _punctuation_repl(match) -> str:
+        """Replacement for COMBINED_PUNCTUATION_PATTERN"""
+        if match.group('spacing'):
+            return match.group(2)  # Remove space before punctuation
+        elif match.group('leading') or match.group('quote'):
+            return ''  # Remove leading punctuation or quotes
+        return match.group(0)
+
+    def _strip_turn_markers(self, text: str) -> str:
         """
-        Apply all final cleaning steps to raw LLM output
-
-        Args:
-            text: Raw LLM output text
-            user_message: The user's original message (to detect goodnight)
-
-        Returns:
-            Cleaned text ready for user
+        Remove turn markers and truncate where the response crosses into another speaker's turn.
+        Only splits on markers at the START of the text, after a newline, or after a sentence
+        ending - this prevents false positives when the character mentions the user's name.
         """
-        text = text.strip()
+        markers = self.turn_markers
 
-        # CRITICAL: FORCE goodnight response when user says goodnight
-        # This ALWAYS returns "Goodnight {username} ❤️" regardless of what the AI generated
-        user_said_goodnight = bool(re.search(r'\b(?:good\s*night|goodnight|sleep\s*well|sweet\s*dreams)\b', user_message, re.IGNORECASE))
-        if user_said_goodnight:
-            # Extract any optional phrase from AI response (after goodnight)
-            ai_said_goodnight_match = re.search(r'\b(?:good\s*night|goodnight)\b(.{0,30}?)(?:[.!?]|$)', text, re.IGNORECASE)
-            optional_phrase = ""
-            if ai_said_goodnight_match:
-                optional_phrase = ai_said_goodnight_match.group(1).strip()
-                # Clean up the optional phrase - remove emojis, extra punctuation
-                optional_phrase = re.sub(r'[❤️💕💖🥰😘]', '', optional_phrase)
-                optional_phrase = re.sub(r'[,.]', '', optional_phrase).strip()
-                # Limit to 4 words max
-                words = optional_phrase.split()
-                if len(words) > 4:
-                    optional_phrase = ""
-
-            # FORCE the correct format
-            if optional_phrase:
-                return f"Goodnight {self.user_name} ❤️"
-                #return f"Goodnight {self.user_name} ❤️ {optional_phrase}"
-            else:
-                return f"Goodnight {self.user_name} ❤️"
-
-        # Check if this is a SIMPLE goodnight message (up to 8 words)
-        # Heart emoji ONLY allowed in brief goodnight messages like "Goodnight Name ❤️"
-        is_goodnight = bool(re.search(r'\b(?:good\s*night|goodnight|sleep\s*well|sweet\s*dreams)\b', text, re.IGNORECASE))
-        word_count = len(text.split())
-        is_simple_goodnight = is_goodnight and word_count <= 8
-
-        # Preserve heart emojis ONLY for simple goodnight messages
-        heart_placeholder = "<<<HEART_EMOJI>>>"
-        hearts_found = []
-        if is_simple_goodnight:
-            # Save all heart emojis for simple goodnight messages ONLY
-            hearts_found = self.HEART_PATTERN.findall(text)
-            # Replace with placeholder
-            text = self.HEART_PATTERN.sub(heart_placeholder, text)
-
-        # Remove ALL emojis (including hearts for non-simple-goodnight messages)
-        text = self.EMOJI_PATTERN.sub('', text)
-        # Also remove hearts that weren't preserved
-        if not is_simple_goodnight:
-            text = self.HEART_PATTERN.sub('', text)
+        # Turn markers at the VERY START of the response are formatting artifacts
+        if text.startswith(markers.character_prefix):
+            text = text[len(markers.character_prefix):].strip()
+        if text.startswith(markers.user_prefix):
+            text = text[len(markers.user_prefix):].strip()
 
-        # Restore heart emojis ONLY for simple goodnight messages
-        if is_simple_goodnight and hearts_found:
-            for heart in hearts_found:
-                text = text.replace(heart_placeholder, heart, 1)
-
-        # Flatten nested action parentheses
-        text = self._flatten_nested_actions(text)
-
-        # Remove malformed action formatting (broken double parentheses and extra asterisks)
-        text = self.MALFORMED_ACTION_PATTERN.sub('', text)
-
-        # CRITICAL: Remove ALL BANNED P2.6 patterns FIRST (before other cleaning)
-        # 1. Remove banned greeting patterns (good morning beautiful, hey gorgeous, etc.)
-        text = self.GREETING_BEAUTIFUL_PATTERN.sub('', text)
-
-        # 2. Remove infantilizing gestures (tugging into lap, patting head, etc.)
-        text = self.INFANTILIZING_GESTURE_PATTERN.sub('', text)
-
-        # 3. Remove physical item offers (coffee, breakfast, food, etc.)
-        text = self.PHYSICAL_ITEM_OFFER_PATTERN.sub('', text)
-
-        # 4. Remove assumptions about user state (you seem tired, after the nightmares, etc.)
-        text = self.ASSUMPTION_PATTERN.sub('', text)
-
-        # 5. Remove trailing incomplete thoughts (well... you know, thinking about... never mind, etc.)
-        text = self.TRAILING_INCOMPLETE_PATTERN.sub('', text)
-
-        # 6. Remove duplicate word stutters (well well, yeah yeah, well, well, yeah, yeah, etc.)
-        text = self.DUPLICATE_WORD_PATTERN.sub(r'\1', text)
-
-        # 7. Remove filler sounds and banned terms (Mmm, Mm, (Mmm), sunshine, etc.)
-        text = self.FILLER_SOUNDS_PATTERN.sub('', text)
-
-        # OPTIMIZED: Combine all remaining meta-commentary removal into one pass
-        # Note: P2.6 patterns (greetings, gestures, offers, assumptions) already applied above
-        # Build combined pattern from remaining meta-patterns
-        if not hasattr(self, '_combined_meta_pattern'):
-            # Cache combined pattern on first use
-            meta_patterns = [
-                self.AGGRESSIVE_NUMBERED_META_PATTERN.pattern,
-                self.NUMBERED_META_BLOCKS_PATTERN.pattern,
-                self.INTERNAL_REASONING_PATTERN.pattern,
-                self.NOTE_COMMENTARY_PATTERN.pattern,
-                self.EXPLANATION_BLOCK_PATTERN.pattern,
-                self.META_BULLET_LIST_PATTERN.pattern,
-                self.ASTERISK_META_INTRO_PATTERN.pattern,
-                self.TRAILING_BULLET_COMMENTARY_PATTERN.pattern,
-                self.META_ANALYSIS_TEXT_PATTERN.pattern,
-                self.MOOD_BASED_COMMENTARY_PATTERN.pattern,
-                self.OUTPUT_APPROPRIATE_PATTERN.pattern,
-                self.LABELED_META_SECTIONS_PATTERN.pattern,
-                self.STANDALONE_META_BULLETS_PATTERN.pattern,
-                self.META_REASONING_PATTERN.pattern,
-                self.META_PARENTHETICAL_PATTERN.pattern,
-                self.META_ANALYSIS_PATTERN.pattern,
-                self.BRACKET_PATTERN.pattern,
-                self.META_INSTRUCTION_PATTERN.pattern,
-                self.FORMAT_ARTIFACT_PATTERN.pattern,
-                self.EMOTION_METADATA_PATTERN.pattern,
-                self.DEBUG_MARKUP_PATTERN.pattern
-            ]
-            self._combined_meta_pattern = re.compile('|'.join(f'(?:{p})' for p in meta_patterns), re.IGNORECASE | re.MULTILINE | re.DOTALL)
-
-        text = self._combined_meta_pattern.sub('', text)
-
-        # Additional aggressive cleanup passes for stubborn meta-commentary
-        # Run multiple passes to catch nested and evolving patterns
-
-        # Pass 1: Remove any remaining asterisk-wrapped content with "Acknowledged" or "Emotion"
-        text = re.sub(r'\*+\s*\([^)]*(?:Acknowledged|Emotion|Validation|Response|Output)[^)]*\).*?\*+', '', text, flags=re.IGNORECASE | re.DOTALL)
-
-        # Pass 2: Remove standalone "(Acknowledged..." or "2." patterns anywhere
-        text = re.sub(r'\(\s*\(?(?:Acknowledged|Emotion|Response|Output|Action)[^)]*(?:\d+\.|[,)])[^)]*', '', text, flags=re.IGNORECASE | re.DOTALL)
-
-        # Pass 3: Remove any text that starts with "N/A," followed by meta-keywords
-        text = re.sub(r'\bN/A,?\s+(?:No|no)\s+(?:struggle|negativity)[^.!?]*', '', text, flags=re.IGNORECASE)
-
-        # Pass 4: Remove trailing numbered items like "2." at the end
-        text = re.sub(r'\s+\d+\.\s*$', '', text)
-
-        # Clean up empty parentheses left behind after meta-commentary removal
-        text = self.EMPTY_PARENTHESES_PATTERN.sub('', text)
-
-        # Clean up multiple consecutive spaces
-        text = re.sub(r'\s{2,}', ' ', text)
-
-        # OPTIMIZED: Combine punctuation fixes into one pass
-        if not hasattr(self, '_combined_punctuation_pattern'):
-            # Cache combined pattern
-            self._combined_punctuation_pattern = re.compile(
-                r'(?P<spacing>\s+([.,!?;:]))|(?P<leading>^[.,!?\s;:]+)|(?P<quote>^\s*["\']|["\']\s*$)'
-            )
-
-        def punctuation_repl(match):
-            if match.group('spacing'):
-                return match.group(2)  # Remove space before punctuation
-            elif match.group('leading') or match.group('quote'):
-                return ''  # Remove leading punctuation or quotes
-            return match.group(0)
-
-        text = self._combined_punctuation_pattern.sub(punctuation_repl, text)
-
-        # Remove multiple consecutive punctuation marks (e.g., "..." -> "." unless it's exactly three dots)
-        text = re.sub(r'([.,!?])\1+', r'\1', text)  # Remove duplicates but not "..."
-        text = re.sub(r'\.{2}(?!\.)', '.', text)  # Two dots become one (but leave ... alone)
-        text = re.sub(r'\.{4,}', '...', text)  # Four or more dots become three
-
-        # CRITICAL: Remove code block markers (```) FIRST before cleaning stop sequences
-        # This prevents interference when stop sequences appear wrapped in code blocks like:
-        # ```*(END OF TRANSCRIPT)*```
-        text = re.sub(r'```', '', text)
-
-        # Remove stop sequences and turn markers
-        # IMPORTANT: Only split on turn markers that appear at the START of the text or after a newline
-        # This prevents false positives when character mentions the user's name in dialogue
-
-        # First, check for turn markers at the VERY START of the response (character/user name followed by colon)
-        # These should be removed entirely (they're formatting artifacts)
-        if text.startswith(f"{self.character_name}:"):
-            text = text[len(f"{self.character_name}:"):].strip()
-        if text.startswith(f"{self.user_name}:"):
-            text = text[len(f"{self.user_name}:"):].strip()
-
-        # Then, check for turn boundaries (newline + name + colon OR space + name + colon at end of sentence)
-        # These indicate the response has crossed into another speaker's turn - truncate there
-
-        # First, check for simple newline boundaries
-        simple_boundaries = [
-            f"\n{self.user_name}:",
-            f"\n{self.character_name}:",
-            "\nUser:",
-            "\nHuman:"
-        ]
-
-        for boundary in simple_boundaries:
+        # Simple newline boundaries
+        for boundary in markers.boundaries:
             if boundary in text:
-                text = text.split(boundary)[0].strip()
-
-        # Then check for speaker transitions that occur after sentence endings
-        # Pattern: ". Name:" or "? Name:" or "! Name:" - these indicate turn switches
-        import re as regex_module
-        speaker_transition_pattern = regex_module.compile(
-            rf'[.!?]\s*{regex_module.escape(self.user_name)}:\s',
-            regex_module.IGNORECASE
-        )
-        if speaker_transition_pattern.search(text):
-            # Split at the first occurrence and keep everything before
-            text = speaker_transition_pattern.split(text)[0].strip()
-
-        # Also check for character name transitions (in case character name appears mid-response)
-        char_transition_pattern = regex_module.compile(
-            rf'[.!?]\s*{regex_module.escape(self.character_name)}:\s',
-            regex_module.IGNORECASE
-        )
-        if char_transition_pattern.search(text):
-            text = char_transition_pattern.split(text)[0].strip()
-
-        # Finally, check for any "Name:" pattern that appears after at least 10 words
-        # This catches script-style continuations without proper punctuation
-        words_before_name = len(text.split())
-        if words_before_name > 10:  # Only check if response has substance
-            # Look for user name followed by colon anywhere in text (not at start)
-            if f" {self.user_name}:" in text:
-                text = text.split(f" {self.user_name}:")[0].strip()
-            if f" {self.character_name}:" in text and text.count(f" {self.character_name}:") > 0:
+                text = text.split(boundary, 1)[0].strip()
+
+        # Speaker transitions after sentence endings (". Name:") - keep everything before
+        match = markers.user_transition.search(text)
+        if match:
+            text = text[:match.start()].strip()
+        match = markers.character_transition.search(text)
+        if match:
+            text = text[:match.start()].strip()
+
+        # Any "Name:" after at least 10 words catches script-style continuations
+        if len(text.split()) > 10:
+            if markers.user_inline in text:
+                text = text.split(markers.user_inline, 1)[0].strip()
+            if markers.character_inline in text:
                 # Allow character's own name once (for "I'm {name}"), but not repeated
-                parts = text.split(f" {self.character_name}:")
-                if len(parts) > 2:  # Name appears multiple times
+                parts = text.split(markers.character_inline)
+                if len(parts) > 2:
                     text = parts[0].strip()
 
-        # Remove other stop sequences (system markers, not turn boundaries)
-        other_stop_sequences = [
-            "User Permissions:", "(emotion:", "[silence]",
-            "### End of Conversation", "###",
-            "*(END CURRENT CONTEXT)*", "(END CURRENT CONTEXT)",
-            "((END RESPONSE))", "(END RESPONSE)", "**END RESPONSE**", "*(END RESPONSE)*",
-            "((END OF ASSISTANT RESPONSE))", "(END OF ASSISTANT RESPONSE)", "**END OF ASSISTANT RESPONSE**", "*(END OF ASSISTANT RESPONSE)*",
-            "((END OF TRANSCRIPT))", "(END OF TRANSCRIPT)", "**END OF TRANSCRIPT**", "*(END OF TRANSCRIPT)*",
-            "((END TURN))", "(END TURN)", "**END TURN**", "*(END TURN)*",
-            "((END OF TURN))", "(END OF TURN)", "**END OF TURN**", "*(END OF TURN)*",
-            "### RESPONSE ###", "### USER INPUT ###", "### CONVERSATION HISTORY ###",
-            "### CURRENT CONTEXT ###"
-        ]
-
-        for seq in other_stop_sequences:
+        return text
+
+    def _strip_stop_sequences(self, text: str) -> str:
+        """Truncate at system stop sequences, then drop any re-exposed character prefix"""
+        for seq in self.STOP_SEQUENCES:
             if seq in text:
-                text = text.split(seq)[0].strip()
+                text = text.split(seq, 1)[0].strip()
 
         # Remove character name prefix at start (check again after stop sequence removal)
-        if text.startswith(f"{self.character_name}:"):
-            text = text[len(f"{self.character_name}:"):].strip()
-
-        # Clean up again
-        text = text.strip()
+        prefix = self.turn_markers.character_prefix
+        if text.startswith(prefix):
+            text = text[len(prefix):].strip()
 
-        # Remove avoid words/phrases
-        if self.avoid_patterns:
-            for pattern in self.avoid_patterns:
-                text = pattern.sub('', text)
+        return text.strip()
 
-        # Clean up multiple spaces and fix spacing around punctuation
-        text = self.WHITESPACE_PATTERN.sub(' ', text)
-        text = re.sub(r'\s+([.,!?;:])', r'\1', text)  # Remove space before punctuation
+    def _remove_avoid_words(self, text: str) -> str:
+        """Remove avoid words/phrases (one pass over the combined matcher)"""
+        pattern = self.avoid_matcher.pattern
+        if pattern is None:
+            return text
+        return pattern.sub('', text)
 
-        # Remove leading punctuation and quotes
-        text = self.LEADING_PUNCTUATION_PATTERN.sub('', text)
-        text = self.QUOTE_PATTERN.sub('', text)
+    # Ordered cleaning pipeline: (rule name, stage(cleaner, text) -> text)
+    # Emoji handling and the goodnight override run before these stages (see clean())
+    STAGES = (
+        ("flatten_nested_actions", lambda self, text: self._flatten_nested_actions(text)),
+        ("malformed_actions", _sub(MALFORMED_ACTION_PATTERN, marker='*')),
+        # CRITICAL: Remove ALL BANNED P2.6 patterns FIRST (before other cleaning)
+        ("banned_greetings", _sub(GREETING_BEAUTIFUL_PATTERN)),
+        ("infantilizing_gestures", _sub(INFANTILIZING_GESTURE_PATTERN)),
+        ("physical_item_offers", _sub(PHYSICAL_ITEM_OFFER_PATTERN)),
+        ("user_state_assumptions", _sub(ASSUMPTION_PATTERN)),
+        ("trailing_incomplete_thoughts", _sub(TRAILING_INCOMPLETE_PATTERN, marker='..')),
+        ("duplicate_word_stutters", _sub(DUPLICATE_WORD_PATTERN, r'\1')),
+        ("filler_sounds", _sub(FILLER_SOUNDS_PATTERN)),
+        # All remaining meta-commentary in one pass
+        ("meta_commentary", _sub(COMBINED_META_PATTERN)),
+        ("asterisk_meta_leftovers", _sub(ASTERISK_META_LEFTOVER_PATTERN, marker='*')),
+        ("open_meta_leftovers", _sub(OPEN_META_LEFTOVER_PATTERN, marker='(')),
+        ("na_meta", _sub(NA_META_PATTERN, marker='/')),
+        ("trailing_numbers", _sub(TRAILING_NUMBER_PATTERN)),
+        ("empty_parentheses", _sub(EMPTY_PARENTHESES_PATTERN, marker='(')),
+        ("multiple_spaces", _sub(MULTI_SPACE_PATTERN, ' ')),
+        ("punctuation", lambda self, text: self.COMBINED_PUNCTUATION_PATTERN.sub(self._punctuation_repl, text)),
+        ("repeated_punctuation", _sub(REPEATED_PUNCTUATION_PATTERN, r'\1')),
+        ("double_dots", _sub(DOUBLE_DOT_PATTERN, '.', marker='..')),
+        ("excess_dots", _sub(EXCESS_DOTS_PATTERN, '...', marker='....')),
+        # Remove code block markers (```) before stop sequences, e.g. ```*(END OF TRANSCRIPT)*```
+        ("code_fences", lambda self, text: text.replace('```', '')),
+        ("turn_markers", lambda self, text: self._strip_turn_markers(text)),
+        ("stop_sequences", lambda self, text: self._strip_stop_sequences(text)),
+        ("avoid_words", lambda self, text: self._remove_avoid_words(text)),
+        ("whitespace", _sub(WHITESPACE_PATTERN, ' ')),
+        ("punctuation_spacing", _sub(PUNCTUATION_SPACING_PATTERN, r'\1')),
+        ("leading_punctuation", _sub(LEADING_PUNCTUATION_PATTERN)),
+        ("edge_quotes", _sub(QUOTE_PATTERN)),
+        # Applied twice: removing one quote can pair up the quotes around it
+        ("long_quotes", _sub(LONG_QUOTE_PATTERN, marker='"')),
+        ("long_quotes_rescan", _sub(LONG_QUOTE_PATTERN, marker='"')),
+        ("trailing_bad_punctuation", _sub(TRAILING_BAD_PUNCTUATION_PATTERN, r'\1')),
+        # Keep ALL actions - do not filter or limit them
+        ("asterisk_actions", _sub(ASTERISK_ACTION_PATTERN, r'(\1)', marker='*')),
+        ("final_whitespace", _sub(WHITESPACE_PATTERN, ' ')),
+        ("final_punctuation_spacing", _sub(SPACE_BEFORE_PUNCTUATION_PATTERN, r'\1')),
+        ("final_repeated_punctuation", _sub(REPEATED_PUNCTUATION_PATTERN, r'\1')),
+        # Sometimes models repeat themselves
+        ("duplicate_text", lambda self, text: self._remove_duplicates(text.strip())),
+        # Romantic responses may need more room for descriptive physical affection
+        ("sentence_limit", lambda self, text: self._truncate_to_sentences(text.strip(), max_sentences=4)),
+    )
 
-        # Remove long quoted passages (40+ chars) that are likely poetic artifacts or instruction leaks
-        # This catches things like model outputting poetry or literary quotes
-        text = re.sub(r'"[^"]{40,}"', '', text)
-        text = re.sub(r'\"[^\"]{40,}\"', '', text)  # Also catch escaped quotes
+    def clean(self, text: str) -> str:
+        """
+        Apply all final cleaning steps to raw LLM output
 
-        # Clean up trailing bad punctuation (commas, semicolons at end of final sentence)
-        text = re.sub(r'[,;:]+(\s*)$', r'\1', text)
+        A user's goodnight never gets here: PreLLMGate answers it before generation.
 
-        # Convert asterisks to parentheses for frontend styling
-        # Keep ALL actions - do not filter or limit them
-        text = re.sub(r'\*([^*]+)\*', r'(\1)', text)
+        Args:
+            text: Raw LLM output text
 
-        # Clean up whitespace issues
-        text = re.sub(r'\s+', ' ', text)  # Multiple spaces to single space
-        text = re.sub(r'\s+([.,!?])', r'\1', text)  # Space before punctuation
-        text = re.sub(r'([.,!?])\1+', r'\1', text)  # Duplicate punctuation (e.g., ,, or ..)
+        Returns:
+            Cleaned text ready for user
+        """
+        text = text.strip()
 
-        # Remove duplicate consecutive text (sometimes models repeat themselves)
-        text = self._remove_duplicates(text.strip())
+        # Heart emoji ONLY allowed in SIMPLE goodnight messages (up to 8 words)
+        is_simple_goodnight = bool(self.GOODNIGHT_PATTERN.search(text)) and len(text.split()) <= 8
+        text = self._remove_emojis(text, keep_hearts=is_simple_goodnight)
 
-        # Truncate to 2-4 sentences for more natural, concise responses
-        # Romantic responses may need more room for descriptive physical affection
-        text = self._truncate_to_sentences(text.strip(), max_sentences=4)
+        for _name, stage in self.STAGES:
+            text = stage(self, text)
 
         # Add heart emoji to SIMPLE goodnight messages if not already present
-        # ONLY add to brief goodnights (5 words or less), NOT long responses
         if is_simple_goodnight and not self.HEART_PATTERN.search(text):
-            # Add heart emoji to the end if it doesn't already have one
             text = text.rstrip() + ' ❤️'
 
         return text.strip()
+
+    def _remove_emojis(self, text: str, keep_hearts: bool = False) -> str:
+        """
+        Remove all emojis. Hearts survive only when keep_hearts is set
+        (the EMOJI_PATTERN range covers both heart code points otherwise).
+        """
+        if not keep_hearts:
+            return self.EMOJI_PATTERN.sub('', text)
+
+        hearts = len(self.HEART_PATTERN.findall(text))
+        text = self.HEART_PATTERN.sub(self.HEART_PLACEHOLDER, text)
+        text = self.EMOJI_PATTERN.sub('', text)
+        if hearts:
+            text = text.replace(self.HEART_PLACEHOLDER, '❤️', hearts)
+        return text
@@ -0,0 +1,92 @@
+"""
+Pre-LLM Rule Gate
+Answers messages whose reply is fixed (crisis, goodnight, nyan) before any prompt is built
+"""
+import re
+import logging
+from typing import NamedTuple, Optional
+
+from .crisis_detector import CrisisDetector
+from .age_detector import AgeDetector
+from .response_cleaner import ResponseCleaner
+
+logger = logging.getLogger(__name__)
+
+
+class GateDecision(NamedTuple):
+    """A reply decided without the LLM"""
+    kind: str  # 'crisis', 'goodnight' or 'nyan'
+    text: str
+    risk_level: Optional[str] = None
+
+
+class PreLLMGate:
+    """
+    Deterministic rule layer run before prompt building.
+
+    In priority order:
+    1. Crisis - CrisisDetector intervention message (always wins)
+    2. Goodnight - "Goodnight {user} ❤️" (ResponseCleaner replaces any generation with this)
+    3. Nyan - "Nyan!" / "Nyan nyan!" (the prompt's nyan protocol allows nothing else)
+
+    Crisis and age checks share one SafetyScanner pass. Age violations are only
+    logged here; the prompt's age rule handles the redirection.
+    """
+
+    NYAN_PATTERN = re.compile(r'\bnyan\b', re.IGNORECASE)
+
+    def __init__(self, crisis_detector: CrisisDetector, age_detector: AgeDetector):
+        """
+        Args:
+            crisis_detector: Crisis detector (its scanner is shared with the age detector)
+            age_detector: Age restriction detector
+        """
+        self.crisis_detector = crisis_detector
+        self.age_detector = age_detector
+
+    def check(self, text: str, user_name: str) -> Optional[GateDecision]:
+        """
+        Decide whether a message can be answered without the LLM.
+
+        Args:
+            text: User's message
+            user_name: User's display name (for the goodnight reply)
+
+        Returns:
+            GateDecision, or None if the message needs a generated reply
+        """
+        if not text or not text.strip():
+            return None
+
+        scan = self.crisis_detector.scanner.scan(text)
+
+        is_crisis, risk_level, intervention_message = self.crisis_detector.detect(text, scan=scan)
+        if is_crisis:
+            logger.warning(f"🚨 CRISIS DETECTED - Risk level: {risk_level}")
+            logger.warning(f"   Returning intervention message without generation")
+            return GateDecision('crisis', intervention_message, risk_level)
+
+        # Logs the violation; generation continues with the prompt's 25+ rule
+        self.age_detector.detect(text, scan=scan)
+
+        return self.fixed_reply(text, user_name)
+
+    def fixed_reply(self, text: str, user_name: str) -> Optional[GateDecision]:
+        """
+        Goodnight and nyan rules only (for callers that run the safety checks themselves).
+
+        Args:
+            text: User's message
+            user_name: User's display name (for the goodnight reply)
+
+        Returns:
+            GateDecision, or None if the message needs a generated reply
+        """
+        if ResponseCleaner.GOODNIGHT_PATTERN.search(text):
+            return GateDecision('goodnight', f"Goodnight {user_name} ❤️")
+
+        nyans = len(self.NYAN_PATTERN.findall(text))
+        if nyans:
+            return GateDecision('nyan', "Nyan nyan!" if nyans > 1 else "Nyan!")
+
+        return None
@@ -0,0 +1,171 @@
+"""
+Safety Scanner
+One-pass multi-pattern matcher shared by CrisisDetector and AgeDetector
+"""
+import re
+import logging
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SafetyMatch(NamedTuple):
+    """One keyword or pattern hit"""
+    category: str
+    term: str  # keyword, or the pattern's matched text
+    start: int
+    end: int
+
+
+class SafetyScan:
+    """All matches found in one message, grouped by category"""
+
+    def __init__(self, matches: List[SafetyMatch]):
+        self.matches = matches
+        self._by_category: Dict[str, List[SafetyMatch]] = {}
+        for match in matches:
+            self._by_category.setdefault(match.category, []).append(match)
+
+    def has(self, category: str) -> bool:
+        """True if anything in the category matched"""
+        return category in self._by_category
+
+    def terms(self, category: str) -> List[str]:
+        """Distinct matched terms of a category, in order of first occurrence"""
+        return list(dict.fromkeys(match.term for match in self._by_category.get(category, ())))
+
+    def get(self, category: str) -> List[SafetyMatch]:
+        """All matches of a category with positions"""
+        return list(self._by_category.get(category, ()))
+
+
+def trie_regex(terms: Iterable[str]) -> str:
+    """
+    Prefix-factored alternation of literal terms.
+
+    Longer continuations are tried first (greedy optional groups), so at any
+    position the regex matches the longest term that starts there.
+    """
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end of term
+
+    def emit(node: dict) -> str:
+        is_end = '' in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if is_end else group
+
+    return emit(trie)
+
+
+class SafetyScanner:
+    """
+    Finds every keyword and pattern hit for all safety categories in one pass.
+
+    Keywords (substring semantics on the lower-cased message) are compiled into
+    a single trie-factored regex run as a zero-width lookahead at every
+    position. That reports the longest keyword starting at each position; the
+    shorter keywords starting there are exactly its keyword prefixes, which are
+    precomputed. The result is the full set of overlapping keyword occurrences
+    with positions, as an Aho-Corasick automaton would give, while the scan
+    itself runs inside the C regex engine.
+
+    Regex patterns are combined into one alternation per category (searched on
+    the original message, case-insensitive), so "did any pattern of this
+    category match" needs a single search.
+    """
+
+    def __init__(self, keyword_sets: Dict[str, Iterable[str]], pattern_sets: Optional[Dict[str, Iterable[str]]] = None):
+        """
+        Build the scanner
+
+        Args:
+            keyword_sets: category -> keywords (matched as lower-case substrings)
+            pattern_sets: category -> regex patterns (matched case-insensitively)
+        """
+        self._term_categories: Dict[str, List[str]] = {}
+        for category, keywords in keyword_sets.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                categories = self._term_categories.setdefault(keyword, [])
+                if category not in categories:
+                    categories.append(category)
+
+        terms = sorted(self._term_categories)
+        self._keyword_regex = re.compile(f"(?=({trie_regex(terms)}))") if terms else None
+
+        # Longest term at a position -> every term starting there (its keyword prefixes), longest first
+        self._prefix_terms: Dict[str, List[str]] = {
+            term: sorted((other for other in terms if term.startswith(other)), key=len, reverse=True)
+            for term in terms
+        }
+
+        self._pattern_regexes = {
+            category: re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), re.IGNORECASE)
+            for category, patterns in (pattern_sets or {}).items()
+            if patterns
+        }
+
+        logger.debug(f"Safety scanner built: {len(terms)} keywords, {len(self._pattern_regexes)} pattern groups")
+
+    def scan(self, message: str) -> SafetyScan:
+        """
+        Scan a message for all keyword and pattern matches.
+
+        Args:
+            message: User's message text
+
+        Returns:
+            SafetyScan with every match and its position
+        """
+        matches: List[SafetyMatch] = []
+        if not message:
+            return SafetyScan(matches)
+
+        if self._keyword_regex is not None:
+            message_lower = message.lower()
+            for hit in self._keyword_regex.finditer(message_lower):
+                start = hit.start()
+                for term in self._prefix_terms[hit.group(1)]:
+                    for category in self._term_categories[term]:
+                        matches.append(SafetyMatch(category, term, start, start + len(term)))
+
+        for category, regex in self._pattern_regexes.items():
+            for hit in regex.finditer(message):
+                matches.append(SafetyMatch(category, hit.group(0), hit.start(), hit.end()))
+
+        return SafetyScan(matches)
+
+
+@lru_cache(maxsize=1)
+def get_safety_scanner() -> SafetyScanner:
+    """
+    Shared scanner covering the crisis and age categories (built once per process).
+
+    Categories: crisis_high, crisis_medium, crisis_planning, age_keyword, age_pattern
+    """
+    from .crisis_detector import CrisisDetector
+    from .age_detector import AgeDetector
+
+    scanner = SafetyScanner(
+        keyword_sets={
+            'crisis_high': CrisisDetector.HIGH_RISK_KEYWORDS,
+            'crisis_medium': CrisisDetector.MEDIUM_RISK_KEYWORDS,
+            'age_keyword': AgeDetector.UNDERAGE_KEYWORDS,
+        },
+        pattern_sets={
+            'crisis_planning': CrisisDetector.PLANNING_PATTERNS,
+            'age_pattern': AgeDetector.AGE_PATTERNS,
+        }
+    )
+    logger.info("✅ Safety scanner compiled (crisis + age)")
+    return scanner
@@ -0,0 +1,103 @@
+"""
+Stream Stop Detector
+Ends streamed generation at the first turn marker, stop sequence or trailing meta-analysis
+"""
+import logging
+from typing import Optional
+
+from .response_cleaner import ResponseCleaner
+
+logger = logging.getLogger(__name__)
+
+
+class StreamStopDetector:
+    """
+    Watches LLM token deltas for the constructs after which ResponseCleaner.clean()
+    discards everything: turn markers, stop sequences, trailing meta-analysis and
+    numbered meta blocks.
+
+    When one appears `stopped` is set and `stop_reason` names the rule, so the
+    caller can stop sampling. Nothing is cleaned or emitted here - the raw output
+    still goes through ResponseCleaner.clean().
+
+    Only a tail of the stream is rescanned per delta: a marker split across deltas
+    is found once its last piece arrives, as long as it fits in the lookback.
+    """
+
+    # Rules that discard everything after them - hitting one ends the stream
+    REST_OF_TEXT_RULES = (
+        ("meta_analysis", ResponseCleaner.META_ANALYSIS_TEXT_PATTERN),
+        ("numbered_meta", ResponseCleaner.AGGRESSIVE_NUMBERED_META_PATTERN),
+    )
+
+    def __init__(self, cleaner: ResponseCleaner, lookback: int = 200):
+        """
+        Initialize stop detector
+
+        Args:
+            cleaner: ResponseCleaner for the character/user (provides the turn markers)
+            lookback: Characters of earlier output rescanned with each delta
+        """
+        self.cleaner = cleaner
+
+        self.stopped = False
+        self.stop_reason: Optional[str] = None
+
+        markers = cleaner.turn_markers
+        self._turn_boundaries = markers.boundaries
+        self._transitions = (markers.user_transition, markers.character_transition)
+        self._literal_markers = tuple(markers.boundaries) + ResponseCleaner.STOP_SEQUENCES
+
+        # A marker split across deltas must fit in the rescanned tail
+        self.lookback = max(lookback, max(len(marker) for marker in self._literal_markers))
+        self._tail = ""
+
+    def feed(self, delta: str) -> bool:
+        """
+        Consume a token delta.
+
+        Args:
+            delta: Newly generated text
+
+        Returns:
+            True once a stop condition has been seen
+        """
+        if self.stopped or not delta:
+            return self.stopped
+
+        # Emojis are removed before the cleaner's rules run, so they can't hide a marker
+        text = self._tail + self.cleaner._remove_emojis(delta)
+
+        reason = self._find_stop(text)
+        if reason:
+            self._stop(reason)
+        else:
+            self._tail = text[-self.lookback:]
+        return self.stopped
+
+    def _stop(self, reason: str):
+        """Mark the stream as finished"""
+        self.stopped = True
+        self.stop_reason = reason
+        logger.debug(f"Stream stop condition: {reason}")
+
+    def _find_stop(self, text: str) -> Optional[str]:
+        """
+        Find a stop condition in the rescanned text.
+
+        Returns:
+            Name of the rule that matched, or None
+        """
+        for marker in self._literal_markers:
+            if marker in text:
+                return "turn_marker" if marker in self._turn_boundaries else "stop_sequence"
+
+        for pattern in self._transitions:
+            if pattern.search(text):
+                return "turn_marker"
+
+        for reason, pattern in self.REST_OF_TEXT_RULES:
+            if pattern.search(text):
+                return reason
+
+        return None
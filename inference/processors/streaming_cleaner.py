@@ -0,0 +1,230 @@
+"""
+Streaming Response Cleaner
+Emits cleaned text while the LLM is still generating
+"""
+import re
+import logging
+from typing import Optional
+
+from .response_cleaner import ResponseCleaner
+from .stream_stop_detector import StreamStopDetector
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingResponseCleaner:
+    """
+    Cleans LLM output incrementally as token deltas arrive.
+
+    Each time the raw stream closes a sentence, the text up to that point is run
+    through ResponseCleaner.clean() and every cleaned sentence but the last is
+    emitted. The last sentence is held back because later text can still change it
+    (sentence splitting, trailing-punctuation and duplicate rules look at the end
+    of the text), as is anything from an unclosed bracket, asterisk or quote or an
+    inline speaker marker onwards. Sentence ends that a trailing duplicate repeat
+    could cut the response back to are not emitted either.
+
+    Nothing is emitted until the stream is past the short-reply rules (goodnight
+    hearts, inline markers) that depend on the total word count.
+
+    finish() emits the rest, so the concatenated output equals clean() on the whole
+    stream. Should a later rule rewrite text that was already emitted, `diverged`
+    is set and `final_text` holds the authoritative cleaned response.
+
+    Stop conditions are delegated to StreamStopDetector: `stopped` and
+    `stop_reason` tell the caller to stop generating.
+    """
+
+    # End of a sentence in the raw stream: terminal punctuation, closing quotes or
+    # brackets, then whitespace
+    RAW_BOUNDARY_PATTERN = re.compile(r'[.!?]+["\')\]*]*\s+')
+
+    # Words the stream must exceed before anything is emitted - ResponseCleaner keeps
+    # hearts for goodnights of up to 8 words and splits on inline markers above 10
+    MIN_WORDS = 10
+
+    # Open/close pairs whose unclosed opener holds back the rest of the text
+    BRACKETS = (("(", ")"), ("[", "]"))
+
+    # Longest trailing repeat ResponseCleaner._remove_duplicates drops
+    DUPLICATE_WINDOW = 30
+
+    # Sentence-final conjunction that ResponseCleaner trims from the last sentence
+    INCOMPLETE_ENDING_PATTERN = re.compile(r'(^|\s)(and|or|but)\.$', re.IGNORECASE)
+
+    def __init__(self, cleaner: ResponseCleaner, lookback: int = 200):
+        """
+        Initialize streaming cleaner
+
+        Args:
+            cleaner: ResponseCleaner for the character/user
+            lookback: Characters of earlier output rescanned for stop conditions
+        """
+        self.cleaner = cleaner
+        self.stop_detector = StreamStopDetector(cleaner, lookback=lookback)
+
+        self.diverged = False
+        self.final_text: Optional[str] = None
+
+        self._chunks = []
+        self._raw_length = 0
+        self._scanned = 0
+        self._closed = 0
+        self._emitted = ""
+
+    @property
+    def stopped(self) -> bool:
+        return self.stop_detector.stopped
+
+    @property
+    def stop_reason(self) -> Optional[str]:
+        return self.stop_detector.stop_reason
+
+    @property
+    def raw_text(self) -> str:
+        """Raw output consumed so far"""
+        return "".join(self._chunks)
+
+    def feed(self, delta: str) -> str:
+        """
+        Consume a token delta.
+
+        Args:
+            delta: Newly generated text
+
+        Returns:
+            Cleaned text that is now final (may be empty)
+        """
+        if not delta or self.final_text is not None:
+            return ""
+
+        self._chunks.append(delta)
+        self._raw_length += len(delta)
+        self.stop_detector.feed(delta)
+
+        if self.diverged:
+            return ""
+
+        raw = self.raw_text
+        closed = self._last_boundary(raw)
+        if closed <= self._closed:
+            return ""
+        self._closed = closed
+
+        prefix = raw[:closed]
+        if len(prefix.split()) <= self.MIN_WORDS:
+            return ""
+
+        return self._emit_stable(self.cleaner.clean(prefix))
+
+    def finish(self) -> str:
+        """
+        Clean the whole stream and return whatever was not emitted yet.
+
+        Returns:
+            Remaining cleaned text
+        """
+        if self.final_text is None:
+            self.final_text = self.cleaner.clean(self.raw_text)
+
+            if not self.diverged and not self.final_text.startswith(self._emitted):
+                self.diverged = True
+                logger.warning("⚠️ Streamed text diverged from the cleaned response")
+
+        if self.diverged:
+            return ""
+
+        remainder = self.final_text[len(self._emitted):]
+        self._emitted = self.final_text
+        return remainder
+
+    def _last_boundary(self, raw: str) -> int:
+        """End of the last closed sentence in the raw stream (0 if none)"""
+        # A boundary needs its trailing whitespace, so rescan from just before the
+        # previous scan position
+        start = max(self._scanned - 8, self._closed)
+        self._scanned = len(raw)
+
+        closed = self._closed
+        for match in self.RAW_BOUNDARY_PATTERN.finditer(raw, start):
+            closed = match.end()
+        return closed
+
+    def _emit_stable(self, cleaned: str) -> str:
+        """Emit the part of a cleaned prefix that later text can no longer change"""
+        if not cleaned.startswith(self._emitted):
+            self.diverged = True
+            logger.warning("⚠️ Streamed text diverged from the cleaned prefix")
+            return ""
+
+        cut = self._stable_length(cleaned)
+        if cut <= len(self._emitted):
+            return ""
+
+        emitted = cleaned[len(self._emitted):cut]
+        self._emitted = cleaned[:cut]
+        return emitted
+
+    def _stable_length(self, cleaned: str) -> int:
+        """Length of the cleaned prefix that is safe to emit"""
+        # Ends of every sentence but the last
+        cuts = [
+            match.end() for match in ResponseCleaner.SENTENCE_SPLIT_PATTERN.finditer(cleaned)
+            if cleaned[match.end():].strip()
+        ]
+        if not cuts:
+            return 0
+        limit = cuts[-1]
+
+        markers = self.cleaner.turn_markers
+        for marker in (markers.user_inline, markers.character_inline):
+            index = cleaned.find(marker)
+            if index != -1:
+                limit = min(limit, index)
+
+        for opener, closer in self.BRACKETS:
+            limit = min(limit, self._unclosed(cleaned, opener, closer))
+
+        # Asterisk actions and long quotes are matched in pairs - hold back from the
+        # last one, which later text could still pair with
+        for mark in ("*", '"'):
+            index = cleaned.rfind(mark)
+            if index != -1:
+                limit = min(limit, index)
+
+        for cut in reversed(cuts):
+            if cut <= len(self._emitted):
+                break
+            if cut <= limit and not self._may_become_end(cleaned[:cut].split()):
+                return cut
+        return 0
+
+    def _may_become_end(self, words: list) -> bool:
+        """
+        Whether later text could make ResponseCleaner cut the response back into
+        these words, so that its end-of-text fixes would rewrite them.
+
+        _remove_duplicates drops a trailing repeat of 5-30 words. A repeat that
+        starts inside the emitted words needs their last k words to equal the k
+        words one repeat length earlier. One that starts right after them ends the
+        response on their last sentence, which must not be an incomplete ending.
+        """
+        if self.INCOMPLETE_ENDING_PATTERN.search(" ".join(words[-2:])):
+            return True
+
+        for length in range(5, self.DUPLICATE_WINDOW + 1):
+            for k in range(1, min(length, len(words) - length) + 1):
+                if words[-k:] == words[-k - length:-length]:
+                    return True
+        return False
+
+    @staticmethod
+    def _unclosed(text: str, opener: str, closer: str) -> int:
+        """Index of the outermost unclosed opener (len(text) if all are closed)"""
+        stack = []
+        for index, char in enumerate(text):
+            if char == opener:
+                stack.append(index)
+            elif char == closer and stack:
+                stack.pop()
+        return stack[0] if stack else len(text)
@@ -0,0 +1,90 @@
+"""
+Startup Profiler
+Records import time and load time per service component during startup
+"""
+import time
+import logging
+import importlib
+from contextlib import contextmanager
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """
+    Times each component's startup in two phases:
+
+    - import: loading the component's heavy third-party modules (llama_cpp,
+      transformers, chromadb, ...). Components import these lazily, so they
+      are pulled in explicitly here to attribute the cost correctly.
+    - load: constructing and initializing the component (model files,
+      database handles, server connections).
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.components: Dict[str, Dict[str, Any]] = {}
+
+    def _record(self, component: str, phase: str, seconds: float, ok: bool):
+        entry = self.components.setdefault(component, {'import_s': 0.0, 'load_s': 0.0, 'status': 'ok'})
+        entry[f'{phase}_s'] += seconds
+        if not ok:
+            entry['status'] = 'failed'
+
+    @contextmanager
+    def track(self, component: str, phase: str = "load"):
+        """
+        Time a block of startup work for a component.
+
+        Args:
+            component: Component name (e.g. "llm", "emotion")
+            phase: "import" or "load"
+        """
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(component, phase, time.perf_counter() - start, ok)
+
+    def import_modules(self, component: str, *module_names: str):
+        """
+        Import a component's heavy modules, timed as its import phase.
+
+        Raises:
+            ImportError: If a module is not installed
+        """
+        with self.track(component, "import"):
+            for name in module_names:
+                importlib.import_module(name)
+
+    def skip(self, component: str, reason: str = "disabled"):
+        """Record a component that was not started"""
+        self.components[component] = {'import_s': 0.0, 'load_s': 0.0, 'status': reason}
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-component timings (seconds) and total startup time"""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            'total_s': round(end - self.started, 3),
+            'components': {
+                name: {
+                    'import_s': round(entry['import_s'], 3),
+                    'load_s': round(entry['load_s'], 3),
+                    'status': entry['status'],
+                }
+                for name, entry in self.components.items()
+            }
+        }
+
+    def finish(self):
+        """Mark startup complete and log one line per component plus the total"""
+        self.finished = time.perf_counter()
+        summary = self.summary()
+        logger.info("Startup profile:")
+        for name, entry in summary['components'].items():
+            logger.info(f"   {name:<12} import {entry['import_s']:>7.3f}s   load {entry['load_s']:>7.3f}s   ({entry['status']})")
+        logger.info(f"   {'total':<12} {summary['total_s']:.3f}s")
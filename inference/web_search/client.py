@@ -7,10 +7,11 @@ Note: Memory is now handled by ChromaDB vector service (see services/memory_serv
 
 import asyncio
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
 from pathlib import Path
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client, StdioServerParameters
+
+if TYPE_CHECKING:
+    from mcp import ClientSession
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +19,7 @@ class MCPClientManager:
     """Manages MCP server connections and tool calls."""
 
     def __init__(self):
-        self.search_session: Optional[ClientSession] = None
+        self.search_session: Optional["ClientSession"] = None
         self.search_context = None
         self.initialized = False
 
@@ -52,6 +53,10 @@ class MCPClientManager:
                 self.search_context = None
                 return
 
+            # mcp is only imported when web search is enabled
+            from mcp import ClientSession, StdioServerParameters
+            from mcp.client.stdio import stdio_client
+
             # Create server parameters
             server_params = StdioServerParameters(
                 command="python3",